@@ -1,10 +1,42 @@
 from contextlib import contextmanager
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from apps.backend.services.db import SessionLocal
+from apps.backend.services.cache import CACHE, CacheKey, etag, matching_etag
+from apps.backend.services.db import AsyncSessionLocal, SessionLocal
 
 def get_db():
     db: Session = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+# 매번 서버에 확인(304)하도록: 데이터는 ETL 적재 때만 바뀜
+CACHE_CONTROL = "no-cache"
+
+async def not_modified(request: Request, key: CacheKey):
+    """(304 response or None, ETag, dataset version); the version is polled, so a 304 normally costs no query."""
+    version = await CACHE.version()
+    tag = etag(version, key)
+    matched = matching_etag(request.headers.get("if-none-match"), tag)
+    if matched:
+        # 클라이언트가 받은 그대로 (압축 응답이면 "-gzip"/"-zstd" 붙은 ETag)
+        return Response(status_code=304, headers={"ETag": matched, "Cache-Control": CACHE_CONTROL}), tag, version
+    return None, tag, version
+
+async def cached_json(request: Request, key: CacheKey, loader: Callable[[], Awaitable[object]]) -> Response:
+    # 세션은 loader 안에서 처음 쿼리할 때 커넥션을 잡으므로 304 / cache hit은 DB를 건드리지 않음
+    unchanged, tag, version = await not_modified(request, key)
+    if unchanged:
+        return unchanged
+    body = await CACHE.get_or_load(key, loader, version)
+    return Response(content=body, media_type="application/json", headers={"ETag": tag, "Cache-Control": CACHE_CONTROL})
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.backend.services import analytics
+from apps.backend.services.cache import make_key
+from .deps import cached_json, get_async_db
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/series")
+async def series(
+    request: Request,
+    country: List[str] = Query(..., description="Country name(s); repeat or comma-separate"),
+    metric: str = "co2_mt",
+    indicator: Optional[List[str]] = Query(None, description="value | ma | yoy | yoy_pct | share (default: value)"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    window: int = Query(5, ge=1, le=100, description="Moving average window in years"),
+    points: Optional[int] = Query(None, ge=2, le=5000, description="Reduce each series to at most this many bucket means"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = make_key("analytics/series", country=country, metric=metric, indicator=indicator, year_from=year_from,
+                   year_to=year_to, window=window, points=points)
+    try:
+        return await cached_json(request, key, lambda: analytics.series(
+            db, names=country, metric=metric, indicators=indicator, year_from=year_from, year_to=year_to,
+            window=window, points=points))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cagr")
+async def cagr(
+    request: Request,
+    start: int,
+    end: int,
+    country: List[str] = Query(..., description="Country name(s); repeat or comma-separate"),
+    metric: str = "co2_mt",
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = make_key("analytics/cagr", country=country, metric=metric, start=start, end=end)
+    try:
+        return await cached_json(request, key, lambda: analytics.cagr(
+            db, names=country, metric=metric, start=start, end=end))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
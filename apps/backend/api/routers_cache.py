@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException
+
+from apps.backend.services.cache import CACHE
+from apps.backend.services.snapshot import SNAPSHOTS
+
+router = APIRouter(prefix="/cache", tags=["cache"])
+
+@router.get("/stats")
+async def stats():
+    return CACHE.stats()
+
+@router.get("/version")
+async def version():
+    return {"dataset_version": await CACHE.version()}
+
+@router.post("/clear")
+async def clear():
+    CACHE.clear()
+    return CACHE.stats()
+
+@router.get("/snapshot")
+async def snapshot():
+    return SNAPSHOTS.info()
+
+@router.post("/snapshot/reload")
+async def snapshot_reload():
+    if not SNAPSHOTS.enabled:
+        raise HTTPException(status_code=409, detail="Snapshot serving is disabled (SNAPSHOT_ENABLED=0)")
+    await SNAPSHOTS.refresh()
+    return SNAPSHOTS.info()
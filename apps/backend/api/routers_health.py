@@ -1,15 +1,15 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy import text
-from sqlalchemy.orm import Session
-from .deps import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from .deps import get_async_db
 
 router = APIRouter()
 
 @router.get("/health/live")
-def live():
+async def live():
     return {"status": "alive"}
 
 @router.get("/health/db")
-def db_health(db: Session = Depends(get_db)):
-    db.execute(text("SELECT 1"))
-    return {"status": "ok"}
\ No newline at end of file
+async def db_health(db: AsyncSession = Depends(get_async_db)):
+    await db.execute(text("SELECT 1").execution_options(query_name="health.db"))
+    return {"status": "ok"}
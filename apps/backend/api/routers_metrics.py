@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from apps.backend.services.cache import CACHE
+from apps.backend.services.db import async_engine, engine
+from apps.backend.services.metrics import register_collectors
+
+router = APIRouter(tags=["metrics"])
+
+# 요청마다가 아니라 scrape 시점에 pool / cache 상태를 읽음
+register_collectors({"sync": engine, "async": async_engine.sync_engine}, CACHE)
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
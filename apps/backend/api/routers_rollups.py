@@ -0,0 +1,37 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.backend.services import rollups
+from apps.backend.services.cache import make_key
+from apps.backend.services.snapshot import SNAPSHOTS
+from .deps import cached_json, get_async_db
+
+router = APIRouter(prefix="/rollups", tags=["rollups"])
+
+@router.get("/stats")
+async def stats(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json(request, make_key("rollups/stats"), lambda: rollups.dataset_stats(db))
+
+@router.get("/countries")
+async def countries(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json(request, make_key("rollups/countries"), lambda: rollups.countries(db))
+
+@router.get("/years")
+async def years(request: Request, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json(request, make_key("rollups/years"), lambda: rollups.years(db))
+
+@router.get("/top")
+async def top(request: Request, year: Optional[int] = None, limit: int = Query(20, ge=1, le=500), db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        snap = SNAPSHOTS.current()
+        if snap is not None:
+            return snap.top(year=year, limit=limit)
+        return await rollups.top_emitters(db, year=year, limit=limit)
+    return await cached_json(request, make_key("rollups/top", year=year, limit=limit), load)
+
+@router.get("/world")
+async def world(request: Request, year_from: Optional[int] = None, year_to: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    return await cached_json(request, make_key("rollups/world", year_from=year_from, year_to=year_to),
+                             lambda: rollups.world_series(db, year_from, year_to))
@@ -0,0 +1,103 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from apps.backend.schemas.timeseries import ExportFormat, Frame, FrameShape, TimeseriesPage
+from apps.backend.services import columnar, emissions
+from apps.backend.services.cache import make_key
+from apps.backend.services.snapshot import SNAPSHOTS
+from .deps import CACHE_CONTROL, cached_json, get_async_db, not_modified
+
+router = APIRouter(prefix="/timeseries", tags=["timeseries"])
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+    ExportFormat.arrow: "application/vnd.apache.arrow.stream",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+@router.get("", response_model=TimeseriesPage)
+async def timeseries(
+    request: Request,
+    country: Optional[List[str]] = Query(None, description="Country name(s); repeat or comma-separate"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    metric: Optional[List[str]] = Query(None, description="Metric column(s); default: all"),
+    limit: int = Query(1000, ge=1, le=10000),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = make_key("timeseries", country=country, year_from=year_from, year_to=year_to,
+                   metric=metric, limit=limit, cursor=cursor)
+    async def load():
+        snap = SNAPSHOTS.current()
+        if snap is not None and snap.serves_cursor(cursor):
+            return snap.page(names=country, year_from=year_from, year_to=year_to, metrics=metric,
+                             limit=limit, cursor=cursor)
+        return await emissions.page(db, names=country, year_from=year_from, year_to=year_to, metrics=metric,
+                                    limit=limit, cursor=cursor)
+    try:
+        return await cached_json(request, key, load)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/batch", response_model=Frame)
+async def batch(
+    request: Request,
+    country: List[str] = Query(..., description="Country name(s); repeat or comma-separate"),
+    metric: Optional[List[str]] = Query(None, description="Metric column(s); default: all"),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    shape: FrameShape = FrameShape.wide,
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = make_key("timeseries/batch", country=country, metric=metric, year_from=year_from, year_to=year_to,
+                   shape=shape.value)
+    async def load():
+        snap = SNAPSHOTS.current()
+        if snap is not None:
+            return snap.frame(names=country, metrics=metric, year_from=year_from, year_to=year_to, shape=shape.value)
+        return await emissions.frame(db, names=country, metrics=metric, year_from=year_from, year_to=year_to,
+                                     shape=shape.value)
+    try:
+        return await cached_json(request, key, load)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/export")
+async def export(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    country: Optional[List[str]] = Query(None),
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    metric: Optional[List[str]] = Query(None, description="Columns to export besides name/iso_code/year; default: all"),
+    compression: Optional[str] = Query(None, description="arrow: zstd|lz4|none, parquet: zstd|snappy|gzip|brotli|lz4|none"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    key = make_key("timeseries/export", format=format.value, country=country, year_from=year_from,
+                   year_to=year_to, metric=metric, compression=compression)
+    unchanged, tag, _ = await not_modified(request, key)
+    if unchanged:
+        return unchanged
+    try:
+        metrics = await emissions.resolve_metrics(db, metric)
+        codec = columnar.check_compression(format.value, compression) \
+            if format in (ExportFormat.arrow, ExportFormat.parquet) else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    names = emissions.split_values(country)
+    if codec:
+        stream = columnar.stream_parquet if format == ExportFormat.parquet else columnar.stream_arrow
+        rows = stream(await emissions.table_columns(db), metrics, names, year_from, year_to, codec)
+    else:
+        stream = emissions.stream_csv if format == ExportFormat.csv else emissions.stream_ndjson
+        rows = stream(metrics, names, year_from, year_to)
+    return StreamingResponse(rows, media_type=MEDIA_TYPES[format], headers={
+        "Content-Disposition": f'attachment; filename="{emissions.TABLE}.{format.value}"',
+        "ETag": tag,
+        "Cache-Control": CACHE_CONTROL,
+    })
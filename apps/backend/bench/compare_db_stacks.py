@@ -0,0 +1,131 @@
+"""
+Sync vs async DB stack under concurrent load.
+- `app` below mounts the same two queries twice:
+    /sync/...  : def route + blocking Session (get_db), runs in Starlette's threadpool
+    /async/... : async def route + AsyncSession (get_async_db)
+  ping = SELECT 1, page = one keyset page (emissions.build_query, 100 rows of a country).
+- main() starts it with uvicorn in a subprocess (same pool settings for both
+  engines: DB_POOL_SIZE / DB_MAX_OVERFLOW) and drives every (stack, query,
+  concurrency) with bench.loadgen; results are printed as a table and appended
+  as JSON lines to --out.
+
+DB connection: DATABASE_URL / DB_* and CSV_TABLE like the backend.
+Usage (from the repo root):
+  python -m apps.backend.bench.compare_db_stacks --concurrency 50,100,200,500 --duration 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import quote
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from apps.backend.api.deps import get_async_db, get_db
+from apps.backend.services.emissions import build_query
+
+from .loadgen import run
+
+PAGE_METRICS = ["co2_mt"]
+
+app = FastAPI()
+
+
+def _page_query(country: str):
+    return build_query(PAGE_METRICS, [country], None, None, limit=100)
+
+
+@app.get("/sync/ping")
+def sync_ping(db: Session = Depends(get_db)):
+    return {"ok": db.execute(text("SELECT 1")).scalar() == 1}
+
+
+@app.get("/sync/page")
+def sync_page(country: str, db: Session = Depends(get_db)):
+    sql, params = _page_query(country)
+    return [dict(r) for r in db.execute(text(sql), params).mappings()]
+
+
+@app.get("/async/ping")
+async def async_ping(db: AsyncSession = Depends(get_async_db)):
+    return {"ok": (await db.execute(text("SELECT 1"))).scalar() == 1}
+
+
+@app.get("/async/page")
+async def async_page(country: str, db: AsyncSession = Depends(get_async_db)):
+    sql, params = _page_query(country)
+    return [dict(r) for r in (await db.execute(text(sql), params)).mappings()]
+
+
+def sample_countries(n: int = 50) -> list:
+    from apps.backend.services.db import TABLE, engine
+    with engine.connect() as conn:
+        return conn.execute(text(f'SELECT DISTINCT name FROM "{TABLE}" WHERE name IS NOT NULL LIMIT :n'),
+                            {"n": n}).scalars().all()
+
+
+def wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"[ERROR] uvicorn exited with {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/async/ping", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise SystemExit("[ERROR] server did not become ready")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare requests/s and latency of the sync and async DB stacks.")
+    ap.add_argument("--concurrency", default="50,100,200,500", help="Comma-separated client counts")
+    ap.add_argument("--duration", type=float, default=10, help="Measured seconds per run")
+    ap.add_argument("--queries", default="ping,page", help="ping and/or page")
+    ap.add_argument("--stacks", default="sync,async")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--out", default="db_stack_bench.jsonl", help="JSON lines file results are appended to")
+    args = ap.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    countries = sample_countries()
+    if not countries:
+        raise SystemExit("[ERROR] the emissions table is empty; load data first")
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "apps.backend.bench.compare_db_stacks:app", "--port", str(args.port),
+                             "--log-level", "warning", "--no-access-log"], env=os.environ.copy())
+    results = []
+    try:
+        wait_ready(base_url, proc)
+        for query in args.queries.split(","):
+            paths = ([""] if query == "ping" else [f"?country={quote(c)}" for c in countries])
+            for conc in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+                for stack in args.stacks.split(","):
+                    res = run(base_url, [f"/{stack}/{query}{p}" for p in paths], conc, args.duration)
+                    res.update(stack=stack, query=query, pool_size=os.getenv("DB_POOL_SIZE", "5"),
+                               max_overflow=os.getenv("DB_MAX_OVERFLOW", "5"))
+                    results.append(res)
+                    with open(args.out, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(res) + "\n")
+                    print(f"[OK] {stack:<5} {query:<4} c={conc:<4} {res['rps']:>8,.0f} req/s  "
+                          f"p50={res['p50_ms']}ms p99={res['p99_ms']}ms errors={res['errors']}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    print(f"\n{'query':<5} {'clients':>7} {'stack':<5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['query']:<5} {r['concurrency']:>7} {r['stack']:<5} {r['rps']:>9,.0f} {r['p50_ms'] or 0:>8.1f} "
+              f"{r['p99_ms'] or 0:>8.1f} {r['errors']:>7}")
+    print(f"[OK] {len(results)} results appended to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
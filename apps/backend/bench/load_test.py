@@ -0,0 +1,246 @@
+"""
+Backend load test against a local Postgres with synthetic emissions data.
+- Data (skipped with --skip-load, or when --table already has rows): a
+  synthetic CSV (apps/etl bench.synth_csv, --rows) is loaded with the real ETL
+  steps (create_table_from_csv, load_csv_to_db, build_indexes, rollups) into
+  --table.
+- The app (apps.backend.main:app) is started with uvicorn (--workers,
+  --pool-size / --max-overflow -> DB_POOL_*, --no-cache -> CACHE_MAX_ENTRIES=0).
+- A request mix (--mix "health=1,page=4,batch=2,analytics=2,export=1") is
+  drawn once with --seed over the table's countries and replayed round-robin,
+  either closed loop at each --concurrency level or open loop at each --rate
+  (req/s), via bench.loadgen.
+- Per run: throughput, p50/p95/p99, error rate (overall and per request kind)
+  plus server-side pool wait / cache hit counters scraped from /metrics (of
+  the worker that answers the scrape). Results are printed and appended as
+  JSON lines (--out) with the git commit, so runs can be diffed across commits.
+
+DB connection: DATABASE_URL / DB_* like the backend.
+Usage (from the repo root):
+  python -m apps.backend.bench.load_test --rows 300000 --concurrency 10,50,200 --duration 20
+  python -m apps.backend.bench.load_test --skip-load --rate 100,200,400 --mix page=1 --no-cache
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from .loadgen import run, run_at_rate
+
+REPO = Path(__file__).resolve().parents[3]
+ETL_DIR = REPO / "apps" / "etl"
+
+# kind -> URL builder(c = up to 10 sampled countries, y = a sampled year)
+# health/stats: fixed URL; top: one year; page/export: c[0]; analytics: c[:3]; batch/export_arrow: all of c
+KINDS = {
+    "health": lambda c, y: "/health/db",
+    "stats": lambda c, y: "/rollups/stats",
+    "top": lambda c, y: "/rollups/top?" + urlencode({"year": y, "limit": 20}),
+    "page": lambda c, y: "/timeseries?" + urlencode({"country": c[0], "metric": "co2_mt,population", "limit": 500}),
+    "batch": lambda c, y: "/timeseries/batch?" + urlencode({"country": ",".join(c), "metric": "co2_mt,gdp",
+                                                             "year_from": 1990}),
+    "analytics": lambda c, y: "/analytics/series?" + urlencode({"country": ",".join(c[:3]), "indicator": "value,ma,share",
+                                                                "points": 50}),
+    "export": lambda c, y: "/timeseries/export?" + urlencode({"format": "csv", "country": c[0]}),
+    "export_arrow": lambda c, y: "/timeseries/export?" + urlencode({"format": "arrow", "country": ",".join(c)}),
+}
+DEFAULT_MIX = "health=1,stats=1,page=4,batch=2,analytics=2,export=1"
+
+
+def database_url() -> str:
+    url = os.getenv("DATABASE_URL")
+    if url:
+        return url
+    return (f"postgresql+psycopg://{os.getenv('DB_USER', 'app')}:{os.getenv('DB_PASSWORD', 'apppw')}@"
+            f"{os.getenv('DB_HOST', '127.0.0.1')}:{os.getenv('DB_PORT', '5432')}/{os.getenv('DB_NAME', 'appdb')}")
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        kind, _, weight = part.partition("=")
+        if kind.strip() not in KINDS:
+            raise SystemExit(f"[ERROR] Unknown request kind: {kind} (choose from {', '.join(KINDS)})")
+        mix[kind.strip()] = int(weight or 1)
+    return mix
+
+
+# ---------- data ----------
+def table_rows(engine, table: str) -> int:
+    with engine.connect() as conn:
+        if not conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": f'"{table}"'}).scalar():
+            return 0
+        return conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+
+
+def load_synthetic(rows: int, table: str, workdir: Path, seed: int) -> None:
+    csv_path = workdir / f"synth_{rows}_{seed}.csv"
+    env = {**os.environ, "CSV_PATH": str(csv_path), "CSV_TABLE": table, "CSV_RECREATE": "1",
+           "CSV_LOAD_MODE": "append", "CSV_LOAD_METHOD": "copy", "CSV_STREAM": "0", "CSV_WORKERS": "1",
+           "CSV_METRICS_DIR": "", "CSV_METRICS_PUSH_URL": "",
+           "CSV_SCHEMA_MANIFEST": str(workdir / f"{table}.schema.json")}
+    steps = [["bench.synth_csv", "--rows", str(rows), "--out", str(csv_path), "--seed", str(seed)],
+             ["csv_to_pg.create_table_from_csv"], ["csv_to_pg.load_csv_to_db", "--force"],
+             ["csv_to_pg.build_indexes", "--no-explain"], ["csv_to_pg.rollups"]]
+    if csv_path.exists():
+        steps = steps[1:]
+    log = workdir / f"{table}.load.log"
+    with log.open("w", encoding="utf-8") as out:
+        for step in steps:
+            t0 = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-m", *step], cwd=ETL_DIR, env=env, stdout=out,
+                                  stderr=subprocess.STDOUT)
+            if proc.returncode != 0:
+                raise SystemExit(f"[ERROR] {step[0]} failed (exit {proc.returncode}); see {log}")
+            print(f"[INFO] {step[0]} ({time.perf_counter() - t0:.1f}s)")
+
+
+def sample_requests(engine, table: str, mix: Dict[str, int], n: int, seed: int) -> List[Tuple[str, str]]:
+    with engine.connect() as conn:
+        countries = conn.execute(text(f'SELECT DISTINCT name FROM "{table}" WHERE name IS NOT NULL')).scalars().all()
+        years = conn.execute(text(f'SELECT DISTINCT year FROM "{table}" WHERE year IS NOT NULL')).scalars().all()
+    if not countries:
+        raise SystemExit(f"[ERROR] {table} has no rows")
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    out = []
+    for kind in rng.choices(kinds, weights, k=n):
+        picked = rng.sample(countries, min(10, len(countries)))
+        out.append((kind, KINDS[kind](picked, rng.choice(years))))
+    return out
+
+
+# ---------- server ----------
+def start_server(args, table: str) -> subprocess.Popen:
+    env = {**os.environ, "CSV_TABLE": table, "DB_POOL_SIZE": str(args.pool_size),
+           "DB_MAX_OVERFLOW": str(args.max_overflow)}
+    if args.no_cache:
+        env["CACHE_MAX_ENTRIES"] = "0"
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "apps.backend.main:app", "--port", str(args.port),
+                             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+                            cwd=REPO, env=env)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"[ERROR] uvicorn exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{args.port}/health/db", timeout=2).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    proc.terminate()
+    raise SystemExit("[ERROR] backend did not become ready")
+
+
+def scrape(base_url: str) -> Dict[str, float]:
+    """Selected /metrics series (one worker's view): pool waits, cache events, query counts."""
+    out: Dict[str, float] = {}
+    try:
+        body = httpx.get(f"{base_url}/metrics", timeout=5).text
+    except httpx.HTTPError:
+        return out
+    for line in body.splitlines():
+        if line.startswith("#") or " " not in line:
+            continue
+        series, value = line.rsplit(" ", 1)
+        if series.startswith(("db_pool_wait_seconds_sum", "db_pool_wait_seconds_count", "api_cache_events_total",
+                              "db_query_duration_seconds_count", "db_query_duration_seconds_sum")):
+            out[series] = float(value)
+    return out
+
+
+def delta(after: Dict[str, float], before: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v - before.get(k, 0.0), 4) for k, v in after.items() if v - before.get(k, 0.0)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Load-test the backend against a local Postgres with synthetic data.")
+    ap.add_argument("--rows", type=int, default=300_000, help="Synthetic rows to load when the table is empty")
+    ap.add_argument("--table", default="bench_api", help="Table the backend serves (CSV_TABLE)")
+    ap.add_argument("--skip-load", action="store_true", help="Use --table as it is")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="kind=weight,... from: " + ", ".join(KINDS))
+    group = ap.add_mutually_exclusive_group()
+    group.add_argument("--concurrency", default=None, help="Comma-separated closed-loop client counts (default 10,50,200)")
+    group.add_argument("--rate", default=None, help="Comma-separated open-loop arrival rates (req/s)")
+    ap.add_argument("--duration", type=float, default=15, help="Measured seconds per run")
+    ap.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before each run")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    ap.add_argument("--pool-size", type=int, default=int(os.getenv("DB_POOL_SIZE", "5")))
+    ap.add_argument("--max-overflow", type=int, default=int(os.getenv("DB_MAX_OVERFLOW", "5")))
+    ap.add_argument("--no-cache", action="store_true", help="Disable the response cache (every request hits the DB)")
+    ap.add_argument("--port", type=int, default=8766)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--workdir", default=str(Path(tempfile.gettempdir()) / "api_bench"))
+    ap.add_argument("--out", default="load_test_results.jsonl", help="JSON lines file results are appended to")
+    args = ap.parse_args()
+
+    mix = parse_mix(args.mix)
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(database_url())
+    if not args.skip_load and table_rows(engine, args.table) == 0:
+        load_synthetic(args.rows, args.table, workdir, args.seed)
+    rows = table_rows(engine, args.table)
+    requests = sample_requests(engine, args.table, mix, 2000, args.seed)
+    engine.dispose()
+
+    meta = {"commit": git_commit(), "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "table": args.table, "rows": rows, "mix": mix, "workers": args.workers, "pool_size": args.pool_size,
+            "max_overflow": args.max_overflow, "cache": not args.no_cache, "duration": args.duration}
+    base_url = f"http://127.0.0.1:{args.port}"
+    levels = [float(r) for r in args.rate.split(",")] if args.rate else \
+        [int(c) for c in (args.concurrency or "10,50,200").split(",") if c.strip()]
+    proc = start_server(args, args.table)
+    results = []
+    try:
+        for level in levels:
+            before = scrape(base_url)
+            if args.rate:
+                res = run_at_rate(base_url, requests, level, args.duration, warmup=args.warmup)
+            else:
+                res = run(base_url, requests, level, args.duration, warmup=args.warmup)
+            res = {**meta, **res, "server": delta(scrape(base_url), before)}
+            results.append(res)
+            with open(args.out, "a", encoding="utf-8") as f:
+                f.write(json.dumps(res, ensure_ascii=False) + "\n")
+            tag = f"rate={level:g}/s" if args.rate else f"c={level}"
+            print(f"[OK] {tag:<12} {res['rps']:>8,.1f} req/s  p50={res['p50_ms']}ms p95={res['p95_ms']}ms "
+                  f"p99={res['p99_ms']}ms errors={res['error_rate']:.2%}")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=15)
+
+    print(f"\n{'load':>10} {'kind':<13} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err %':>7}")
+    for r in results:
+        level = f"{r['target_rps']:g}/s" if r["mode"] == "rate" else f"c={r['concurrency']}"
+        for kind, s in [("all", r)] + sorted(r.get("by_label", {}).items()):
+            print(f"{level:>10} {kind:<13} {s['rps']:>9,.1f} {s['p50_ms'] or 0:>8.1f} {s['p95_ms'] or 0:>8.1f} "
+                  f"{s['p99_ms'] or 0:>8.1f} {100 * s['error_rate']:>7.2f}")
+    print(f"[OK] {len(results)} results appended to {args.out} (commit {meta['commit']})")
+
+
+if __name__ == "__main__":
+    main()
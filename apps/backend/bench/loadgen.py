@@ -0,0 +1,173 @@
+"""
+HTTP load generator (httpx.AsyncClient, one event loop).
+- Closed loop (run_load): `concurrency` workers each send one request at a
+  time for `duration` seconds.
+- Open loop (run_rate): requests are started at a fixed arrival `rate` (req/s)
+  whatever the response times; latency is measured from the scheduled start,
+  so a stalled server shows up as latency instead of silently lowering the
+  offered load. Requests beyond `max_outstanding` count as "overload" errors.
+- `requests` are paths, or (label, path) pairs to get per-label results too;
+  they are sent round-robin (repeat entries to weight a mix).
+- A short warm-up is not counted. Reports requests/s, latency percentiles and
+  errors (non-2xx/304 or transport failures) as a dict, so callers can print
+  or json.dump it.
+- The generator itself is a single Python process: at several hundred
+  concurrent clients check `client_cpu_seconds` against `duration` before
+  blaming the server.
+"""
+
+import asyncio
+import itertools
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+RequestSpec = Union[str, Tuple[str, str]]
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def summarize(latencies: List[float], errors: Dict[str, int], elapsed: float) -> Dict:
+    lat = sorted(latencies)
+    total = len(lat) + sum(errors.values())
+    ms = lambda v: round(v * 1000, 2) if v is not None else None   # noqa: E731
+    return {
+        "requests": total,
+        "ok": len(lat),
+        "errors": sum(errors.values()),
+        "error_rate": round(sum(errors.values()) / total, 4) if total else 0.0,
+        "error_kinds": errors,
+        "seconds": round(elapsed, 2),
+        "rps": round(len(lat) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": ms(percentile(lat, 50)),
+        "p95_ms": ms(percentile(lat, 95)),
+        "p99_ms": ms(percentile(lat, 99)),
+        "max_ms": ms(lat[-1] if lat else None),
+    }
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.counting = False
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, Dict[str, int]] = {}
+
+    def add(self, label: str, seconds: float, error: Optional[str], counted: Optional[bool] = None) -> None:
+        if not (self.counting if counted is None else counted):
+            return
+        if error is None:
+            self.latencies.setdefault(label, []).append(seconds)
+        else:
+            errs = self.errors.setdefault(label, {})
+            errs[error] = errs.get(error, 0) + 1
+
+    def result(self, elapsed: float) -> Dict:
+        labels = sorted(set(self.latencies) | set(self.errors))
+        all_errors: Dict[str, int] = {}
+        for errs in self.errors.values():
+            for kind, n in errs.items():
+                all_errors[kind] = all_errors.get(kind, 0) + n
+        out = summarize([v for lat in self.latencies.values() for v in lat], all_errors, elapsed)
+        if labels != ["all"]:
+            out["by_label"] = {lb: summarize(self.latencies.get(lb, []), self.errors.get(lb, {}), elapsed)
+                               for lb in labels}
+        return out
+
+
+def _specs(requests: Sequence[RequestSpec]) -> List[Tuple[str, str]]:
+    return [r if isinstance(r, tuple) else ("all", r) for r in requests]
+
+
+async def _send(client: httpx.AsyncClient, path: str) -> Optional[str]:
+    """None on success, else the error kind (status code or exception name)."""
+    try:
+        resp = await client.get(path)
+        await resp.aread()
+    except httpx.HTTPError as e:
+        return type(e).__name__
+    return None if resp.status_code < 300 or resp.status_code == 304 else str(resp.status_code)
+
+
+def _client(base_url: str, connections: int, timeout: float, headers: Optional[Dict[str, str]]) -> httpx.AsyncClient:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    return httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout, headers=headers)
+
+
+async def run_load(base_url: str, requests: Sequence[RequestSpec], concurrency: int, duration: float,
+                   warmup: float = 1.0, timeout: float = 30.0,
+                   headers: Optional[Dict[str, str]] = None) -> Dict:
+    rec = _Recorder()
+    cycle = itertools.cycle(_specs(requests))
+    async with _client(base_url, concurrency, timeout, headers) as client:
+        stop_at = time.perf_counter() + warmup + duration
+
+        async def worker() -> None:
+            while time.perf_counter() < stop_at:
+                label, path = next(cycle)
+                t0 = time.perf_counter()
+                error = await _send(client, path)
+                rec.add(label, time.perf_counter() - t0, error)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        await asyncio.sleep(warmup)
+        rec.counting = True
+        cpu0, t0 = time.process_time(), time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    out = rec.result(elapsed)
+    out.update(mode="concurrency", concurrency=concurrency, client_cpu_seconds=round(cpu, 2))
+    return out
+
+
+async def run_rate(base_url: str, requests: Sequence[RequestSpec], rate: float, duration: float,
+                   warmup: float = 1.0, timeout: float = 30.0, max_outstanding: int = 2000,
+                   headers: Optional[Dict[str, str]] = None) -> Dict:
+    rec = _Recorder()
+    cycle = itertools.cycle(_specs(requests))
+    outstanding = set()
+    async with _client(base_url, max_outstanding, timeout, headers) as client:
+
+        async def one(label: str, path: str, scheduled: float, counted: bool) -> None:
+            error = await _send(client, path)
+            rec.add(label, time.perf_counter() - scheduled, error, counted)
+
+        start = time.perf_counter()
+        measure_from, stop_at = start + warmup, start + warmup + duration
+        cpu0 = None
+        for i in itertools.count():
+            scheduled = start + i / rate
+            if scheduled >= stop_at:
+                break
+            if cpu0 is None and scheduled >= measure_from:
+                rec.counting, cpu0 = True, time.process_time()
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            label, path = next(cycle)
+            if len(outstanding) >= max_outstanding:
+                rec.add(label, 0.0, "overload")
+                continue
+            task = asyncio.create_task(one(label, path, scheduled, rec.counting))
+            outstanding.add(task)
+            task.add_done_callback(outstanding.discard)
+        if outstanding:
+            await asyncio.wait(outstanding)
+        elapsed = stop_at - measure_from   # 제공한 부하 구간 (drain 시간 제외)
+        cpu = time.process_time() - (cpu0 or time.process_time())
+    out = rec.result(elapsed)
+    out.update(mode="rate", target_rps=rate, client_cpu_seconds=round(cpu, 2))
+    return out
+
+
+def run(base_url: str, requests: Sequence[RequestSpec], concurrency: int, duration: float, **kw) -> Dict:
+    return asyncio.run(run_load(base_url, requests, concurrency, duration, **kw))
+
+
+def run_at_rate(base_url: str, requests: Sequence[RequestSpec], rate: float, duration: float, **kw) -> Dict:
+    return asyncio.run(run_rate(base_url, requests, rate, duration, **kw))
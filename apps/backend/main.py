@@ -1,5 +1,30 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from apps.backend.api.routers_analytics import router as analytics_router
+from apps.backend.api.routers_cache import router as cache_router
 from apps.backend.api.routers_health import router as health_router
+from apps.backend.api.routers_metrics import router as metrics_router
+from apps.backend.api.routers_rollups import router as rollups_router
+from apps.backend.api.routers_timeseries import router as timeseries_router
+from apps.backend.services.compression import CompressionMiddleware
+from apps.backend.services.metrics import MetricsMiddleware
+from apps.backend.services.snapshot import SNAPSHOTS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    SNAPSHOTS.start()   # SNAPSHOT_ENABLED=1 일 때만 백그라운드 적재
+    yield
+    await SNAPSHOTS.stop()
+
 
-app = FastAPI()
-app.include_router(health_router)
\ No newline at end of file
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)   # 바깥쪽: 압축 시간까지 포함
+app.include_router(health_router)
+app.include_router(rollups_router)
+app.include_router(timeseries_router)
+app.include_router(analytics_router)
+app.include_router(cache_router)
+app.include_router(metrics_router)
@@ -0,0 +1,34 @@
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    arrow = "arrow"       # Arrow IPC stream
+    parquet = "parquet"
+
+
+class TimeseriesPage(BaseModel):
+    """One keyset page ordered by (name, year); pass next_cursor back as ?cursor= for the next one."""
+    metrics: List[str]
+    count: int
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str] = None
+
+
+class FrameShape(str, Enum):
+    wide = "wide"   # (name, iso_code, year, <metric>...)
+    long = "long"   # (name, iso_code, year, metric, value)
+
+
+class Frame(BaseModel):
+    """Column-oriented result: pd.DataFrame(data, columns=columns). `missing` = requested countries with no rows (sorted)."""
+    shape: FrameShape
+    metrics: List[str]
+    columns: List[str]
+    count: int
+    data: List[List[Any]]
+    missing: List[str]
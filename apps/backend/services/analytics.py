@@ -0,0 +1,111 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import TABLE
+from .emissions import resolve_metrics, split_values
+from .rollups import WORLD_YEAR
+
+INDICATORS = ["value", "ma", "yoy", "yoy_pct", "share"]
+
+
+def parse_indicators(requested: Optional[Sequence[str]]) -> List[str]:
+    wanted = split_values(requested) or ["value"]
+    unknown = [i for i in wanted if i not in INDICATORS]
+    if unknown:
+        raise ValueError(f"Unknown indicator(s): {', '.join(unknown)} (choose from {', '.join(INDICATORS)})")
+    return list(dict.fromkeys(wanted))
+
+
+async def _world_source(db: AsyncSession, metric: str) -> str:
+    """World totals per year: the world_year rollup when it has the metric, else aggregated on the fly."""
+    # information_schema.columns는 materialized view를 보여주지 않음 -> pg_attribute
+    has_rollup = (await db.execute(text('''
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = to_regclass(:v) AND attname = :m AND attnum > 0 AND NOT attisdropped
+    ''').execution_options(query_name="analytics.world_source"), {"v": f'"{WORLD_YEAR}"', "m": metric})).first()
+    if has_rollup:
+        return f'SELECT year, "{metric}" AS total FROM "{WORLD_YEAR}"'
+    # rollup과 같은 기준: iso_code가 있는 행(= 실제 국가)만
+    return f'SELECT year, SUM("{metric}") AS total FROM "{TABLE}" WHERE iso_code IS NOT NULL GROUP BY year'
+
+
+def build_series_query(metric: str, indicators: List[str], names: List[str], year_from: Optional[int],
+                       year_to: Optional[int], window: int, points: Optional[int],
+                       world: Optional[str]) -> Tuple[str, dict]:
+    m = f'"{metric}"'
+    # 창은 행 수가 아니라 연도 기준: 빠진 연도가 있어도 ma는 window년, yoy는 바로 전년만 비교
+    prev = "CASE WHEN LAG(year) OVER w = year - 1 THEN {} END"
+    exprs = {
+        "value": f"{m}::float8",
+        "ma": f"AVG({m}::float8) OVER (w RANGE BETWEEN {int(window) - 1} PRECEDING AND CURRENT ROW)",
+        "yoy": prev.format(f"{m}::float8 - LAG({m}::float8) OVER w"),
+        "yoy_pct": prev.format(f"100.0 * ({m}::float8 / NULLIF(LAG({m}::float8) OVER w, 0) - 1)"),
+        "share": f"(100.0 * {m}::float8 / NULLIF(world.total, 0))::float8",
+    }
+    select = ", ".join(f"{exprs[i]} AS {i}" for i in indicators)
+    join = f"LEFT JOIN ({world}) world USING (year)" if "share" in indicators else ""
+    # 창 함수는 연도 필터 전에 계산 (year_from의 이동평균/전년 대비가 앞 연도를 볼 수 있도록)
+    sql = f'''
+        SELECT name, year, {select}
+        FROM "{TABLE}" {join}
+        WHERE name = ANY(:names) AND year IS NOT NULL
+        WINDOW w AS (PARTITION BY name ORDER BY year)
+    '''
+    sql = f'''
+        SELECT * FROM ({sql}) s
+        WHERE (CAST(:y1 AS int) IS NULL OR year >= :y1) AND (CAST(:y2 AS int) IS NULL OR year <= :y2)
+    '''
+    if points:
+        # 국가별로 points개 구간의 평균으로 축소 (year = 구간 시작 연도)
+        avgs = ", ".join(f"AVG({i}) AS {i}" for i in indicators)
+        sql = f'''
+            SELECT name, MIN(year) AS year, {avgs}
+            FROM (SELECT *, ntile(:points) OVER (PARTITION BY name ORDER BY year) AS bucket FROM ({sql}) f) b
+            GROUP BY name, bucket
+        '''
+    sql += " ORDER BY name, year"
+    return sql, {"names": names, "y1": year_from, "y2": year_to, "points": points}
+
+
+async def series(db: AsyncSession, *, names: Sequence[str], metric: str, indicators: Optional[Sequence[str]] = None,
+                 year_from: Optional[int] = None, year_to: Optional[int] = None, window: int = 5,
+                 points: Optional[int] = None) -> dict:
+    """Derived indicator series per country, computed with window functions; at most `points` rows each."""
+    wanted = split_values(names)
+    if not wanted:
+        raise ValueError("At least one country is required")
+    metric = (await resolve_metrics(db, [metric]))[0]
+    inds = parse_indicators(indicators)
+    world = await _world_source(db, metric) if "share" in inds else None
+    sql, params = build_series_query(metric, inds, wanted, year_from, year_to, window, points, world)
+    data = [list(r) for r in (await db.execute(text(sql).execution_options(query_name="analytics.series"),
+                                               params)).all()]
+    return {"metric": metric, "indicators": inds, "window": window, "points": points,
+            "columns": ["name", "year"] + inds, "count": len(data), "data": data}
+
+
+async def cagr(db: AsyncSession, *, names: Sequence[str], metric: str, start: int, end: int) -> dict:
+    """Compound annual growth rate between two years per country (NULL when a value is missing or <= 0)."""
+    wanted = split_values(names)
+    if not wanted:
+        raise ValueError("At least one country is required")
+    if end <= start:
+        raise ValueError("end must be after start")
+    metric = (await resolve_metrics(db, [metric]))[0]
+    m = f'"{metric}"'
+    rows = (await db.execute(text(f'''
+        SELECT name, v0::float8 AS start_value, v1::float8 AS end_value,
+               CASE WHEN v0 > 0 AND v1 > 0
+                    THEN (100.0 * (power(v1::float8 / v0::float8, 1.0 / (:end - :start)) - 1))::float8
+               END AS cagr_pct
+        FROM (
+            SELECT name, MAX({m}) FILTER (WHERE year = :start) AS v0, MAX({m}) FILTER (WHERE year = :end) AS v1
+            FROM "{TABLE}" WHERE name = ANY(:names) AND year IN (:start, :end)
+            GROUP BY name
+        ) t
+        ORDER BY name
+    ''').execution_options(query_name="analytics.cagr"), {"names": wanted, "start": start, "end": end})).all()
+    return {"metric": metric, "start": start, "end": end, "columns": ["name", "start_value", "end_value", "cagr_pct"],
+            "count": len(rows), "data": [list(r) for r in rows]}
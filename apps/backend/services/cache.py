@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from .db import TABLE, async_engine
+from .emissions import split_values
+
+# ETL(csv_to_pg.load_state)가 적재/rollup refresh마다 갱신하는 테이블
+STATE_TABLE = "etl_load_state"
+
+CacheKey = Tuple
+_ABANDONED = object()   # 적재하던 요청이 취소됐을 때 기다리던 요청들에게 주는 값
+
+
+def make_key(route: str, unordered: Tuple[str, ...] = ("country",), **params) -> CacheKey:
+    """
+    Normalized key: None dropped, list params split on commas and deduped
+    (sorted for `unordered` ones, where order does not change the response),
+    so ?country=A,B and ?country=B&country=A share an entry.
+    """
+    items = []
+    for name, value in sorted(params.items()):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            values = list(dict.fromkeys(split_values(value)))
+            if not values:
+                continue
+            value = tuple(sorted(values) if name in unordered else values)
+        items.append((name, value))
+    return (route, tuple(items))
+
+
+def etag(version: str, key: CacheKey) -> str:
+    """Strong ETag: same dataset version + same normalized query -> same bytes."""
+    return '"' + hashlib.sha256(repr((version, key)).encode()).hexdigest()[:32] + '"'
+
+
+def matching_etag(if_none_match: Optional[str], tag: str) -> Optional[str]:
+    """
+    The If-None-Match entry that matches `tag` (W/ and the -gzip/-zstd suffix the
+    compression middleware adds are ignored), returned in the strong form the
+    client got it in, so a 304 repeats that exact ETag; None when nothing matches.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return tag
+        candidate = candidate[2:] if candidate.startswith("W/") else candidate
+        bare = candidate
+        for suffix in ('-gzip"', '-zstd"'):
+            if bare.endswith(suffix):
+                bare = bare[: -len(suffix)] + '"'
+        if bare == tag:
+            return candidate
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """If-None-Match check; ignores W/ and the -gzip/-zstd suffix the compression middleware adds."""
+    return matching_etag(if_none_match, tag) is not None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        candidate = candidate[2:] if candidate.startswith("W/") else candidate
+        for suffix in ('-gzip"', '-zstd"'):
+            if candidate.endswith(suffix):
+                candidate = candidate[: -len(suffix)] + '"'
+        if candidate == tag:
+            return True
+    return False
+
+
+async def dataset_version() -> str:
+    """'<generation>.<rollups refresh>' from etl_load_state ('0' before the first load)."""
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(query_name="cache.dataset_version")
+        if not (await conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": STATE_TABLE})).scalar():
+            return "0"
+        # to_jsonb: rollups_at 컬럼이 없는 (이전 ETL) 테이블에서도 동작
+        state = (await conn.execute(text(f'SELECT to_jsonb(s) FROM "{STATE_TABLE}" s WHERE table_name = :t'),
+                                    {"t": TABLE})).scalar()
+    if not state:
+        return "0"
+    return f"{state.get('generation') or 0}.{state.get('rollups_at') or ''}"
+
+
+class ResponseCache:
+    """
+    In-process cache of serialized JSON responses.
+    - LRU over at most `max_entries` entries / `max_bytes` body bytes, plus an
+      optional TTL (0 = until the dataset version changes).
+    - The dataset version is polled at most every `version_ttl` seconds; when it
+      changes the whole cache is dropped, and entries built under an older
+      version are never served.
+    - Concurrent misses for one key share a single load (the first caller runs
+      it, the others await its result or its exception; if the first caller is
+      cancelled, one of the waiters runs the load instead).
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 ** 2, ttl: float = 0,
+                 version_ttl: float = 5.0,
+                 version_loader: Callable[[], Awaitable[str]] = dataset_version) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self._load_version = version_loader
+        self._entries: "OrderedDict[CacheKey, Tuple[str, bytes, float]]" = OrderedDict()   # key -> (version, body, stored)
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._version_checked = 0.0
+        self._version_lock = asyncio.Lock()
+        self.counters = dict(hits=0, misses=0, coalesced=0, evictions=0, expired=0, invalidations=0)
+
+    # ---------- dataset version ----------
+    @property
+    def current_version(self) -> Optional[str]:
+        """Last version seen by version() (None before the first check); no DB round trip."""
+        return self._version
+
+    async def version(self) -> str:
+        if self._version is not None and time.monotonic() - self._version_checked < self.version_ttl:
+            return self._version
+        async with self._version_lock:   # 동시에 만료돼도 DB 조회는 한 번
+            if self._version is None or time.monotonic() - self._version_checked >= self.version_ttl:
+                current = await self._load_version()
+                if self._version is not None and current != self._version:
+                    self.clear()
+                    self.counters["invalidations"] += 1
+                self._version, self._version_checked = current, time.monotonic()
+        return self._version
+
+    # ---------- LRU ----------
+    def _get(self, key: CacheKey, version: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_version, body, stored = entry
+        if stored_version != version or (self.ttl and time.monotonic() - stored > self.ttl):
+            self._drop(key)
+            self.counters["expired"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def _put(self, key: CacheKey, version: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (version, body, time.monotonic())
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.counters["evictions"] += 1
+
+    def _drop(self, key: CacheKey) -> None:
+        _, body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    # ---------- lookup ----------
+    @staticmethod
+    def encode(value: object) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode()
+
+    async def get_or_load(self, key: CacheKey, loader: Callable[[], Awaitable[object]],
+                          version: Optional[str] = None) -> bytes:
+        """
+        JSON body for `key`; `loader()` (the DB query) runs only on a miss.
+        Pass `version` when it was already read (e.g. for the ETag) so body and tag agree.
+        """
+        if self.max_entries <= 0:
+            return self.encode(await loader())
+        version = version or await self.version()
+        waited = False
+        while True:
+            body = self._get(key, version)
+            if body is not None:
+                self.counters["hits"] += 1
+                return body
+            inflight = self._inflight.get((version, key))
+            if inflight is None:
+                break
+            if not waited:
+                self.counters["coalesced"] += 1
+                waited = True
+            # wait()는 우리 요청이 취소돼도 공유 future를 건드리지 않음
+            await asyncio.wait({inflight})
+            body = inflight.result()
+            if body is not _ABANDONED:
+                return body
+            # 선행 요청이 취소됨 (client disconnect) -> 이 요청이 직접 적재
+
+        self.counters["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[(version, key)] = future
+        try:
+            body = self.encode(await loader())
+            if version == self._version:   # 적재 중에 버전이 바뀌었으면 저장하지 않음
+                self._put(key, version, body)
+            future.set_result(body)
+            return body
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()   # 기다리는 요청이 없어도 "never retrieved" 경고가 나지 않도록
+            raise
+        finally:
+            self._inflight.pop((version, key), None)
+            if not future.done():   # 이 요청만 취소됨: 기다리던 요청들은 다시 시도
+                future.set_result(_ABANDONED)
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["coalesced"] + self.counters["misses"]
+        return {**self.counters, "entries": len(self._entries), "bytes": self._bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes, "ttl_seconds": self.ttl,
+                "hit_ratio": round((self.counters["hits"] + self.counters["coalesced"]) / lookups, 4) if lookups else 0.0,
+                "dataset_version": self._version}
+
+
+# 프로세스(워커)마다 하나 - env로 크기 조정, CACHE_MAX_ENTRIES=0 이면 캐시 끔
+CACHE = ResponseCache(
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.getenv("CACHE_MAX_MB", "64")) * 1024 ** 2,
+    ttl=float(os.getenv("CACHE_TTL_SECONDS", "0")),
+    version_ttl=float(os.getenv("CACHE_VERSION_TTL_SECONDS", "5")),
+)
@@ -0,0 +1,99 @@
+import asyncio
+import io
+from typing import AsyncIterator, Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .emissions import ID_COLUMNS, iter_rows
+
+# information_schema data_type -> Arrow type (그 외는 문자열)
+ARROW_TYPES = {
+    "smallint": pa.int16(),
+    "integer": pa.int32(),
+    "bigint": pa.int64(),
+    "real": pa.float32(),
+    "double precision": pa.float64(),
+    "numeric": pa.float64(),   # SQL에서 float8로 변환해서 읽음 (Decimal 객체를 만들지 않음)
+}
+COMPRESSION = {
+    "arrow": ("zstd", {"zstd", "lz4", "none"}),
+    "parquet": ("zstd", {"zstd", "snappy", "gzip", "brotli", "lz4", "none"}),
+}
+BATCH_ROWS = 65536   # Arrow record batch = Parquet row group
+
+
+def check_compression(fmt: str, compression: Optional[str]) -> str:
+    default, allowed = COMPRESSION[fmt]
+    codec = (compression or default).lower()
+    if codec not in allowed:
+        raise ValueError(f"Unsupported {fmt} compression: {codec} (choose from {', '.join(sorted(allowed))})")
+    return codec
+
+
+def arrow_schema(columns: List[str], types: Dict[str, str]) -> pa.Schema:
+    return pa.schema([(c, ARROW_TYPES.get(types.get(c), pa.string())) for c in columns])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes out in chunks (for streaming a writer's output)."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def take(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def _write(writer, sink: _ChunkSink, schema: pa.Schema, part: list) -> bytes:
+    """One cursor partition -> record batch (column by column, no per-row dicts) -> encoded bytes."""
+    columns = list(zip(*part))
+    batch = pa.RecordBatch.from_arrays([pa.array(col, type=f.type) for col, f in zip(columns, schema)],
+                                       schema=schema)
+    writer.write_batch(batch)
+    return sink.take()
+
+
+async def _encoded(writer, sink: _ChunkSink, types: Dict[str, str], schema: pa.Schema, metrics: List[str],
+                   names: List[str], year_from: Optional[int], year_to: Optional[int]) -> AsyncIterator[bytes]:
+    casts = {c: "float8" for c in metrics if types.get(c) == "numeric"}
+    async for part in iter_rows(metrics, names, year_from, year_to, batch=BATCH_ROWS, casts=casts):
+        # 배치 변환 + zstd/Parquet 인코딩은 CPU 작업 -> 워커 스레드 (이벤트 루프를 막지 않도록)
+        yield await asyncio.to_thread(_write, writer, sink, schema, part)
+
+
+async def stream_arrow(types: Dict[str, str], metrics: List[str], names: List[str], year_from: Optional[int],
+                       year_to: Optional[int], compression: str = "zstd") -> AsyncIterator[bytes]:
+    """Arrow IPC stream: schema, then one (compressed) record batch per cursor partition."""
+    schema = arrow_schema(ID_COLUMNS + metrics, types)
+    sink = _ChunkSink()
+    options = pa.ipc.IpcWriteOptions(compression=None if compression == "none" else compression)
+    with pa.ipc.new_stream(sink, schema, options=options) as writer:
+        async for chunk in _encoded(writer, sink, types, schema, metrics, names, year_from, year_to):
+            yield chunk
+    yield sink.take()
+
+
+async def stream_parquet(types: Dict[str, str], metrics: List[str], names: List[str], year_from: Optional[int],
+                         year_to: Optional[int], compression: str = "zstd") -> AsyncIterator[bytes]:
+    """Parquet file written row group by row group; the footer goes out last."""
+    schema = arrow_schema(ID_COLUMNS + metrics, types)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression=compression) as writer:
+        async for chunk in _encoded(writer, sink, types, schema, metrics, names, year_from, year_to):
+            yield chunk
+    yield sink.take()
@@ -0,0 +1,112 @@
+import zlib
+from typing import Optional
+
+try:
+    import zstandard  # optional: without it only gzip is offered
+except ImportError:
+    zstandard = None
+
+# 이미 압축된 포맷 (Arrow IPC는 버퍼 압축, Parquet은 컬럼 압축)
+SKIP_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.parquet")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """zstd if the client takes it (and zstandard is installed), else gzip, else None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip())
+    if zstandard is not None and "zstd" in accepted:
+        return "zstd"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def chunk(self, data: bytes) -> bytes:
+        # 스트리밍 응답은 청크마다 flush -> 클라이언트가 바로 풀 수 있음
+        return self._obj.compress(data) + self._obj.flush(self._flush_mode)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._obj.compress(data) + self._obj.flush()
+
+
+class CompressionMiddleware:
+    """
+    gzip / zstd per Accept-Encoding for JSON, NDJSON and CSV responses (streamed
+    ones chunk by chunk). Skips small bodies, 304s, already-encoded responses and
+    self-compressed formats (Arrow, Parquet). A strong ETag gets an "-<encoding>"
+    suffix, since the compressed bytes differ (If-None-Match ignores the suffix).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        encoding = choose_encoding(accept)
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start: dict = {}
+        state = {"encoder": None, "passthrough": False}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = {k.lower(): v for k, v in message.get("headers", [])}
+                media_type = headers.get(b"content-type", b"").split(b";")[0].decode("latin-1").strip()
+                state["passthrough"] = (message["status"] < 200 or message["status"] in (204, 206, 304)
+                                        or b"content-encoding" in headers or media_type in SKIP_TYPES)
+                if state["passthrough"]:
+                    await send(message)
+                else:
+                    start.update(message)   # 첫 body를 보고 압축 여부 결정
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                return await send(message)
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if state["encoder"] is None:
+                original = start.get("headers", [])
+                vary = next((v + b", " for k, v in original if k.lower() == b"vary"), b"") + b"Accept-Encoding"
+                if not more and len(body) < self.minimum_size:
+                    state["passthrough"] = True
+                    await send({**start, "headers": [(k, v) for k, v in original if k.lower() != b"vary"]
+                                + [(b"vary", vary)]})
+                    return await send(message)
+                state["encoder"] = _Encoder(encoding, self.gzip_level, self.zstd_level)
+                headers = [(k, v) for k, v in original if k.lower() not in (b"content-length", b"etag", b"vary")]
+                headers += [(b"content-encoding", encoding.encode()), (b"vary", vary)]
+                etag = next((v for k, v in original if k.lower() == b"etag"), None)
+                if etag and etag.endswith(b'"') and not etag.startswith(b"W/"):
+                    headers.append((b"etag", etag[:-1] + b"-" + encoding.encode() + b'"'))
+                elif etag:
+                    headers.append((b"etag", etag))
+                await send({**start, "headers": headers})
+            encoder = state["encoder"]
+            data = encoder.chunk(body) if more else encoder.finish(body)
+            await send({"type": "http.response.body", "body": data, "more_body": more})
+
+        await self.app(scope, receive, send_wrapper)
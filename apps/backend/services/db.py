@@ -1,6 +1,9 @@
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+
+from .metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -18,12 +21,25 @@ DB_URL = os.getenv("DATABASE_URL") or \
     f"postgresql+psycopg://{_env('DB_USER')}:{_env('DB_PASSWORD')}@" \
     f"{_env('DB_HOST')}:{_env('DB_PORT','5432')}/{_env('DB_NAME')}"
 
-engine = create_engine(
-    DB_URL,
-    future=True,
+# 적재 대상 테이블 (ETL의 CSV_TABLE과 동일)
+TABLE = os.getenv("CSV_TABLE", "data")
+
+# 커넥션 풀 (sync/async 엔진 각각에 적용, 트래픽에 맞춰 env로 조정)
+POOL = dict(
     pool_pre_ping=True,
-    pool_size=5,         # 트래픽에 맞춰 조정
-    max_overflow=5,
-    pool_recycle=1800,   # 커넥션 오래되면 재생성
+    pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "5")),
+    pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),   # 커넥션 오래되면 재생성
 )
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
\ No newline at end of file
+
+engine = create_engine(DB_URL, future=True, poolclass=TimedQueuePool, **POOL)
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+
+# async 스택: 같은 URL(postgresql+psycopg)로 psycopg 3 AsyncConnection 사용
+async_engine = create_async_engine(DB_URL, poolclass=TimedAsyncQueuePool, **POOL)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# /metrics: 쿼리별 실행 시간 (statement의 query_name execution option으로 label)
+instrument_engine(engine, "sync")
+instrument_engine(async_engine.sync_engine, "async")
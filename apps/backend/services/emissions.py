@@ -0,0 +1,190 @@
+import base64
+import csv
+import io
+import json
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import TABLE, async_engine
+
+# 항상 포함되는 식별 컬럼 / metric으로 노출하지 않는 컬럼
+ID_COLUMNS = ["name", "iso_code", "year"]
+HIDDEN = {"id", "row_hash", "description"}
+NUMERIC_TYPES = {"smallint", "integer", "bigint", "double precision", "real", "numeric"}
+
+_columns: Tuple[Optional[str], Dict[str, str]] = (None, {})   # (dataset version, columns)
+
+
+async def table_columns(db: AsyncSession) -> Dict[str, str]:
+    """{column: data_type} of the emissions table, re-read when the dataset version changes (swap load, recreate)."""
+    global _columns
+    from .cache import CACHE   # cache가 이 모듈을 import -> 순환 import 방지
+    version = await CACHE.version()
+    if _columns[0] != version or not _columns[1]:
+        result = await db.execute(text('''
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :t
+            ORDER BY ordinal_position
+        ''').execution_options(query_name="emissions.columns"), {"t": TABLE})
+        _columns = (version, {name: t for name, t in result.all()})
+    return _columns[1]
+
+
+async def metric_columns(db: AsyncSession) -> List[str]:
+    return [c for c, t in (await table_columns(db)).items()
+            if t in NUMERIC_TYPES and c not in HIDDEN and c not in ID_COLUMNS]
+
+
+def split_values(values: Optional[Sequence[str]]) -> List[str]:
+    """['a,b', 'c'] -> ['a', 'b', 'c'] (repeated and comma-separated query params both work)"""
+    return [v.strip() for item in values or [] for v in item.split(",") if v.strip()]
+
+
+async def resolve_metrics(db: AsyncSession, requested: Optional[Sequence[str]]) -> List[str]:
+    """Requested metrics checked against the table's real columns (all metrics if none given)."""
+    available = await metric_columns(db)
+    wanted = split_values(requested)
+    if not wanted:
+        return available
+    unknown = [m for m in wanted if m not in available]
+    if unknown:
+        raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+    return list(dict.fromkeys(wanted))
+
+
+# ---------- keyset cursor ----------
+def encode_cursor(name: str, year: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([name, year]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        name, year = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(name), int(year)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def _filters(names: List[str], year_from: Optional[int], year_to: Optional[int]) -> Tuple[List[str], dict]:
+    where = ["name IS NOT NULL", "year IS NOT NULL"]
+    params: dict = {}
+    if names:
+        where.append("name = ANY(:names)")
+        params["names"] = names
+    if year_from is not None:
+        where.append("year >= :y1")
+        params["y1"] = year_from
+    if year_to is not None:
+        where.append("year <= :y2")
+        params["y2"] = year_to
+    return where, params
+
+
+def build_query(metrics: List[str], names: List[str], year_from: Optional[int], year_to: Optional[int],
+                after: Optional[Tuple[str, int]] = None, limit: Optional[int] = None,
+                casts: Optional[Dict[str, str]] = None) -> Tuple[str, dict]:
+    casts = casts or {}
+    cols = ", ".join(f'"{c}"::{casts[c]} AS "{c}"' if c in casts else f'"{c}"' for c in ID_COLUMNS + metrics)
+    where, params = _filters(names, year_from, year_to)
+    if after is not None:
+        # (name, year) row comparison -> {table}_name_year_idx 인덱스 range scan (OFFSET 없음)
+        where.append("(name, year) > (:after_name, :after_year)")
+        params.update(after_name=after[0], after_year=after[1])
+    sql = f'SELECT {cols} FROM "{TABLE}" WHERE {" AND ".join(where)} ORDER BY name, year'
+    if limit is not None:
+        sql += " LIMIT :limit"
+        params["limit"] = limit
+    return sql, params
+
+
+async def page(db: AsyncSession, *, names: Optional[Sequence[str]] = None, year_from: Optional[int] = None,
+               year_to: Optional[int] = None, metrics: Optional[Sequence[str]] = None,
+               limit: int = 1000, cursor: Optional[str] = None) -> dict:
+    cols = await resolve_metrics(db, metrics)
+    after = decode_cursor(cursor) if cursor else None
+    sql, params = build_query(cols, split_values(names), year_from, year_to, after, limit + 1)
+    items = [dict(r) for r in (await db.execute(text(sql).execution_options(query_name="timeseries.page"),
+                                                params)).mappings()]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["name"], items[-1]["year"])
+    return {"metrics": cols, "count": len(items), "items": items, "next_cursor": next_cursor}
+
+
+# ---------- batched frames (N countries x M metrics x years, one query) ----------
+def build_long_query(metrics: List[str], names: List[str], year_from: Optional[int],
+                     year_to: Optional[int]) -> Tuple[str, dict]:
+    """Unpivot in SQL: one (name, iso_code, year, metric, value) row per non-NULL cell."""
+    # metric 이름은 resolve_metrics로 실제 컬럼만 통과 -> 리터럴/식별자로 넣어도 안전
+    values = ", ".join(f"({i}, '{m}', \"{m}\"::float8)" for i, m in enumerate(metrics))
+    where, params = _filters(names, year_from, year_to)
+    sql = f'''
+        SELECT name, iso_code, year, v.metric, v.value
+        FROM "{TABLE}" CROSS JOIN LATERAL (VALUES {values}) AS v(ord, metric, value)
+        WHERE {" AND ".join(where)} AND v.value IS NOT NULL
+        ORDER BY name, year, v.ord
+    '''
+    return sql, params
+
+
+async def frame(db: AsyncSession, *, names: Sequence[str], metrics: Optional[Sequence[str]] = None,
+                year_from: Optional[int] = None, year_to: Optional[int] = None, shape: str = "wide") -> dict:
+    """
+    Column-oriented frame for many countries and metrics at once
+    (pd.DataFrame(r["data"], columns=r["columns"])).
+    wide: one row per (name, year) with a column per metric; long: one row per non-NULL value.
+    """
+    wanted = split_values(names)
+    if not wanted:
+        raise ValueError("At least one country is required")
+    cols = await resolve_metrics(db, metrics)
+    if shape == "long":
+        sql, params = build_long_query(cols, wanted, year_from, year_to)
+        columns = ID_COLUMNS + ["metric", "value"]
+    else:
+        sql, params = build_query(cols, wanted, year_from, year_to)
+        columns = ID_COLUMNS + cols
+    data = [list(r) for r in (await db.execute(text(sql).execution_options(query_name=f"timeseries.batch_{shape}"),
+                                               params)).all()]
+    found = {r[0] for r in data}
+    return {"shape": shape, "metrics": cols, "columns": columns, "count": len(data), "data": data,
+            "missing": sorted(set(wanted) - found)}
+
+
+# ---------- streaming export ----------
+async def iter_rows(metrics: List[str], names: List[str], year_from: Optional[int], year_to: Optional[int],
+                    batch: int = 5000, casts: Optional[Dict[str, str]] = None) -> AsyncIterator[List[tuple]]:
+    """
+    Yield row batches from a server-side cursor on a dedicated connection, so
+    memory stays at `batch` rows whatever the result size. (The request's
+    Session is already closed while a StreamingResponse is being sent.)
+    """
+    sql, params = build_query(metrics, names, year_from, year_to, casts=casts)
+    async with async_engine.connect() as conn:
+        result = await conn.stream(text(sql).execution_options(yield_per=batch, query_name="timeseries.export"), params)
+        async for part in result.partitions():
+            yield part
+
+
+async def stream_ndjson(metrics: List[str], names: List[str], year_from: Optional[int], year_to: Optional[int],
+                        batch: int = 5000) -> AsyncIterator[str]:
+    cols = ID_COLUMNS + metrics
+    async for part in iter_rows(metrics, names, year_from, year_to, batch):
+        yield "".join(json.dumps(dict(zip(cols, row)), default=str) + "\n" for row in part)
+
+
+async def stream_csv(metrics: List[str], names: List[str], year_from: Optional[int], year_to: Optional[int],
+                     batch: int = 5000) -> AsyncIterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerow(ID_COLUMNS + metrics)
+    async for part in iter_rows(metrics, names, year_from, year_to, batch):
+        writer.writerows(part)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
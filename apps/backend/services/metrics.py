@@ -0,0 +1,139 @@
+import time
+from typing import Iterable
+
+from prometheus_client import Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# 0.5ms ~ 10s (SELECT 1부터 전체 export까지)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route template and status",
+                         ["method", "route", "status"], buckets=LATENCY_BUCKETS)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled")
+QUERY_LATENCY = Histogram("db_query_duration_seconds", "Statement execution time by query_name execution option",
+                          ["engine", "query"], buckets=LATENCY_BUCKETS)
+POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection",
+                      ["engine"], buckets=LATENCY_BUCKETS)
+
+
+# ---------- pool wait ----------
+class _TimedGet:
+    """Pool mixin: time _do_get (checkout from the queue, including waiting for a free connection)."""
+    label = "sync"
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.labels(self.label).observe(time.perf_counter() - t0)
+
+
+class TimedQueuePool(_TimedGet, QueuePool):
+    label = "sync"
+
+
+class TimedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    label = "async"
+
+
+# ---------- per-statement timing ----------
+def instrument_engine(engine: Engine, label: str) -> None:
+    """
+    Time every statement on `engine` (for an AsyncEngine pass .sync_engine).
+    Label queries with .execution_options(query_name="...") on the statement;
+    unlabelled ones are counted as "other".
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        name = context.execution_options.get("query_name", "other") if context is not None else "other"
+        QUERY_LATENCY.labels(label, name).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(ctx):
+        stack = ctx.connection.info.get("query_start") if ctx.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+# ---------- scrape-time gauges ----------
+class PoolCollector(Collector):
+    """Pool occupancy (checked out / overflow / idle / size) of each engine, read at scrape time."""
+
+    def __init__(self, engines: dict) -> None:
+        self.engines = engines
+
+    def collect(self) -> Iterable:
+        fams = {
+            "checked_out": GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=["engine"]),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Connections above pool_size (negative: not yet opened)",
+                                          labels=["engine"]),
+            "checked_in": GaugeMetricFamily("db_pool_checked_in", "Idle connections in the pool", labels=["engine"]),
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool_size", labels=["engine"]),
+        }
+        for label, engine in self.engines.items():
+            pool = engine.pool
+            fams["checked_out"].add_metric([label], pool.checkedout())
+            fams["overflow"].add_metric([label], pool.overflow())
+            fams["checked_in"].add_metric([label], pool.checkedin())
+            fams["size"].add_metric([label], pool.size())
+        return fams.values()
+
+
+class CacheCollector(Collector):
+    """services.cache counters as Prometheus counters/gauges."""
+
+    def __init__(self, cache) -> None:
+        self.cache = cache
+
+    def collect(self) -> Iterable:
+        events = CounterMetricFamily("api_cache_events", "Response cache lookups and evictions", labels=["event"])
+        for name, value in self.cache.counters.items():
+            events.add_metric([name], value)
+        stats = self.cache.stats()
+        yield events
+        yield GaugeMetricFamily("api_cache_entries", "Cached responses", value=stats["entries"])
+        yield GaugeMetricFamily("api_cache_bytes", "Bytes of cached response bodies", value=stats["bytes"])
+
+
+# ---------- HTTP ----------
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge + latency histogram labelled with the matched route template."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        t0 = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # 경로 그대로 쓰면 label이 무한히 늘어남 -> 템플릿 ("/rollups/top"), 매칭 실패는 한 label로
+            path = getattr(scope.get("route"), "path", None) or "<unmatched>"
+            if path != "/metrics":
+                HTTP_LATENCY.labels(scope["method"], path, str(status["code"])).observe(time.perf_counter() - t0)
+
+
+def register_collectors(engines: dict, cache) -> None:
+    REGISTRY.register(PoolCollector(engines))
+    REGISTRY.register(CacheCollector(cache))
@@ -0,0 +1,50 @@
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import TABLE
+
+# ETL(csv_to_pg.rollups)가 만드는 materialized view 이름과 동일해야 함
+STATS = f"{TABLE}_rollup_stats"
+DIM_COUNTRY = f"{TABLE}_dim_country"
+DIM_YEAR = f"{TABLE}_dim_year"
+RANK_YEAR = f"{TABLE}_rank_year"
+WORLD_YEAR = f"{TABLE}_world_year"
+
+
+async def _rows(db: AsyncSession, name: str, sql: str, **params):
+    result = await db.execute(text(sql).execution_options(query_name=name), params)
+    return [dict(r) for r in result.mappings()]
+
+
+async def dataset_stats(db: AsyncSession) -> dict:
+    rows = await _rows(db, "rollups.stats", f'SELECT rows, min_year, max_year, countries FROM "{STATS}"')
+    return rows[0] if rows else {"rows": 0, "min_year": None, "max_year": None, "countries": 0}
+
+
+async def countries(db: AsyncSession) -> list:
+    return await _rows(db, "rollups.countries", f'SELECT name, iso_code, first_year, last_year FROM "{DIM_COUNTRY}" ORDER BY name')
+
+
+async def years(db: AsyncSession) -> list:
+    return await _rows(db, "rollups.years", f'SELECT year, countries FROM "{DIM_YEAR}" ORDER BY year')
+
+
+async def top_emitters(db: AsyncSession, year: Optional[int] = None, limit: int = 20) -> list:
+    """Emitters ranked <= limit in `year`; rows tied at the cut-off are all returned."""
+    if year is None:
+        year = (await dataset_stats(db))["max_year"]
+    return await _rows(db, "rollups.top", f'''
+        SELECT name, iso_code, year, co2_mt, rank FROM "{RANK_YEAR}"
+        WHERE year = :y AND rank <= :n
+        ORDER BY rank, name
+    ''', y=year, n=limit)
+
+
+async def world_series(db: AsyncSession, year_from: Optional[int] = None, year_to: Optional[int] = None) -> list:
+    return await _rows(db, "rollups.world", f'''
+        SELECT * FROM "{WORLD_YEAR}"
+        WHERE (CAST(:y1 AS int) IS NULL OR year >= :y1) AND (CAST(:y2 AS int) IS NULL OR year <= :y2)
+        ORDER BY year
+    ''', y1=year_from, y2=year_to)
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import text
+
+from .cache import CACHE
+from .db import TABLE, async_engine
+from .emissions import HIDDEN, ID_COLUMNS, NUMERIC_TYPES, decode_cursor, encode_cursor, split_values
+
+INT_TYPES = {"smallint", "integer", "bigint"}
+
+
+class Snapshot:
+    """
+    Read-only, column-oriented copy of the emissions table.
+    - Rows sorted by (name, year) in the database's collation order, so keyset
+      cursors are interchangeable with the SQL path. A cursor naming a country
+      the snapshot does not hold is left to the SQL path (serves_cursor), since
+      only the database knows where it sorts in its collation.
+    - name / iso_code are dictionary-encoded (codes + value list); a country's
+      rows are the contiguous slice starts[code]:starts[code + 1].
+    - Metrics are NumPy arrays: float64 with NaN, or int64 plus a null mask for
+      integer columns (so JSON output matches Postgres: ints stay ints).
+    """
+
+    def __init__(self, version: str, names: List[str], codes: np.ndarray, years: np.ndarray,
+                 iso_values: List[Optional[str]], iso_codes: np.ndarray,
+                 columns: Dict[str, np.ndarray], nulls: Dict[str, np.ndarray], load_seconds: float) -> None:
+        self.version = version
+        self.names = names                                   # code -> name (DB 정렬 순서)
+        self.name_code = {n: i for i, n in enumerate(names)}
+        self.codes = codes
+        self.years = years
+        self.iso_values = iso_values
+        self.iso_codes = iso_codes
+        self.columns = columns
+        self.nulls = nulls
+        self.metrics = list(columns)
+        self.starts = np.searchsorted(codes, np.arange(len(names) + 1))
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+    # ---------- helpers ----------
+    def resolve_metrics(self, requested: Optional[Sequence[str]]) -> List[str]:
+        wanted = split_values(requested)
+        if not wanted:
+            return list(self.metrics)
+        unknown = [m for m in wanted if m not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown metric(s): {', '.join(unknown)}")
+        return list(dict.fromkeys(wanted))
+
+    def _rows_for(self, names: List[str], year_from: Optional[int], year_to: Optional[int]) -> np.ndarray:
+        """Row indices (sorted by name, year) for the countries / year range."""
+        if names:
+            codes = sorted({self.name_code[n] for n in names if n in self.name_code})
+            idx = np.concatenate([np.arange(self.starts[c], self.starts[c + 1]) for c in codes]) \
+                if codes else np.empty(0, dtype=np.int64)
+        else:
+            idx = np.arange(len(self.codes))
+        mask = np.ones(len(idx), dtype=bool)
+        if year_from is not None:
+            mask &= self.years[idx] >= year_from
+        if year_to is not None:
+            mask &= self.years[idx] <= year_to
+        return idx[mask]
+
+    def serves_cursor(self, cursor: Optional[str]) -> bool:
+        """Whether page() can resume after `cursor`: none given, or its name is in the snapshot."""
+        if not cursor:
+            return True
+        try:
+            name, _ = decode_cursor(cursor)
+        except ValueError:
+            return False   # emissions.page가 같은 400을 돌려줌
+        return name in self.name_code
+
+    def values(self, column: str, idx: np.ndarray) -> list:
+        """Column values at `idx` as Python objects, NULL -> None."""
+        if column == "name":
+            return [self.names[c] for c in self.codes[idx]]
+        if column == "iso_code":
+            return [self.iso_values[c] for c in self.iso_codes[idx]]
+        if column == "year":
+            return self.years[idx].tolist()
+        out = self.columns[column][idx].tolist()
+        null = self.nulls[column][idx]
+        if null.any():
+            for i in np.flatnonzero(null).tolist():
+                out[i] = None
+        return out
+
+    # ---------- queries (same results as services.emissions / rollups) ----------
+    def page(self, *, names: Optional[Sequence[str]] = None, year_from: Optional[int] = None,
+             year_to: Optional[int] = None, metrics: Optional[Sequence[str]] = None,
+             limit: int = 1000, cursor: Optional[str] = None) -> dict:
+        cols = self.resolve_metrics(metrics)
+        idx = self._rows_for(split_values(names), year_from, year_to)
+        if cursor:
+            after_name, after_year = decode_cursor(cursor)
+            code = self.name_code[after_name]   # serves_cursor()로 확인된 이름만
+            row_codes = self.codes[idx]
+            idx = idx[(row_codes > code) | ((row_codes == code) & (self.years[idx] > after_year))]
+        idx = idx[: limit + 1]
+        columns = ID_COLUMNS + cols
+        items = [dict(zip(columns, row)) for row in zip(*(self.values(c, idx) for c in columns))]
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1]["name"], items[-1]["year"])
+        return {"metrics": cols, "count": len(items), "items": items, "next_cursor": next_cursor}
+
+    def frame(self, *, names: Sequence[str], metrics: Optional[Sequence[str]] = None,
+              year_from: Optional[int] = None, year_to: Optional[int] = None, shape: str = "wide") -> dict:
+        wanted = split_values(names)
+        if not wanted:
+            raise ValueError("At least one country is required")
+        cols = self.resolve_metrics(metrics)
+        idx = self._rows_for(wanted, year_from, year_to)
+        ids = [self.values(c, idx) for c in ID_COLUMNS]
+        if shape == "long":
+            # (행, metric) 순서 = ORDER BY name, year, metric 순서; NULL 값은 제외
+            vals = np.column_stack([self.columns[m][idx].astype(np.float64) for m in cols]) \
+                if len(idx) else np.empty((0, len(cols)))
+            valid = ~np.column_stack([self.nulls[m][idx] for m in cols]) if len(idx) else vals.astype(bool)
+            rows, which = np.nonzero(valid)
+            data = [[ids[0][r], ids[1][r], ids[2][r], cols[m], v]
+                    for r, m, v in zip(rows.tolist(), which.tolist(), vals[rows, which].tolist())]
+            columns = ID_COLUMNS + ["metric", "value"]
+        else:
+            data = [list(row) for row in zip(*ids, *(self.values(m, idx) for m in cols))]
+            columns = ID_COLUMNS + cols
+        found = set(ids[0])
+        return {"shape": shape, "metrics": cols, "columns": columns, "count": len(data), "data": data,
+                "missing": sorted(set(wanted) - found)}
+
+    def top(self, year: Optional[int] = None, limit: int = 20, metric: str = "co2_mt") -> list:
+        """Per-year ranking like the rank_year rollup (rank() with ties, NULLs last, first row per name)."""
+        if metric not in self.columns:
+            return []
+        if year is None:
+            year = int(self.years.max()) if len(self.years) else None
+        idx = np.flatnonzero(self.years == year)
+        _, first = np.unique(self.codes[idx], return_index=True)   # append 테이블의 중복 (name, year)
+        idx = idx[np.sort(first)]
+        vals = self.columns[metric][idx].astype(np.float64)
+        vals[self.nulls[metric][idx]] = np.nan
+        desc = np.where(np.isnan(vals), -np.inf, vals)
+        order = np.lexsort((self.codes[idx], -desc))
+        ranked = np.sort(desc)[::-1]
+        rank = np.searchsorted(-ranked, -desc[order], side="left") + 1
+        keep = order[rank <= limit]   # rank <= limit: 동률은 모두 포함 (SQL 경로와 동일)
+        out_rank = rank[rank <= limit].tolist()
+        sel = idx[keep]
+        return [{"name": n, "iso_code": i, "year": y, metric: v, "rank": r}
+                for n, i, y, v, r in zip(self.values("name", sel), self.values("iso_code", sel),
+                                         self.values("year", sel), self.values(metric, sel), out_rank)]
+
+    def info(self) -> dict:
+        nbytes = sum(a.nbytes for a in self.columns.values()) + self.codes.nbytes + self.years.nbytes
+        return {"version": self.version, "rows": len(self.codes), "countries": len(self.names),
+                "metrics": len(self.metrics), "array_bytes": nbytes, "load_seconds": round(self.load_seconds, 3),
+                "loaded_at": self.loaded_at}
+
+
+async def load_snapshot(version: str, batch: int = 20000) -> Snapshot:
+    """Read the table once (ORDER BY name, year) and build the column arrays."""
+    t0 = time.perf_counter()
+    async with async_engine.connect() as conn:
+        types = {c: t for c, t in (await conn.execute(text('''
+            SELECT column_name, data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = :t ORDER BY ordinal_position
+        '''), {"t": TABLE})).all()}
+        metrics = [c for c, t in types.items() if t in NUMERIC_TYPES and c not in HIDDEN and c not in ID_COLUMNS]
+        select = ", ".join(['name', 'iso_code', 'year'] +
+                           [f'"{m}"::float8 AS "{m}"' if types[m] == "numeric" else f'"{m}"' for m in metrics])
+        result = await conn.stream(text(f'''
+            SELECT {select} FROM "{TABLE}" WHERE name IS NOT NULL AND year IS NOT NULL ORDER BY name, year
+        ''').execution_options(yield_per=batch, query_name="snapshot.load"))
+        parts = [part async for part in result.partitions()]
+    return await asyncio.to_thread(_build, version, types, metrics, parts, t0)
+
+
+def _build(version: str, types: Dict[str, str], metrics: List[str], parts: List[list], t0: float) -> Snapshot:
+    rows = [r for part in parts for r in part]
+    cols = list(zip(*rows)) if rows else [()] * (3 + len(metrics))
+
+    # name: DB가 정렬한 순서대로 코드 부여 (collation을 그대로 따름)
+    names: List[str] = []
+    codes = np.empty(len(rows), dtype=np.int32)
+    last = object()
+    for i, n in enumerate(cols[0]):
+        if n != last:
+            names.append(n)
+            last = n
+        codes[i] = len(names) - 1
+    iso_values, iso_codes = np.unique(np.array([v or "" for v in cols[1]], dtype=object), return_inverse=True)
+    iso_list = [v or None for v in iso_values.tolist()]
+    years = np.array(cols[2], dtype=np.int32)
+
+    columns: Dict[str, np.ndarray] = {}
+    nulls: Dict[str, np.ndarray] = {}
+    for m, values in zip(metrics, cols[3:]):
+        arr = np.array(values, dtype=np.float64)   # None -> NaN
+        nulls[m] = np.isnan(arr)
+        columns[m] = np.where(nulls[m], 0, arr).astype(np.int64) if types[m] in INT_TYPES else arr
+    return Snapshot(version, names, codes, years, iso_list, iso_codes.astype(np.int32), columns, nulls,
+                    time.perf_counter() - t0)
+
+
+class SnapshotManager:
+    """
+    Holds the current Snapshot and rebuilds it in the background when the
+    dataset version (services.cache) changes; the new one replaces the old by a
+    single reference swap, so a request sees one whole snapshot or the other.
+    current() only returns a snapshot of the version the cache / ETags use, so
+    while a reload is in flight requests fall back to Postgres.
+    """
+
+    def __init__(self, enabled: bool, poll_seconds: float = 30) -> None:
+        self.enabled = enabled
+        self.poll_seconds = poll_seconds
+        self._snapshot: Optional[Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def current(self) -> Optional[Snapshot]:
+        snap = self._snapshot
+        if not self.enabled or snap is None or snap.version != CACHE.current_version:
+            return None
+        return snap
+
+    async def refresh(self) -> bool:
+        version = await CACHE.version()
+        if self._snapshot is not None and self._snapshot.version == version:
+            return False
+        snap = await load_snapshot(version)
+        if version == await CACHE.version():   # 적재 중 버전이 또 바뀌면 다음 주기에
+            self._snapshot = snap
+            self.reloads += 1
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+                self.last_error = None
+            except Exception as e:   # DB 장애 등: 이전 snapshot 유지, 다음 주기에 재시도
+                self.last_error = f"{type(e).__name__}: {e}"
+            await asyncio.sleep(self.poll_seconds)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def info(self) -> dict:
+        snap = self._snapshot
+        return {"enabled": self.enabled, "serving": self.current() is not None, "reloads": self.reloads,
+                "last_error": self.last_error, "snapshot": snap.info() if snap else None}
+
+
+# SNAPSHOT_ENABLED=1 이면 timeseries page/batch, rollups top을 메모리에서 응답
+SNAPSHOTS = SnapshotManager(
+    enabled=os.getenv("SNAPSHOT_ENABLED", "0").lower() in ("1", "true", "yes"),
+    poll_seconds=float(os.getenv("SNAPSHOT_POLL_SECONDS", "30")),
+)
@@ -0,0 +1,77 @@
+"""
+build_series_query is pure: these check the SQL it generates for each
+indicator, the year-gap rule of yoy / yoy_pct and the ntile downsampling.
+"""
+
+import re
+
+import pytest
+
+from apps.backend.services.analytics import build_series_query, parse_indicators
+from apps.backend.services.db import TABLE
+
+WORLD = 'SELECT year, "co2_mt" AS total FROM "data_world_year"'
+
+
+def squash(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+def query(indicators, **kw):
+    args = dict(names=["A", "B"], year_from=None, year_to=None, window=5, points=None, world=None)
+    args.update(kw)
+    sql, params = build_series_query("co2_mt", indicators, **args)
+    return squash(sql), params
+
+
+def test_value_and_params():
+    sql, params = query(["value"], year_from=1990, year_to=2000)
+    assert sql.startswith('SELECT * FROM ( SELECT name, year, "co2_mt"::float8 AS value')
+    assert f'FROM "{TABLE}"' in sql
+    assert "WINDOW w AS (PARTITION BY name ORDER BY year)" in sql
+    # 연도 필터는 창 함수 바깥 (year_from의 ma/yoy가 앞 연도를 볼 수 있도록)
+    assert sql.index("WINDOW w") < sql.index("year >= :y1")
+    assert sql.endswith("ORDER BY name, year")
+    assert params == {"names": ["A", "B"], "y1": 1990, "y2": 2000, "points": None}
+
+
+def test_moving_average_is_a_year_range():
+    sql, _ = query(["ma"], window=3)
+    # ROWS가 아니라 RANGE: 빠진 연도가 있어도 창은 3년
+    assert 'AVG("co2_mt"::float8) OVER (w RANGE BETWEEN 2 PRECEDING AND CURRENT ROW) AS ma' in sql
+
+
+@pytest.mark.parametrize("indicator, diff", [
+    ("yoy", '"co2_mt"::float8 - LAG("co2_mt"::float8) OVER w'),
+    ("yoy_pct", '100.0 * ("co2_mt"::float8 / NULLIF(LAG("co2_mt"::float8) OVER w, 0) - 1)'),
+])
+def test_yoy_only_compares_the_previous_year(indicator, diff):
+    sql, _ = query([indicator])
+    # 전년 행이 없으면 (연도 공백) NULL
+    assert f"CASE WHEN LAG(year) OVER w = year - 1 THEN {diff} END AS {indicator}" in sql
+
+
+def test_share_joins_world_totals():
+    sql, _ = query(["value", "share"], world=WORLD)
+    assert f"LEFT JOIN ({WORLD}) world USING (year)" in sql
+    assert '(100.0 * "co2_mt"::float8 / NULLIF(world.total, 0))::float8 AS share' in sql
+    assert "LEFT JOIN" not in query(["value"], world=WORLD)[0]
+
+
+def test_points_buckets_with_ntile():
+    sql, params = query(["value", "yoy"], points=50)
+    assert sql.startswith("SELECT name, MIN(year) AS year, AVG(value) AS value, AVG(yoy) AS yoy")
+    assert "ntile(:points) OVER (PARTITION BY name ORDER BY year) AS bucket" in sql
+    assert "GROUP BY name, bucket" in sql
+    # 축소는 연도 필터 이후
+    assert sql.index("year >= :y1") < sql.index("GROUP BY name, bucket")
+    assert sql.endswith("ORDER BY name, year")
+    assert params["points"] == 50
+    assert "ntile" not in query(["value"])[0]
+
+
+def test_parse_indicators():
+    assert parse_indicators(None) == ["value"]
+    assert parse_indicators(["ma,yoy", "ma"]) == ["ma", "yoy"]
+    with pytest.raises(ValueError, match="Unknown indicator"):
+        parse_indicators(["median"])
@@ -0,0 +1,151 @@
+"""
+ResponseCache without a database: the version loader is a stub, loaders are
+coroutines that count their calls (and can be held open with an Event).
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from apps.backend.services.cache import ResponseCache, make_key
+
+
+class Versions:
+    def __init__(self, value: str = "v1") -> None:
+        self.value = value
+
+    async def __call__(self) -> str:
+        return self.value
+
+
+class Loader:
+    def __init__(self, value: object = None, gate: asyncio.Event = None) -> None:
+        self.value = value
+        self.gate = gate
+        self.calls = 0
+
+    async def __call__(self) -> object:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        return self.value
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key_normalizes_lists():
+    assert make_key("t", country=["B,A", "A"], year_from=None) == make_key("t", country=["A", "B"])
+    # metric 순서는 응답 컬럼 순서 -> 정렬하지 않음
+    assert make_key("t", metric=["b", "a"]) != make_key("t", metric=["a", "b"])
+
+
+def test_lru_evicts_least_recently_used_entry():
+    async def main():
+        cache = ResponseCache(max_entries=2, version_loader=Versions())
+        a, b, c = Loader("a"), Loader("b"), Loader("c")
+        await cache.get_or_load(("a",), a)
+        await cache.get_or_load(("b",), b)
+        assert await cache.get_or_load(("a",), a) == b'"a"'   # a가 최근 사용 -> b가 밀려남
+        await cache.get_or_load(("c",), c)
+        await cache.get_or_load(("a",), a)
+        await cache.get_or_load(("b",), b)
+        return cache, a, b
+    cache, a, b = run(main())
+    assert (a.calls, b.calls) == (1, 2)
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 2
+    assert (stats["hits"], stats["misses"]) == (2, 4)
+
+
+def test_lru_respects_max_bytes():
+    async def main():
+        cache = ResponseCache(max_bytes=25, version_loader=Versions())
+        for key in ("a", "b", "c"):
+            await cache.get_or_load((key,), Loader("x" * 8))   # 10 bytes each
+        await cache.get_or_load(("big",), Loader("x" * 40))    # 42 bytes > max_bytes: not stored
+        return cache
+    stats = run(main()).stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 20, 1)
+
+
+def test_new_dataset_version_invalidates():
+    async def main():
+        versions = Versions("v1")
+        cache = ResponseCache(version_ttl=0, version_loader=versions)
+        load = Loader([1])
+        await cache.get_or_load(("k",), load)
+        await cache.get_or_load(("k",), load)
+        versions.value = "v2"
+        body = await cache.get_or_load(("k",), load)
+        return cache, load, body
+    cache, load, body = run(main())
+    assert json.loads(body) == [1] and load.calls == 2
+    stats = cache.stats()
+    assert stats["invalidations"] == 1 and stats["dataset_version"] == "v2"
+
+
+def test_body_loaded_for_an_old_version_is_not_stored():
+    async def main():
+        versions = Versions("v1")
+        cache = ResponseCache(version_ttl=0, version_loader=versions)
+
+        async def load():
+            versions.value = "v2"
+            await cache.version()   # 적재 중에 ETL이 새 버전을 씀
+            return "old"
+        assert await cache.get_or_load(("k",), load) == b'"old"'
+        return cache
+    assert run(main()).stats()["entries"] == 0
+
+
+def test_concurrent_misses_share_one_load():
+    async def main():
+        cache = ResponseCache(version_loader=Versions())
+        load = Loader({"rows": 3}, asyncio.Event())
+        tasks = [asyncio.create_task(cache.get_or_load(("k",), load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        load.gate.set()
+        return cache, load, await asyncio.gather(*tasks)
+    cache, load, bodies = run(main())
+    assert load.calls == 1 and len(set(bodies)) == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 4, 0)
+
+
+def test_waiters_load_themselves_when_the_first_request_is_cancelled():
+    async def main():
+        cache = ResponseCache(version_loader=Versions())
+        first = Loader("first", asyncio.Event())
+        second = Loader("second")
+        leader = asyncio.create_task(cache.get_or_load(("k",), first))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_load(("k",), second))
+        await asyncio.sleep(0)
+        leader.cancel()   # client disconnect
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return cache, second, await waiter
+    cache, second, body = run(main())
+    assert body == b'"second"' and second.calls == 1
+    assert cache._inflight == {}
+    assert cache.stats()["coalesced"] == 1
+
+
+def test_loader_errors_reach_every_waiter():
+    async def main():
+        cache = ResponseCache(version_loader=Versions())
+        gate = asyncio.Event()
+
+        async def fail():
+            await gate.wait()
+            raise ValueError("Unknown metric(s): nope")
+        tasks = [asyncio.create_task(cache.get_or_load(("k",), fail)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        return cache, await asyncio.gather(*tasks, return_exceptions=True)
+    cache, results = run(main())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,133 @@
+"""
+ETag matching and CompressionMiddleware through a small FastAPI app. The
+cached_json route uses a ResponseCache with a stub version loader instead of
+the database.
+"""
+
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from apps.backend.api import deps
+from apps.backend.services.cache import ResponseCache, etag_matches, make_key, matching_etag
+from apps.backend.services.compression import CompressionMiddleware, choose_encoding, zstandard
+
+ROWS = [{"name": f"Country {i}", "year": 2000 + i % 20, "co2_mt": i * 1.5} for i in range(200)]
+CHUNKS = [b'{"name":"A","year":%d}\n' % y * 40 for y in range(3)]
+
+
+async def version() -> str:
+    return "v1"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(deps, "CACHE", ResponseCache(version_loader=version))
+    app = FastAPI()
+
+    @app.get("/rows")
+    async def rows(request: Request):
+        return await deps.cached_json(request, make_key("rows"), lambda: asyncio.sleep(0, ROWS))
+
+    @app.get("/small")
+    async def small(request: Request):
+        return await deps.cached_json(request, make_key("small"), lambda: asyncio.sleep(0, {"ok": True}))
+
+    @app.get("/encoded")
+    async def encoded():
+        return Response(gzip.compress(b"x" * 4096), media_type="text/csv", headers={"Content-Encoding": "gzip"})
+
+    @app.get("/arrow")
+    async def arrow():
+        return Response(b"\0" * 4096, media_type="application/vnd.apache.arrow.stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    return TestClient(app)
+
+
+def test_etag_matching():
+    tag = '"abc"'
+    assert matching_etag('"abc"', tag) == '"abc"'
+    assert matching_etag('W/"abc-gzip"', tag) == '"abc-gzip"'
+    assert matching_etag('"old", "abc-zstd"', tag) == '"abc-zstd"'
+    assert matching_etag("*", tag) == tag
+    assert matching_etag('"abc-br"', tag) is None
+    assert not etag_matches(None, tag)
+    assert not etag_matches('"abd"', tag)
+    assert etag_matches(' "x" ,W/"abc" ', tag)
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip;q=0, br") is None
+    assert choose_encoding("br, *") == "gzip"
+    assert choose_encoding("zstd, gzip") == ("zstd" if zstandard is not None else "gzip")
+
+
+def test_json_is_gzipped_with_a_suffixed_etag(client):
+    plain = client.get("/rows", headers={"Accept-Encoding": "identity"})
+    resp = client.get("/rows", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert resp.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert resp.content == plain.content   # httpx가 gzip을 풀어 줌
+
+
+def test_not_modified_repeats_the_encoded_etag(client):
+    tag = client.get("/rows", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    resp = client.get("/rows", headers={"Accept-Encoding": "gzip", "If-None-Match": tag})
+    assert resp.status_code == 304
+    assert resp.headers["etag"] == tag
+    assert "content-encoding" not in resp.headers and resp.content == b""
+
+    bare = client.get("/rows", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    resp = client.get("/rows", headers={"Accept-Encoding": "identity", "If-None-Match": bare})
+    assert resp.status_code == 304 and resp.headers["etag"] == bare
+
+
+def test_small_bodies_are_not_compressed(client):
+    resp = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers
+    assert resp.headers["vary"] == "Accept-Encoding"
+    assert not resp.headers["etag"].endswith('-gzip"')
+    assert resp.json() == {"ok": True}
+
+
+def test_encoded_and_columnar_responses_pass_through(client):
+    resp = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.content == b"x" * 4096   # 한 번만 압축됨
+    resp = client.get("/arrow", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in resp.headers and resp.content == b"\0" * 4096
+
+
+def test_streamed_chunks_decode_as_they_arrive():
+    async def app(scope, receive, send):
+        await StreamingResponse(iter(CHUNKS), media_type="application/x-ndjson")(scope, receive, send)
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.Event().wait()   # 클라이언트는 끊지 않음 (StreamingResponse가 disconnect를 기다림)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    # 청크가 minimum_size보다 작아도 스트리밍 응답은 압축
+    asyncio.run(CompressionMiddleware(app, minimum_size=1 << 20)(scope, receive, send))
+
+    assert dict(sent[0]["headers"])[b"content-encoding"] == b"gzip"
+    bodies = [m for m in sent[1:] if m["body"]]
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert len(bodies) >= len(CHUNKS)
+    # 각 청크는 flush되어 다음 청크 없이도 바로 풀림
+    for message, chunk in zip(bodies, CHUNKS):
+        assert decoder.decompress(message["body"]) == chunk
+    assert sent[-1]["more_body"] is False
+    assert decoder.decompress(b"".join(m["body"] for m in bodies[len(CHUNKS):])) + decoder.flush() == b""
@@ -0,0 +1,109 @@
+"""
+Snapshot answers must equal the SQL path (services.emissions / rollups). The
+expected values below are what those queries return for the same rows.
+"""
+
+import json
+import time
+
+import pytest
+
+from apps.backend.services.emissions import encode_cursor
+from apps.backend.services.snapshot import _build
+
+TYPES = {"name": "text", "iso_code": "text", "year": "integer", "co2_mt": "double precision",
+         "population": "bigint"}
+METRICS = ["co2_mt", "population"]
+# DB가 ORDER BY name, year 로 돌려주는 순서 그대로
+ROWS = [
+    ("A", "AAA", 2000, 10.0, 100),
+    ("A", "AAA", 2001, None, 110),
+    ("B", None, 2000, 10.0, None),    # A와 동률
+    ("B", None, 2000, 99.0, None),    # append 모드의 중복 (name, year)
+    ("C", "CCC", 2000, None, 5),      # co2 NULL -> 순위 마지막
+    ("C", "CCC", 2001, 7.5, 6),
+    ("D", "DDD", 2000, 5.0, 1),
+]
+
+
+@pytest.fixture
+def snap():
+    return _build("v1", TYPES, METRICS, [ROWS[:3], ROWS[3:]], time.perf_counter())
+
+
+def as_json(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+def test_page_with_cursor(snap):
+    first = snap.page(limit=3)
+    assert first["metrics"] == METRICS
+    assert as_json(first["items"]) == [
+        {"name": "A", "iso_code": "AAA", "year": 2000, "co2_mt": 10.0, "population": 100},
+        {"name": "A", "iso_code": "AAA", "year": 2001, "co2_mt": None, "population": 110},
+        {"name": "B", "iso_code": None, "year": 2000, "co2_mt": 10.0, "population": None},
+    ]
+    assert first["next_cursor"] == encode_cursor("B", 2000)
+
+    # (name, year) > ('B', 2000): 중복 행도 커서 뒤로 넘어감 (SQL keyset과 동일)
+    second = snap.page(limit=3, cursor=first["next_cursor"])
+    assert [(r["name"], r["year"]) for r in second["items"]] == [("C", 2000), ("C", 2001), ("D", 2000)]
+    assert second["next_cursor"] is None
+
+
+def test_unknown_cursor_names_go_to_the_database(snap):
+    assert snap.serves_cursor(None)
+    assert snap.serves_cursor(encode_cursor("C", 1990))
+    # 스냅샷에 없는 이름은 DB collation으로만 위치를 알 수 있음 -> SQL 경로
+    assert not snap.serves_cursor(encode_cursor("Bz", 2000))
+    assert not snap.serves_cursor("not-a-cursor")
+
+
+def test_page_filters_and_unknown_metric(snap):
+    result = snap.page(names=["C,D"], year_from=2001, metrics=["co2_mt"], limit=10)
+    assert as_json(result["items"]) == [{"name": "C", "iso_code": "CCC", "year": 2001, "co2_mt": 7.5}]
+    with pytest.raises(ValueError, match="Unknown metric"):
+        snap.page(metrics=["nope"])
+
+
+def test_frame_wide(snap):
+    result = snap.frame(names=["Z", "C", "A", "Y"], year_to=2001)
+    assert result["columns"] == ["name", "iso_code", "year", "co2_mt", "population"]
+    assert as_json(result["data"]) == [
+        ["A", "AAA", 2000, 10.0, 100],
+        ["A", "AAA", 2001, None, 110],
+        ["C", "CCC", 2000, None, 5],
+        ["C", "CCC", 2001, 7.5, 6],
+    ]
+    assert result["missing"] == ["Y", "Z"]   # 정렬: 캐시 키가 country 순서를 무시하므로
+
+
+def test_frame_long_skips_nulls(snap):
+    result = snap.frame(names=["A", "C"], shape="long")
+    assert result["columns"] == ["name", "iso_code", "year", "metric", "value"]
+    # build_long_query: ORDER BY name, year, metric 순서, value는 float8, NULL 제외
+    assert as_json(result["data"]) == [
+        ["A", "AAA", 2000, "co2_mt", 10.0],
+        ["A", "AAA", 2000, "population", 100.0],
+        ["A", "AAA", 2001, "population", 110.0],
+        ["C", "CCC", 2000, "population", 5.0],
+        ["C", "CCC", 2001, "co2_mt", 7.5],
+        ["C", "CCC", 2001, "population", 6.0],
+    ]
+    with pytest.raises(ValueError, match="At least one country"):
+        snap.frame(names=[])
+
+
+def test_top_ties_nulls_and_duplicates(snap):
+    # rank_year: DISTINCT ON (name, year), rank() OVER (ORDER BY co2_mt DESC NULLS LAST); ORDER BY rank, name
+    assert as_json(snap.top(year=2000, limit=1)) == [
+        {"name": "A", "iso_code": "AAA", "year": 2000, "co2_mt": 10.0, "rank": 1},
+        {"name": "B", "iso_code": None, "year": 2000, "co2_mt": 10.0, "rank": 1},
+    ]
+    assert [(r["name"], r["rank"]) for r in snap.top(year=2000, limit=3)] == [("A", 1), ("B", 1), ("D", 3)]
+    assert as_json(snap.top(year=2000, limit=10))[-1] == \
+        {"name": "C", "iso_code": "CCC", "year": 2000, "co2_mt": None, "rank": 4}
+
+
+def test_top_defaults_to_latest_year(snap):
+    assert [(r["name"], r["year"], r["rank"]) for r in snap.top()] == [("C", 2001, 1), ("A", 2001, 2)]
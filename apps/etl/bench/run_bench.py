@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+ETL benchmark: load synthetic CSVs with each csv_to_pg mode against a local Postgres.
+- For every --rows size a CSV is generated once (bench.synth_csv, cached in --workdir).
+- For every --modes entry the table is recreated (create_table_from_csv) and the
+  loader runs as its own process (python -m csv_to_pg.load_csv_to_db), so import
+  cost and peak RSS are measured like a real ETL run. Modes:
+    copy | to_sql | stream | upsert | upsert-rerun | swap | parallel:N
+  (upsert-rerun = a second --force upsert over an identical table: the
+   hash comparison path where nothing changes)
+- Per run: wall time, rows/s, peak RSS and phase timings, read from the
+  loader's own metrics export (CSV_METRICS_DIR, see csv_to_pg/metrics.py).
+- Results are appended as JSON lines (--out or CSV_BENCH_OUT) with the git
+  commit, so runs on different commits can be compared; a table is printed too.
+
+DB connection: DATABASE_URL / DB_* like the ETL itself.
+Usage (from apps/etl):
+  python -m bench.run_bench --rows 60000,600000 --modes copy,stream,upsert,parallel:4 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+
+from csv_to_pg.load_csv_to_db import build_engine
+from csv_to_pg.swap_load import old_name
+
+from .synth_csv import generate
+
+ETL_DIR = Path(__file__).resolve().parents[1]
+
+# mode -> load_csv_to_db arguments (parallel:N is handled in load_args)
+MODES: Dict[str, List[str]] = {
+    "copy": ["--method", "copy"],
+    "to_sql": ["--method", "to_sql"],
+    "stream": ["--method", "copy", "--stream"],
+    "upsert": ["--mode", "upsert", "--force"],
+    "upsert-rerun": ["--mode", "upsert", "--force"],
+    "swap": ["--mode", "swap", "--force"],
+}
+
+# .env 값이 섞이지 않도록 벤치마크가 정하는 값은 모두 명시
+BASE_ENV = {"CSV_STREAM": "0", "CSV_WORKERS": "1", "CSV_LOAD_MODE": "append", "CSV_LOAD_METHOD": "copy",
+            "CSV_FORCE_LOAD": "0", "CSV_RECREATE": "1", "CSV_METRICS_PUSH_URL": "", "CSV_SWAP_KEEP_HOURS": "0"}
+
+
+def load_args(mode: str) -> List[str]:
+    if mode.startswith("parallel:"):
+        return ["--method", "copy", "--workers", mode.split(":", 1)[1]]
+    if mode not in MODES:
+        raise SystemExit(f"[ERROR] Unknown mode: {mode} (choose from {', '.join(MODES)}, parallel:N)")
+    return MODES[mode]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ETL_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_prom(path: Path) -> Dict:
+    """Parse the loader's .prom export into {metric: value} and {phase: wall seconds}."""
+    gauges: Dict[str, float] = {}
+    phases: Dict[str, float] = {}
+    if not path.exists():
+        return {"gauges": gauges, "phases": phases}
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line or line.startswith("#"):
+            continue
+        series, value = line.rsplit(" ", 1)
+        name = series.split("{", 1)[0]
+        if name == "etl_phase_wall_seconds":
+            phases[series.split('phase="', 1)[1].split('"', 1)[0]] = round(float(value), 4)
+        elif 'column="' not in series:
+            gauges[name] = float(value)
+    return {"gauges": gauges, "phases": phases}
+
+
+def run_step(module: str, args: List[str], env: Dict[str, str], log: Path) -> float:
+    t0 = time.perf_counter()
+    with log.open("a", encoding="utf-8") as out:
+        proc = subprocess.run([sys.executable, "-m", module, *args], cwd=ETL_DIR, env=env,
+                              stdout=out, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        raise SystemExit(f"[ERROR] {module} {' '.join(args)} failed (exit {proc.returncode}); see {log}")
+    return time.perf_counter() - t0
+
+
+def bench_one(csv_path: Path, rows: int, mode: str, table: str, workdir: Path) -> Dict:
+    metrics_dir = Path(tempfile.mkdtemp(prefix="prom_", dir=workdir))
+    env = {**os.environ, **BASE_ENV, "CSV_PATH": str(csv_path), "CSV_TABLE": table,
+           "CSV_SCHEMA_MANIFEST": str(workdir / f"{table}.schema.json"), "CSV_METRICS_DIR": str(metrics_dir)}
+    log = workdir / f"{table}.log"
+    log.write_text("", encoding="utf-8")
+    run_step("csv_to_pg.create_table_from_csv", [], env, log)
+    if mode == "upsert-rerun":
+        run_step("csv_to_pg.load_csv_to_db", load_args("upsert"), env, log)
+    wall = run_step("csv_to_pg.load_csv_to_db", load_args(mode), env, log)
+
+    prom = read_prom(metrics_dir / f"csv_to_pg_load_{table}.prom")
+    g = prom["gauges"]
+    return {
+        "rows": rows,
+        "bytes": csv_path.stat().st_size,
+        "mode": mode,
+        "wall_seconds": round(wall, 3),
+        "load_seconds": round(g.get("etl_duration_seconds", wall), 3),
+        "rows_per_second": round(rows / wall, 1) if wall > 0 else None,
+        "peak_rss_mib": round(g.get("etl_peak_rss_bytes", 0) / 1024 ** 2, 1),
+        "rejected_values": int(g.get("etl_rejected_values_total", 0)),
+        "phases": prom["phases"],
+    }
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    """Median over repeats (first run kept separately as the cold number)."""
+    def med(key: str) -> float:
+        return round(statistics.median(r[key] for r in runs), 3)
+
+    out = dict(runs[-1])
+    out.update({"repeat": len(runs), "wall_seconds": med("wall_seconds"), "load_seconds": med("load_seconds"),
+                "rows_per_second": med("rows_per_second"),
+                "peak_rss_mib": max(r["peak_rss_mib"] for r in runs),
+                "cold_wall_seconds": runs[0]["wall_seconds"]})
+    return out
+
+
+def drop_tables(table: str) -> None:
+    with build_engine().begin() as conn:
+        for t in (table, old_name(table)):
+            conn.execute(text(f'DROP TABLE IF EXISTS "{t}" CASCADE'))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark csv_to_pg load modes on synthetic data.")
+    ap.add_argument("--rows", default="60000,600000", help="Comma-separated row counts")
+    ap.add_argument("--modes", default="copy,to_sql,stream,upsert,upsert-rerun,swap,parallel:4",
+                    help="Comma-separated modes: " + ", ".join(MODES) + ", parallel:N")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per (rows, mode); the median is reported")
+    ap.add_argument("--workdir", default=os.getenv("CSV_BENCH_DIR") or str(Path(tempfile.gettempdir()) / "csv_bench"),
+                    help="Generated CSVs, logs and manifests (or set CSV_BENCH_DIR)")
+    ap.add_argument("--out", default=os.getenv("CSV_BENCH_OUT") or "bench_results.jsonl",
+                    help="JSON lines file results are appended to (or set CSV_BENCH_OUT)")
+    ap.add_argument("--table", default="bench_load", help="Scratch table (dropped afterwards)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--keep-table", action="store_true", help="Do not drop the scratch table at the end")
+    args = ap.parse_args()
+
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    sizes = [int(r) for r in args.rows.split(",") if r.strip()]
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for m in modes:
+        load_args(m)
+    meta = {"commit": git_commit(), "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0]}
+
+    results = []
+    try:
+        for rows in sizes:
+            csv_path = workdir / f"synth_{rows}_{args.seed}.csv"
+            if not csv_path.exists():
+                t0 = time.perf_counter()
+                generate(csv_path, rows, seed=args.seed)
+                print(f"[INFO] generated {csv_path} in {time.perf_counter() - t0:.1f}s")
+            for mode in modes:
+                runs = [bench_one(csv_path, rows, mode, args.table, workdir) for _ in range(max(args.repeat, 1))]
+                res = {**meta, **summarize(runs)}
+                results.append(res)
+                with open(args.out, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(res, ensure_ascii=False) + "\n")
+                print(f"[OK] rows={rows:,} mode={mode:<13} wall={res['wall_seconds']:>7.2f}s "
+                      f"{res['rows_per_second']:>12,.0f} rows/s  peak={res['peak_rss_mib']:>8,.1f}MiB")
+    finally:
+        if not args.keep_table:
+            drop_tables(args.table)
+
+    print(f"\n{'rows':>10} {'mode':<13} {'wall s':>8} {'rows/s':>12} {'peak MiB':>9}  phases (s)")
+    for r in results:
+        phases = " ".join(f"{k}={v:.2f}" for k, v in r["phases"].items())
+        print(f"{r['rows']:>10,} {r['mode']:<13} {r['wall_seconds']:>8.2f} {r['rows_per_second']:>12,.0f} "
+              f"{r['peak_rss_mib']:>9,.1f}  {phases}")
+    print(f"[OK] {len(results)} results appended to {args.out} (commit {meta['commit']})")
+
+
+if __name__ == "__main__":
+    main()
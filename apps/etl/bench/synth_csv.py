@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic emissions CSV with the same header shape as Data_fixed.csv, at any size.
+- Rows = entities x years (1750..2023 by default), so (name, year) stays unique
+  and upsert / swap modes can be benchmarked too. Every --aggregate-every'th
+  entity is a regional aggregate with an empty ISO code, like OWID's "World".
+- Dirty values, as in the real file (rates are per cell):
+  - Population always with thousands separators ("35,693,305", quoted)
+  - --blank-rate   : empty measure cells                          (default 0.10)
+  - --dirty-rate   : "1,234.5" / " 12.5 " (valid after cleanup), "n/a" (rejected),
+                     and non-numeric years ("n/a", "19x5", "")     (default 0.005)
+- Written in --chunk-rows blocks, so memory stays flat for 100-1000x files.
+- Deterministic for a given --seed.
+
+Usage: python -m bench.synth_csv --rows 1000000 --out /tmp/synth_1m.csv
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import numpy as np
+
+HEADER = [
+    "Description", "Name", "ISO Code", "Year", "Population", "GDP", "CO2 (Mt)",
+    "CO2 including LUC (Mt)", "Cumulative CO2 (Mt)", "Total GHG 100y", "Coal CO2 (Mt)",
+    "Oil CO2 (Mt)", "Gas CO2 (Mt)", "Cement CO2 (Mt)", "Flaring CO2 (Mt)", "Methane 100y (t)",
+    "Nitrous oxide 100y (t)", "GHG per capita 100y", "Land use change CO2 (Mt)",
+    "Cumulative LUC CO2 (Mt)", "CO2 per capita (t)", "CO2 per unit energy (kW/kWh)",
+    "Energy per GDP (kWh)", "CO2 per GDP (kg)",
+]
+MEASURES = HEADER[6:]
+BAD_YEARS = np.array(["n/a", "19x5", ""], dtype=object)
+POOL_SIZE = 1 << 16   # 셀마다 포맷하지 않고 미리 포맷(+CSV quoting)한 문자열 풀에서 고름
+
+
+def iso_code(i: int) -> str:
+    """0 -> 'AAA', 1 -> 'AAB', ... (3 letters, then a numeric suffix past 26^3)"""
+    letters = "".join(chr(65 + (i // 26 ** k) % 26) for k in (2, 1, 0))
+    return letters if i < 26 ** 3 else f"{letters}{i // 26 ** 3}"
+
+
+def entity_names(n: int, aggregate_every: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(names, iso codes) as object arrays, indexed by entity number."""
+    names = np.empty(n, dtype=object)
+    isos = np.empty(n, dtype=object)
+    for i in range(n):
+        if aggregate_every and i % aggregate_every == aggregate_every - 1:
+            names[i], isos[i] = f"Aggregate {i:06d}", ""
+        else:
+            names[i], isos[i] = f"Region {i:06d}", iso_code(i)
+    return names, isos
+
+
+def value_pools(rng: np.random.Generator) -> dict:
+    """Pre-formatted cell values: clean measures, dirty measures, populations, GDPs."""
+    vals = np.round(rng.uniform(0, 500, POOL_SIZE), 3)
+    dirty = [f'"{v * 1000:,.1f}"' for v in vals[: POOL_SIZE // 3]]        # 천 단위 구분자 (유효)
+    dirty += [f" {v} " for v in vals[: POOL_SIZE // 3]]                  # 앞뒤 공백 (유효)
+    dirty += ["n/a"] * (POOL_SIZE // 3)                                  # 숫자 아님 (rejected)
+    return {
+        "measure": np.array([repr(float(v)) for v in vals], dtype=object),
+        "dirty": np.array(dirty, dtype=object),
+        "population": np.array([f'"{v:,}"' for v in rng.integers(10_000, 1_500_000_000, POOL_SIZE)], dtype=object),
+        "gdp": np.array([str(v) for v in rng.integers(10 ** 9, 10 ** 12, POOL_SIZE)], dtype=object),
+    }
+
+
+def _cells(rng: np.random.Generator, pool: np.ndarray, n: int) -> np.ndarray:
+    return pool[rng.integers(0, len(pool), n)]
+
+
+def make_chunk(rng: np.random.Generator, pools: dict, start: int, n: int,
+               entities: Tuple[np.ndarray, np.ndarray], years: np.ndarray,
+               blank_rate: float, dirty_rate: float) -> List[np.ndarray]:
+    """One block of rows as a list of columns of ready-to-write CSV cells."""
+    idx = np.arange(start, start + n)
+    ent = idx // len(years)
+    names, isos = entities[0][ent], entities[1][ent]
+
+    year = years[idx % len(years)].astype(str).astype(object)
+    bad = rng.random(n) < dirty_rate
+    year[bad] = rng.choice(BAD_YEARS, int(bad.sum()))
+
+    pop = _cells(rng, pools["population"], n)
+    gdp = _cells(rng, pools["gdp"], n)
+    pop[rng.random(n) < blank_rate / 10] = ""
+    gdp[rng.random(n) < blank_rate / 10] = ""
+
+    cols = [np.full(n, "", dtype=object), names, isos, year, pop, gdp]
+    for _ in MEASURES:
+        cells = _cells(rng, pools["measure"], n)
+        cells[rng.random(n) < blank_rate] = ""
+        dirty = rng.random(n) < dirty_rate
+        cells[dirty] = _cells(rng, pools["dirty"], int(dirty.sum()))
+        cols.append(cells)
+    return cols
+
+
+def generate(out: Path, rows: int, *, seed: int = 42, first_year: int = 1750, last_year: int = 2023,
+             blank_rate: float = 0.10, dirty_rate: float = 0.005, aggregate_every: int = 50,
+             chunk_rows: int = 200_000) -> int:
+    """Write `rows` data rows to `out`; returns the file size in bytes."""
+    rng = np.random.default_rng(seed)
+    pools = value_pools(rng)
+    years = np.arange(first_year, last_year + 1)
+    entities = entity_names(math.ceil(rows / len(years)), aggregate_every)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_suffix(out.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8", newline="") as f:
+        f.write(",".join(f'"{h}"' if "," in h else h for h in HEADER) + "\n")
+        for start in range(0, rows, chunk_rows):
+            n = min(chunk_rows, rows - start)
+            cols = make_chunk(rng, pools, start, n, entities, years, blank_rate, dirty_rate)
+            f.write("\n".join(map(",".join, zip(*cols))) + "\n")
+    tmp.replace(out)
+    return out.stat().st_size
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic Data_fixed.csv-shaped CSV.")
+    ap.add_argument("--rows", type=int, required=True, help="Data rows to write")
+    ap.add_argument("--out", required=True, help="Output CSV path")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--first-year", type=int, default=1750)
+    ap.add_argument("--last-year", type=int, default=2023)
+    ap.add_argument("--blank-rate", type=float, default=0.10, help="Share of empty measure cells")
+    ap.add_argument("--dirty-rate", type=float, default=0.005, help="Share of malformed cells / years")
+    ap.add_argument("--aggregate-every", type=int, default=50, help="Every Nth entity has no ISO code (0 = none)")
+    ap.add_argument("--chunk-rows", type=int, default=200_000, help="Rows generated per block")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    size = generate(Path(args.out), args.rows, seed=args.seed, first_year=args.first_year,
+                    last_year=args.last_year, blank_rate=args.blank_rate, dirty_rate=args.dirty_rate,
+                    aggregate_every=args.aggregate_every, chunk_rows=args.chunk_rows)
+    print(f"[OK] Wrote {args.rows:,} rows ({size / 1024 ** 2:,.1f}MiB) to {args.out} "
+          f"in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
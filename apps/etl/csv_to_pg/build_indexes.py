@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Post-load index + statistics builder (run after load_csv_to_db).
+- Indexes come from a declarative spec (DEFAULT_INDEX_SPEC or a JSON file via
+  --spec / CSV_INDEX_SPEC). Each entry:
+    {"name": "{table}_name_year_idx",      # {table} is substituted
+     "columns": ["name", "year"],          # or "expr": "((year::int))"
+     "where": "year IS NOT NULL",          # optional partial-index predicate
+     "when_type": {"year": ["TEXT"]},      # optional: only if column has one of these types
+     "unique": false}
+  Entries whose columns are missing (or whose when_type does not match) are skipped,
+  so the same spec works for legacy TEXT-year tables and typed (SMALLINT) ones.
+- Indexes are created after the bulk load (CREATE INDEX IF NOT EXISTS), then ANALYZE.
+- The frontend's standard queries are EXPLAIN ANALYZE'd before and after, and the
+  timings / top plan nodes are printed and written to a JSON report
+  (--report or CSV_INDEX_REPORT, default: $TMPDIR/<table>.index_report.json).
+- index / analyze / explain phase timings are exported like the loader's
+  (CSV_METRICS_DIR / CSV_METRICS_PUSH_URL, see metrics.py).
+
+Usage: python -m csv_to_pg.build_indexes [--table data] [--no-explain]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .load_csv_to_db import build_engine
+from .metrics import METRICS
+
+INT_TYPES = ("SMALLINT", "INTEGER", "BIGINT")
+
+DEFAULT_INDEX_SPEC: List[Dict] = [
+    # dashboard/policyview: name = :nm AND year BETWEEN ... ORDER BY year
+    {"name": "{table}_name_year_idx", "columns": ["name", "year"]},
+    # top emitters of one year: WHERE year = :y ORDER BY co2_mt DESC NULLS LAST LIMIT 20
+    {"name": "{table}_year_co2_idx", "columns": ["year", "co2_mt DESC NULLS LAST"],
+     "when_type": {"year": list(INT_TYPES)}},
+    # typed year: partial index on valid years (range scans / DISTINCT year)
+    {"name": "{table}_year_valid_idx", "columns": ["year"], "where": "year IS NOT NULL",
+     "when_type": {"year": list(INT_TYPES)}},
+    # legacy TEXT year: numeric-year expression index, partial on 4-digit values
+    {"name": "{table}_year_num_idx", "expr": "((year::int))", "where": "year ~ '^\\d{4}$'",
+     "when_type": {"year": ["TEXT"]}},
+]
+
+
+# ---------- spec ----------
+def load_spec(path: Optional[str]) -> List[Dict]:
+    if not path:
+        return DEFAULT_INDEX_SPEC
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def table_types(conn: Connection, table: str) -> Dict[str, str]:
+    rows = conn.execute(text('''
+        SELECT a.attname, upper(format_type(a.atttypid, a.atttypmod))
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(:t) AND a.attnum > 0 AND NOT a.attisdropped
+    '''), {"t": f'"{table}"'}).all()
+    return {name: t for name, t in rows}
+
+
+def _quote_key(col: str) -> str:
+    """'co2_mt DESC NULLS LAST' -> '"co2_mt" DESC NULLS LAST'"""
+    name, _, rest = col.strip().partition(" ")
+    return f'"{name}" {rest}'.strip()
+
+
+def index_ddl(entry: Dict, table: str, types: Dict[str, str]) -> Optional[str]:
+    """CREATE INDEX statement for one spec entry, or None if it does not apply to `table`."""
+    for col, allowed in (entry.get("when_type") or {}).items():
+        if types.get(col) not in [t.upper() for t in allowed]:
+            return None
+    cols = entry.get("columns") or []
+    if any(c.split()[0] not in types for c in cols):
+        return None
+    keys = entry["expr"] if entry.get("expr") else ", ".join(_quote_key(c) for c in cols)
+    name = entry["name"].format(table=table)[:63]
+    unique = "UNIQUE " if entry.get("unique") else ""
+    where = f" WHERE {entry['where']}" if entry.get("where") else ""
+    return f'CREATE {unique}INDEX IF NOT EXISTS "{name}" ON "{table}" ({keys}){where}'
+
+
+def existing_index_keys(conn: Connection, table: str) -> Dict[str, str]:
+    """{key list: index name} of non-partial indexes, e.g. {'name, year': 'data_natural_key_uq'}"""
+    rows = conn.execute(text('''
+        SELECT indexname, indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = :t
+    '''), {"t": table}).all()
+    out = {}
+    for name, ddl in rows:
+        if " WHERE " in ddl:
+            continue
+        out[ddl[ddl.index("(") + 1: ddl.rindex(")")].replace('"', "")] = name
+    return out
+
+
+def build_indexes(conn: Connection, table: str, spec: List[Dict]) -> List[Dict]:
+    types = table_types(conn, table)
+    if not types:
+        raise SystemExit(f"[ERROR] Table not found: {table}")
+    existing = existing_index_keys(conn, table)
+    done = []
+    for entry in spec:
+        ddl = index_ddl(entry, table, types)
+        name = entry["name"].format(table=table)[:63]
+        if ddl is None:
+            print(f"[SKIP] {name} (not applicable to this schema)")
+            continue
+        same = existing.get(", ".join(entry.get("columns") or []))
+        if same and same != name and not entry.get("where") and not entry.get("expr"):
+            # 예: upsert 모드의 (name, year) unique index가 같은 키를 이미 커버
+            print(f"[SKIP] {name} (covered by {same})")
+            continue
+        t0 = time.perf_counter()
+        conn.execute(text(ddl))
+        done.append({"name": name, "ddl": ddl, "seconds": round(time.perf_counter() - t0, 4)})
+        print(f"[OK] {name} ({done[-1]['seconds']:.2f}s)")
+    return done
+
+
+# ---------- frontend standard queries ----------
+def standard_queries(conn: Connection, table: str, types: Dict[str, str]) -> Dict[str, tuple]:
+    """The queries pgs/dashboard.py and pgs/policyview.py issue, with representative params."""
+    typed = types.get("year") in INT_TYPES
+    year = "year" if typed else "year::int"
+    valid = "year IS NOT NULL" if typed else "year ~ '^\\d{4}$'"
+    probe = conn.execute(text(f'''
+        SELECT name, max({year}) AS y FROM "{table}"
+        WHERE name IS NOT NULL AND {valid}
+        GROUP BY name ORDER BY count(*) DESC LIMIT 1
+    ''')).first()
+    nm, ly = (probe.name, int(probe.y)) if probe else ("South Korea", 2020)
+    return {
+        "stats": (f'SELECT COUNT(*), MIN(year), MAX(year), COUNT(DISTINCT name) FROM "{table}"', {}),
+        "countries": (f'SELECT DISTINCT name FROM "{table}" WHERE name IS NOT NULL ORDER BY name', {}),
+        "years": (f'SELECT DISTINCT year FROM "{table}" WHERE year IS NOT NULL', {}),
+        "series_country": (
+            f'SELECT name, {year} AS year, co2_mt FROM "{table}" '
+            f'WHERE name = :nm AND {valid} AND {year} BETWEEN :y1 AND :y2 ORDER BY year',
+            {"nm": nm, "y1": ly - 50, "y2": ly},
+        ),
+        "top_emitters": (
+            f'SELECT name, {year} AS year, co2_mt FROM "{table}" '
+            f'WHERE {valid} AND {year} = :ly ORDER BY co2_mt DESC NULLS LAST LIMIT 20',
+            {"ly": ly},
+        ),
+    }
+
+
+def _plan_nodes(plan: Dict) -> List[str]:
+    out = [plan.get("Node Type", "?") + (f" on {plan['Index Name']}" if plan.get("Index Name") else "")]
+    for child in plan.get("Plans", []):
+        out += _plan_nodes(child)
+    return out
+
+
+def explain_queries(conn: Connection, queries: Dict[str, tuple]) -> Dict[str, Dict]:
+    out = {}
+    for name, (sql, params) in queries.items():
+        try:
+            with conn.begin_nested():
+                doc = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+        except Exception as e:  # 컬럼 없음 등: 보고서에만 남김
+            out[name] = {"error": str(e).splitlines()[0]}
+            continue
+        top = doc[0]
+        out[name] = {
+            "execution_ms": round(top["Execution Time"], 3),
+            "planning_ms": round(top["Planning Time"], 3),
+            "nodes": [n for n in _plan_nodes(top["Plan"]) if "Scan" in n],
+        }
+    return out
+
+
+def print_comparison(before: Dict[str, Dict], after: Dict[str, Dict]) -> None:
+    print(f"{'query':<16} {'before ms':>10} {'after ms':>10}  plan (after)")
+    for name, a in after.items():
+        b = before.get(name, {})
+        print(f"{name:<16} {b.get('execution_ms', float('nan')):>10.2f} {a.get('execution_ms', float('nan')):>10.2f}  "
+              f"{', '.join(a.get('nodes', [])) or a.get('error', '')}")
+
+
+def run(engine: Engine, table: str, spec: List[Dict], explain: bool = True) -> Dict:
+    report: Dict = {"table": table}
+    with engine.begin() as conn:
+        types = table_types(conn, table)
+        queries = standard_queries(conn, table, types) if explain and types else {}
+        if queries:
+            with METRICS.phase("explain"):
+                report["before"] = explain_queries(conn, queries)
+
+    t0 = time.perf_counter()
+    with METRICS.phase("index"), engine.begin() as conn:
+        report["indexes"] = build_indexes(conn, table, spec)
+    with METRICS.phase("analyze"), engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'ANALYZE "{table}"'))
+    report["build_seconds"] = round(time.perf_counter() - t0, 4)
+
+    if queries:
+        with METRICS.phase("explain"), engine.begin() as conn:
+            report["after"] = explain_queries(conn, queries)
+        print_comparison(report["before"], report["after"])
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build post-load indexes, ANALYZE and record EXPLAIN timings.")
+    ap.add_argument("--table", default=os.getenv("CSV_TABLE") or "data", help="Target table (or set CSV_TABLE)")
+    ap.add_argument("--spec", default=os.getenv("CSV_INDEX_SPEC"), help="JSON index spec (or set CSV_INDEX_SPEC)")
+    ap.add_argument("--report", default=os.getenv("CSV_INDEX_REPORT"), help="JSON report path (or set CSV_INDEX_REPORT)")
+    ap.add_argument("--no-explain", action="store_true", help="Skip before/after EXPLAIN ANALYZE")
+    args = ap.parse_args()
+
+    METRICS.begin("index", args.table)
+    report = run(build_engine(), args.table, load_spec(args.spec), explain=not args.no_explain)
+    METRICS.finish(indexes_built=len(report["indexes"]))
+    METRICS.export()
+
+    path = Path(args.report or Path(tempfile.gettempdir()) / f"{args.table}.index_report.json")
+    path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"[OK] Indexed + analyzed {args.table} in {report['build_seconds']:.2f}s; report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,24 @@
 # -*- coding: utf-8 -*-
 """
 Create a PostgreSQL table from a CSV header (row-1 -> columns).
-- Column types:
-  - description, name, iso_code, year  -> TEXT   (⚠ year도 TEXT)
-  - population, gdp                    -> BIGINT
-  - others                             -> NUMERIC
+- Column types are inferred from a sample of the CSV (schema_infer.py), e.g.
+  name/iso_code -> TEXT, year -> SMALLINT, population/gdp -> INTEGER/BIGINT,
+  measures -> DOUBLE PRECISION (or NUMERIC when > 15 significant digits).
+  Pin a type with --types "col=TYPE,..." (or CSV_TYPE_OVERRIDES).
+- The inferred schema is written to a JSON manifest (--manifest or
+  CSV_SCHEMA_MANIFEST, default: $TMPDIR/<table>.schema.json) that
+  load_csv_to_db reads for its coercions.
 - Identifiers are sanitized to safe snake_case, deduped with _2, _3...
 - Supports .env / environment variables.
 - Optional: drop & recreate table via --recreate or CSV_RECREATE=1
+  (also clears the stored source checksum so the next upsert reloads)
+- An existing table whose column types differ from the manifest (e.g. a
+  TEXT year from before type inference) is migrated in place with
+  ALTER COLUMN ... TYPE ... USING, coercing values like the loader does
+  (unparsable / out-of-range -> NULL); the rollups are dropped first and
+  rebuilt by the next rollups run.
+- Phase timings (read / sanitize / infer / ddl) are exported like the loader's
+  (CSV_METRICS_DIR / CSV_METRICS_PUSH_URL, see metrics.py).
 
 Requires: SQLAlchemy>=2.0, psycopg[binary]>=3.2, python-dotenv>=1.0 (optional)
 """
@@ -17,10 +28,24 @@ import os
 import re
 import sys
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 from sqlalchemy import text, create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
+
+from .load_state import forget_checksum
+from .metrics import METRICS
+from .rollups import rollup_names
+from .schema_infer import (
+    FLOAT_RE,
+    INT_LIMITS,
+    INT_TYPES,
+    column_types,
+    default_manifest_path,
+    infer_schema,
+    parse_overrides,
+    write_manifest,
+)
 
 try:
     from dotenv import load_dotenv  # optional
@@ -77,34 +102,68 @@ def infer_table_name(csv_path: Path) -> str:
     return sanitize_identifier(csv_path.stem, used, prefix="t_")
 
 
-# ---------- type mapping ----------
-TYPE_OVERRIDES = {
-    "description": "TEXT",
-    "name": "TEXT",
-    "iso_code": "TEXT",
-    "year": "TEXT",        # ← 요청대로 연도는 TEXT로 저장
-    "population": "BIGINT",
-    "gdp": "BIGINT",
-}
-DEFAULT_TYPE = "NUMERIC"   # 나머지 컬럼
+def sanitize_columns(raw_cols: List[str]) -> List[str]:
+    used = set()
+    return [sanitize_identifier(c, used) for c in raw_cols]
 
 
-def choose_type(col: str) -> str:
-    return TYPE_OVERRIDES.get(col, DEFAULT_TYPE)
+# ---------- type mapping (from the schema manifest) ----------
+DEFAULT_TYPE = "TEXT"   # manifest에 없는 컬럼
 
 
-def build_create_table_sql(table: str, raw_cols: List[str], add_id: bool = True) -> Tuple[str, List[str]]:
-    used = set()
-    cols = [sanitize_identifier(c, used) for c in raw_cols]
+def choose_type(col: str, types: Dict[str, str]) -> str:
+    return types.get(col, DEFAULT_TYPE)
+
+
+def build_create_table_sql(table: str, raw_cols: List[str], types: Dict[str, str],
+                           add_id: bool = True) -> Tuple[str, List[str]]:
+    cols = sanitize_columns(raw_cols)
     parts = []
     if add_id:
         parts.append('id BIGSERIAL PRIMARY KEY')
     # 각 컬럼에 타입 적용
-    parts += [f'"{c}" {choose_type(c)}' for c in cols]
+    parts += [f'"{c}" {choose_type(c, types)}' for c in cols]
     ddl = f'CREATE TABLE IF NOT EXISTS "{table}" (\n  ' + ",\n  ".join(parts) + "\n);"
     return ddl, cols
 
 
+def existing_types(conn: Connection, table: str) -> Dict[str, str]:
+    rows = conn.execute(text('''
+        SELECT a.attname, upper(format_type(a.atttypid, a.atttypmod))
+        FROM pg_attribute a
+        WHERE a.attrelid = to_regclass(:t) AND a.attnum > 0 AND NOT a.attisdropped
+    '''), {"t": f'"{table}"'}).all()
+    return {name: t for name, t in rows}
+
+
+# ---------- type drift ----------
+def migrate_expr(col: str, target: str) -> str:
+    """USING expression converting `col` to `target` with the loader's coercion rules."""
+    # load_csv_to_db.coerce_frame와 같은 기준: trim, 천단위 ',' 제거, 빈 값/형식 오류 -> NULL
+    v = f"""replace(btrim("{col}"::text), ',', '')"""
+    if target in INT_TYPES:
+        return (f"CASE WHEN {v} ~ '^{FLOAT_RE}$' AND {v}::numeric % 1 = 0 "
+                f"AND abs({v}::numeric) <= {INT_LIMITS[target]} THEN {v}::numeric::{target} END")
+    if target in ("DOUBLE PRECISION", "REAL", "NUMERIC"):
+        return f"CASE WHEN {v} ~ '^{FLOAT_RE}$' THEN {v}::{target} END"
+    if target == "TEXT":
+        return f"""NULLIF(btrim("{col}"::text), '')"""
+    return f'"{col}"::{target}'
+
+
+def migrate_types(conn: Connection, table: str, current: Dict[str, str], wanted: Dict[str, str]) -> List[str]:
+    """ALTER the columns whose type differs from `wanted`; returns "col: OLD -> NEW" per migrated column."""
+    drift = {c: t for c, t in wanted.items() if c in current and current[c] != t}
+    if not drift:
+        return []
+    # rollup materialized view가 컬럼에 의존 -> 먼저 DROP (다음 rollups 실행에서 재생성)
+    for view in rollup_names(table).values():
+        conn.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{view}"'))
+    alters = [f'ALTER COLUMN "{c}" TYPE {t} USING {migrate_expr(c, t)}' for c, t in drift.items()]
+    conn.execute(text(f'ALTER TABLE "{table}" ' + ", ".join(alters)))
+    return [f"{c}: {current[c]} -> {t}" for c, t in drift.items()]
+
+
 # ---------- engine ----------
 def build_engine() -> Engine:
     url = os.getenv("DATABASE_URL")
@@ -126,6 +185,14 @@ def main():
     p.add_argument("--encoding", default=os.getenv("CSV_ENCODING", "utf-8"), help="CSV encoding (default: utf-8 or CSV_ENCODING)")
     p.add_argument("--no-id", action="store_true", help="Do not create 'id BIGSERIAL' column (or set CSV_NO_ID=true)")
     p.add_argument("--recreate", action="store_true", help="Drop table then create (or set CSV_RECREATE=1)")
+    p.add_argument("--sep", default=os.getenv("CSV_SEP", ","), help="CSV separator (default: ',' or CSV_SEP)")
+    p.add_argument("--manifest", default=None, help="Schema manifest output path (or set CSV_SCHEMA_MANIFEST)")
+    p.add_argument("--sample-rows", type=int, default=int(os.getenv("CSV_SCHEMA_SAMPLE_ROWS", "100000")),
+                   help="Rows sampled for type inference; 0 = whole file (or set CSV_SCHEMA_SAMPLE_ROWS)")
+    p.add_argument("--min-ratio", type=float, default=float(os.getenv("CSV_SCHEMA_MIN_RATIO", "0.98")),
+                   help="Share of non-empty values that must parse for a numeric type (default: 0.98)")
+    p.add_argument("--types", default=os.getenv("CSV_TYPE_OVERRIDES", ""),
+                   help='Pinned types, e.g. "year=INTEGER,gdp=NUMERIC" (or set CSV_TYPE_OVERRIDES)')
     args = p.parse_args()
 
     if not args.csv:
@@ -142,17 +209,38 @@ def main():
     # recreate flag
     recreate = args.recreate or (os.getenv("CSV_RECREATE", "").lower() in ("1", "true", "yes"))
 
-    header = read_header(csv_path, encoding=args.encoding)
-    ddl, cols = build_create_table_sql(table, header, add_id=add_id)
+    METRICS.begin("create", table)
+    with METRICS.phase("read"):
+        header = read_header(csv_path, encoding=args.encoding)
+    manifest = infer_schema(csv_path, sanitize_columns, encoding=args.encoding, sep=args.sep,
+                            sample_rows=args.sample_rows, min_ratio=args.min_ratio,
+                            overrides=parse_overrides(args.types))
+    manifest["table"] = table
+    types = column_types(manifest)
+    ddl, cols = build_create_table_sql(table, header, types, add_id=add_id)
 
     engine = build_engine()
-    with engine.begin() as conn:
+    with METRICS.phase("ddl"), engine.begin() as conn:
         if recreate:
-            conn.execute(text(f'DROP TABLE IF EXISTS "{table}";'))
+            # CASCADE: rollup materialized views depend on the table (rebuilt after the load)
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table}" CASCADE;'))
+            # 테이블이 비었으므로 다음 upsert가 checksum 때문에 skip되지 않도록
+            forget_checksum(conn, table)
         conn.execute(text(ddl))
+        migrated = migrate_types(conn, table, existing_types(conn, table),
+                                 {c: choose_type(c, types) for c in cols})
+
+    manifest_path = Path(args.manifest) if args.manifest else default_manifest_path(table)
+    write_manifest(manifest, manifest_path)
 
     print(f"[OK] Created table: {table}")
-    print("[INFO] Columns:", ", ".join(cols))
+    print("[INFO] Columns:", ", ".join(f"{c} {choose_type(c, types)}" for c in cols))
+    print(f"[INFO] Schema manifest: {manifest_path} (sampled {manifest['sample_rows']:,} rows)")
+    if migrated:
+        print("[INFO] Migrated column types to the manifest:", "; ".join(migrated))
+    METRICS.finish(rows=manifest["sample_rows"], columns=len(cols), type_drift=len(migrated),
+                   rejected={c["name"]: c["invalid"] for c in manifest["columns"] if c.get("invalid")})
+    METRICS.export()
 
 
 if __name__ == "__main__":
@@ -2,24 +2,68 @@
 """
 Load CSV data (rows from line 2~) into a PostgreSQL table.
 - Column sanitation must match DDL creation.
-- Type handling:
-  - description, name, iso_code, year -> TEXT  (year도 TEXT)
-  - population, gdp                   -> BIGINT (nullable Int64)
-  - others                            -> numeric (floats via pandas; PG NUMERIC에 삽입)
-- Empty strings -> NULL(pd.NA) when appropriate.
+- Type handling follows the schema manifest written by create_table_from_csv
+  (--manifest or CSV_SCHEMA_MANIFEST; inferred on the fly if missing):
+  - TEXT                       -> trimmed strings
+  - SMALLINT/INTEGER/BIGINT    -> nullable Int64 (non-integral / out of range -> NULL)
+  - DOUBLE PRECISION           -> float64
+  - NUMERIC                    -> validated decimal strings (exact, PG parses them)
+  Thousands separators are removed from numeric columns.
+- Empty strings -> NULL(pd.NA); unparsable values -> NULL, counted as rejected.
+- Write methods (--method or CSV_LOAD_METHOD):
+  - copy   : stream rows with COPY ... FROM STDIN (psycopg 3 copy API, default)
+  - to_sql : pandas DataFrame.to_sql(method="multi") batched INSERTs (fallback)
+  Both report elapsed time and rows/sec.
+- Streaming (--stream or CSV_STREAM=1): read -> coerce -> write in bounded
+  chunks of --chunksize rows, so peak RSS follows the chunk size rather than
+  the file size. Each chunk logs its rows and memory high-water mark.
+- Load modes (--mode or CSV_LOAD_MODE):
+  - append : insert every row (default, legacy behaviour)
+  - upsert : stage via COPY, then INSERT ... ON CONFLICT (--key, default name,year)
+             touching only new rows or rows whose content hash (row_hash) changed.
+             Skipped entirely when the CSV sha256 equals the last successful load.
+  - swap   : full reload into an UNLOGGED staging table, indexes + rollups built
+             there, then renamed over the live table in one short transaction;
+             the previous table is kept for a rollback window (see swap_load.py).
+             Also skipped when the CSV is unchanged.
+- Parallel (--workers N or CSV_WORKERS): byte-range partitions loaded by N
+  processes into a shared staging table, then committed in one transaction
+  (see parallel_load.py).
+- Every successful load is recorded in etl_load_state (checksum, generation).
+- Phase timings (read / sanitize / coerce / write / merge / index), rows/s,
+  bytes read, peak RSS and rejected counts are exported in Prometheus text
+  format via CSV_METRICS_DIR / CSV_METRICS_PUSH_URL (see metrics.py).
 
 Requires: pandas>=2.2, SQLAlchemy>=2.0, psycopg[binary]>=3.2, python-dotenv(optional)
 """
 
 import argparse
+import io
+import itertools
 import os
 import re
+import resource
+import time
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+
+from .load_state import file_sha256, last_checksum, record_load
+from .metrics import METRICS
+from .schema_infer import (
+    FLOAT_RE,
+    INT_LIMITS,
+    clean_values,
+    column_types,
+    default_manifest_path,
+    infer_schema,
+    read_manifest,
+    type_columns,
+)
 
 try:
     from dotenv import load_dotenv  # optional
@@ -66,6 +110,308 @@ def build_engine() -> Engine:
     return create_engine(url, future=True)
 
 
+# ---------- read / coerce ----------
+def load_types(csv_path: Path, table: str, manifest_path: Optional[str],
+               encoding: str = "utf-8", sep: str = ",") -> Dict[str, str]:
+    """Column -> PG type from the schema manifest (infer from a sample if it is missing)."""
+    path = Path(manifest_path) if manifest_path else default_manifest_path(table)
+    manifest = read_manifest(path)
+    if manifest is None:
+        print(f"[INFO] No schema manifest at {path}; inferring types from a sample")
+        manifest = infer_schema(csv_path, sanitize_all, encoding=encoding, sep=sep)
+    elif manifest.get("source") != csv_path.name:
+        print(f"[WARN] Manifest {path} was built from {manifest.get('source')}, loading {csv_path.name}")
+    return column_types(manifest)
+
+
+def read_frame(csv_path: Path, encoding: str = "utf-8", sep: str = ",") -> pd.DataFrame:
+    # Load CSV: header=1st row, data from row-2; keep as strings first
+    with METRICS.phase("read"):
+        df = pd.read_csv(csv_path, encoding=encoding, sep=sep, dtype=str, keep_default_na=False)
+    # Sanitize columns to match table DDL
+    with METRICS.phase("sanitize"):
+        df.columns = sanitize_all(list(df.columns))
+    return df
+
+
+def stream_frames(csv_path: Path, types: Dict[str, str], encoding: str = "utf-8", sep: str = ",",
+                  chunksize: int = 1000, rejected: Optional[Dict[str, int]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Yield coerced frames of at most `chunksize` rows.
+    - Only one raw chunk + its coerced copy is alive at a time; the writer
+      consumes a chunk before the next one is parsed.
+    - After each chunk is written, log rows / current RSS / chunk peak RSS
+      and reset the high-water mark for the next chunk.
+    """
+    cols: List[str] = []
+    total = 0
+    reset_peak_rss()
+    with pd.read_csv(csv_path, encoding=encoding, sep=sep, dtype=str,
+                     keep_default_na=False, chunksize=max(int(chunksize), 1)) as reader:
+        for i, chunk in enumerate(METRICS.timed("read", reader), 1):
+            if not cols:
+                with METRICS.phase("sanitize"):
+                    cols = sanitize_all(list(chunk.columns))
+            chunk.columns = cols
+            with METRICS.phase("coerce"):
+                chunk = coerce_frame(chunk, types, rejected)
+            yield chunk
+            total += len(chunk)
+            print(f"[CHUNK] #{i} rows={len(chunk):,} total={total:,} "
+                  f"rss={current_rss_kb() / 1024:,.1f}MiB peak={peak_rss_kb() / 1024:,.1f}MiB")
+            reset_peak_rss()
+
+
+def coerce_frame(df: pd.DataFrame, types: Dict[str, str],
+                 rejected: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+    """
+    Coerce string columns in place according to `types` (column -> PG type).
+    Non-empty values that do not fit their type become NULL and are added to
+    `rejected[column]` when a dict is given.
+    """
+    groups = type_columns({c: types.get(c, "TEXT") for c in df.columns})
+
+    def _reject(c: str, before: pd.Series, after: pd.Series) -> None:
+        if rejected is not None:
+            n = int((before.notna() & after.isna()).sum())
+            if n:
+                rejected[c] = rejected.get(c, 0) + n
+
+    # TEXT: trim, empty -> NULL
+    for c in groups["text"]:
+        s = df[c].astype(str).str.strip()
+        df[c] = s.replace({"": pd.NA})
+
+    # INT: remove thousands separators, empty->NA, range-checked Int64 (nullable)
+    for c in groups["int"]:
+        s = clean_values(df[c])
+        v = pd.to_numeric(s, errors="coerce")
+        v = v.where((v % 1 == 0) & (v.abs() <= INT_LIMITS[types[c]]))
+        _reject(c, s, v)
+        df[c] = v.astype("Int64")
+
+    # DOUBLE PRECISION: remove thousands separators, to float
+    for c in groups["float"]:
+        s = clean_values(df[c])
+        v = pd.to_numeric(s, errors="coerce")
+        _reject(c, s, v)
+        df[c] = v
+
+    # NUMERIC: keep the validated decimal text so PG stores it exactly
+    for c in groups["numeric"]:
+        s = clean_values(df[c])
+        v = s.where(s.str.fullmatch(FLOAT_RE).fillna(False).astype(bool))
+        _reject(c, s, v)
+        df[c] = v
+    return df
+
+
+def derive_table_name(csv_path: Path) -> str:
+    # derive from file name (simple version, same as create_table_from_csv.infer_table_name)
+    name = csv_path.stem.lower()
+    name = re.sub(r"\s+", "_", name)
+    name = re.sub(r"[^0-9a-z_]", "_", name)
+    if name and name[0].isdigit():
+        name = "t_" + name
+    return name or "data"
+
+
+# ---------- memory probes (Linux /proc, getrusage fallback) ----------
+def _proc_status_kb(field: str) -> int:
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+def current_rss_kb() -> int:
+    return _proc_status_kb("VmRSS")
+
+
+def peak_rss_kb() -> int:
+    """High-water mark since the last reset_peak_rss() (process lifetime if reset is unsupported)."""
+    return _proc_status_kb("VmHWM") or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def reset_peak_rss() -> None:
+    # "5" -> reset VmHWM to current RSS (Linux >= 4.0); 실패해도 무시
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+# ---------- writers (run inside the caller's transaction) ----------
+def write_to_sql(frames: Iterable[pd.DataFrame], table: str, conn: Connection, chunksize: int) -> int:
+    """Append via pandas batched multi-row INSERTs (fallback path)."""
+    rows = 0
+    for df in frames:
+        df.to_sql(
+            table,
+            conn,
+            if_exists="append",
+            index=False,
+            method="multi",
+            chunksize=chunksize,
+        )
+        rows += len(df)
+    return rows
+
+
+def copy_sql(table: str, cols: List[str]) -> str:
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    return f'COPY "{table}" ({col_list}) FROM STDIN (FORMAT csv)'
+
+
+def write_copy(frames: Iterable[pd.DataFrame], table: str, conn: Connection, chunksize: int) -> int:
+    """
+    Stream the coerced frames with COPY ... FROM STDIN (FORMAT csv), one COPY per call.
+    - Each slice of `chunksize` rows is rendered by pandas' C CSV writer and
+      pushed through psycopg's copy object, so no INSERT statements are built.
+    - NA/NaN are written as unquoted empty fields = NULL in CSV COPY format.
+      (TEXT 컬럼의 빈 문자열은 이미 NA로 바뀌어 있으므로 구분 문제 없음)
+    """
+    step = max(int(chunksize), 1)
+    rows = 0
+    it = iter(frames)
+    first = next(it, None)
+    if first is None:
+        return 0
+    with conn.connection.driver_connection.cursor() as cur:
+        with cur.copy(copy_sql(table, list(first.columns))) as copy:
+            for df in itertools.chain([first], it):
+                for start in range(0, len(df), step):
+                    buf = io.StringIO()
+                    df.iloc[start:start + step].to_csv(buf, header=False, index=False, na_rep="")
+                    copy.write(buf.getvalue())
+                rows += len(df)
+    return rows
+
+
+WRITERS = {
+    "copy": write_copy,
+    "to_sql": write_to_sql,
+}
+
+
+# ---------- incremental upsert ----------
+HASH_COL = "row_hash"
+
+
+def with_row_hash(frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Append a 64-bit content hash of the coerced row (deterministic across runs)."""
+    for df in frames:
+        h = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        df[HASH_COL] = h.view("int64")
+        yield df
+
+
+def ensure_upsert_target(conn: Connection, table: str, key: List[str]) -> None:
+    """Add row_hash + a unique index on the natural key (idempotent)."""
+    conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "{HASH_COL}" BIGINT'))
+    idx = f"{table}_natural_key_uq"[:63]
+    key_list = ", ".join(f'"{k}"' for k in key)
+    try:
+        with conn.begin_nested():
+            conn.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{idx}" ON "{table}" ({key_list})'))
+    except IntegrityError:
+        raise SystemExit(
+            f"[ERROR] {table} already has duplicate ({', '.join(key)}) rows from earlier appends; "
+            "run once with CSV_RECREATE=1 before switching to upsert mode."
+        )
+
+
+def merge_staged(conn: Connection, table: str, stage: str, cols: List[str], key: List[str]) -> Dict[str, int]:
+    """
+    Merge a staging table into `table` with
+    INSERT ... ON CONFLICT (key) DO UPDATE ... WHERE row_hash changed.
+    - Rows with a NULL key part cannot conflict, so they are rejected.
+    - Duplicate keys inside the source keep the last staged occurrence.
+    """
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    key_list = ", ".join(f'"{k}"' for k in key)
+    key_ok = " AND ".join(f'"{k}" IS NOT NULL' for k in key)
+    updates = ", ".join(f'"{c}" = EXCLUDED."{c}"' for c in cols if c not in key)
+    res = conn.execute(text(f'''
+        WITH src AS (
+            SELECT DISTINCT ON ({key_list}) {col_list}
+            FROM "{stage}"
+            WHERE {key_ok}
+            ORDER BY {key_list}, ctid DESC
+        ), up AS (
+            INSERT INTO "{table}" AS t ({col_list})
+            SELECT {col_list} FROM src
+            ON CONFLICT ({key_list}) DO UPDATE SET {updates}
+            WHERE t."{HASH_COL}" IS DISTINCT FROM EXCLUDED."{HASH_COL}"
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT (SELECT count(*) FROM src) AS distinct_rows,
+               (SELECT count(*) FROM "{stage}" WHERE NOT ({key_ok})) AS rejected,
+               count(*) FILTER (WHERE inserted) AS inserted,
+               count(*) FILTER (WHERE NOT inserted) AS updated
+        FROM up
+    ''')).one()
+    return {
+        "rejected": res.rejected,
+        "inserted": res.inserted,
+        "updated": res.updated,
+        "unchanged": res.distinct_rows - res.inserted - res.updated,
+    }
+
+
+def upsert_frames(frames: Iterable[pd.DataFrame], table: str, conn: Connection,
+                  chunksize: int, key: List[str]) -> Dict[str, int]:
+    """COPY frames into a temp staging table, then merge_staged() into `table`."""
+    it = with_row_hash(frames)
+    first = next(it, None)
+    if first is None:
+        return {"staged": 0, "rejected": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    cols = list(first.columns)
+    missing = [k for k in key if k not in cols]
+    if missing:
+        raise SystemExit(f"[ERROR] Upsert key column(s) not in CSV: {', '.join(missing)}")
+
+    ensure_upsert_target(conn, table, key)
+    stage = f"_stage_{table}"[:63]
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    conn.execute(text(
+        f'CREATE TEMP TABLE "{stage}" ON COMMIT DROP AS SELECT {col_list} FROM "{table}" WITH NO DATA'
+    ))
+    staged = write_copy(itertools.chain([first], it), stage, conn, chunksize)
+    with METRICS.phase("merge"):
+        merged = merge_staged(conn, table, stage, cols, key)
+    return {"staged": staged, **merged}
+
+
+def finish_swap(engine: Engine, table: str, stage: str, on_commit) -> int:
+    """Index/rollup/SET LOGGED the filled staging table, then rename it over `table`."""
+    from .build_indexes import load_spec
+    from .swap_load import finalize_stage, prune_old, swap_in
+
+    timings = finalize_stage(engine, stage, load_spec(os.getenv("CSV_INDEX_SPEC")))
+    print("[INFO] staging " + " ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+    with METRICS.phase("swap"):
+        generation = swap_in(engine, table, stage, on_commit)
+    keep = float(os.getenv("CSV_SWAP_KEEP_HOURS", "24"))
+    if keep <= 0:
+        prune_old(engine, table, keep)
+    return generation
+
+
+def report_rejected(rejected: Dict[str, int]) -> None:
+    if rejected:
+        print("[WARN] Rejected values (loaded as NULL):",
+              ", ".join(f"{c}={n:,}" for c, n in sorted(rejected.items())))
+
+
+LOAD_MODES = ["append", "upsert", "swap"]
+
+
 def main():
     ap = argparse.ArgumentParser(description="Load CSV into Postgres table.")
     ap.add_argument("--csv", default=os.getenv("CSV_PATH"), help="CSV file path (or set CSV_PATH)")
@@ -73,67 +419,140 @@ def main():
     ap.add_argument("--encoding", default=os.getenv("CSV_ENCODING", "utf-8"), help="CSV encoding (default: utf-8 or CSV_ENCODING)")
     ap.add_argument("--chunksize", type=int, default=int(os.getenv("CSV_CHUNKSIZE", "1000")), help="Rows per batch")
     ap.add_argument("--sep", default=os.getenv("CSV_SEP", ","), help="CSV separator (default: ',' or CSV_SEP)")
+    ap.add_argument("--method", choices=sorted(WRITERS), default=os.getenv("CSV_LOAD_METHOD", "copy"),
+                    help="Write method: copy (COPY FROM STDIN) or to_sql (fallback) (or set CSV_LOAD_METHOD)")
+    ap.add_argument("--stream", action="store_true",
+                    help="Read/coerce/write in --chunksize row chunks to bound memory (or set CSV_STREAM=1)")
+    ap.add_argument("--mode", choices=LOAD_MODES, default=os.getenv("CSV_LOAD_MODE", "append"),
+                    help="append: plain insert / upsert: merge changed rows on --key / "
+                         "swap: reload into a staging table and rename it in (or set CSV_LOAD_MODE)")
+    ap.add_argument("--key", default=os.getenv("CSV_UPSERT_KEY", "name,year"),
+                    help="Natural key for upsert, comma-separated (default: name,year or CSV_UPSERT_KEY)")
+    ap.add_argument("--force", action="store_true",
+                    help="Upsert even if the CSV checksum matches the last load (or set CSV_FORCE_LOAD=1)")
+    ap.add_argument("--workers", type=int, default=int(os.getenv("CSV_WORKERS", "1")),
+                    help="Parallel byte-range loader processes; >1 uses COPY via a staging table (or set CSV_WORKERS)")
+    ap.add_argument("--manifest", default=None,
+                    help="Schema manifest from create_table_from_csv (or set CSV_SCHEMA_MANIFEST)")
     args = ap.parse_args()
 
     if not args.csv:
         ap.error("CSV path is required. Use --csv or set CSV_PATH.")
+    if args.method not in WRITERS:
+        ap.error(f"Unknown CSV_LOAD_METHOD: {args.method}")
+    if args.mode not in LOAD_MODES:
+        ap.error(f"Unknown CSV_LOAD_MODE: {args.mode}")
     csv_path = Path(os.path.expandvars(os.path.expanduser(args.csv)))
     if not csv_path.exists():
         raise SystemExit(f"[ERROR] CSV not found: {csv_path}")
 
-    # Load CSV: header=1st row, data from row-2; keep as strings first
-    df = pd.read_csv(csv_path, encoding=args.encoding, sep=args.sep, dtype=str, keep_default_na=False)
-    # Sanitize columns to match table DDL
-    df.columns = sanitize_all(list(df.columns))
+    # Target table name
+    table = args.table or derive_table_name(csv_path)
+    key = sanitize_all([k for k in args.key.split(",") if k.strip()])
+    force = args.force or (os.getenv("CSV_FORCE_LOAD", "").lower() in ("1", "true", "yes"))
+    METRICS.begin("load", table)
+    nbytes = csv_path.stat().st_size
+
+    engine = build_engine()
+    sha = file_sha256(csv_path)
+    if args.mode in ("upsert", "swap") and not force:
+        with engine.connect() as conn:
+            prev = last_checksum(conn, table)
+            conn.commit()
+        if prev == sha:
+            print(f"[SKIP] {csv_path.name} unchanged since last load (sha256={sha[:12]}…)")
+            METRICS.finish(rows=0, skipped=1)
+            METRICS.export()
+            return
 
-    # ---- type groups (sanitized names) ----
-    text_cols = {"description", "name", "iso_code", "year"}  # year도 TEXT
-    bigint_cols = {"population", "gdp"}
-    numeric_cols = [c for c in df.columns if c not in text_cols | bigint_cols]
+    types = load_types(csv_path, table, args.manifest, encoding=args.encoding, sep=args.sep)
+    rejected: Dict[str, int] = {}
 
-    # Common trim
-    for c in df.columns:
-        df[c] = df[c].astype(str).str.strip()
+    def record(conn: Connection, changed: int) -> int:
+        return record_load(conn, table, sha, nbytes, changed)
 
-    # TEXT: empty -> NULL
-    for c in text_cols:
-        if c in df.columns:
-            df[c] = df[c].replace({"": pd.NA})
+    # swap: 아래 적재 경로는 그대로, 대상만 staging 테이블 (append로 적재 후 교체)
+    swap = args.mode == "swap"
+    target, write_mode = table, args.mode
+    if swap:
+        from .swap_load import prepare_stage
 
-    # BIGINT: remove thousands separators, empty->NA, to Int64 (nullable)
-    for c in bigint_cols:
-        if c in df.columns:
-            s = df[c].str.replace(",", "", regex=False).replace({"": pd.NA})
-            df[c] = pd.to_numeric(s, errors="coerce").astype("Int64")
+        no_id = os.getenv("CSV_NO_ID", "").lower() in ("1", "true", "yes")
+        target, write_mode = prepare_stage(engine, table, types, add_id=not no_id), "append"
 
-    # NUMERIC: remove thousands separators, to float (PG NUMERIC will accept)
-    for c in numeric_cols:
-        s = df[c].str.replace(",", "", regex=False).replace({"": pd.NA})
-        df[c] = pd.to_numeric(s, errors="coerce")
+    if args.workers > 1:
+        from .parallel_load import parallel_load
 
-    # Target table name
-    table = args.table
-    if not table:
-        # derive from file name (simple version, same as create_table_from_csv.infer_table_name)
-        name = csv_path.stem.lower()
-        name = re.sub(r"\s+", "_", name)
-        name = re.sub(r"[^0-9a-z_]", "_", name)
-        if name and name[0].isdigit():
-            name = "t_" + name
-        table = name or "data"
+        t0 = time.perf_counter()
+        stats = parallel_load(
+            csv_path, target, engine, types, workers=args.workers, encoding=args.encoding, sep=args.sep,
+            chunksize=args.chunksize, mode=write_mode, key=key, rejected=rejected,
+            on_commit=None if swap else record,
+        )
+        rows = stats["staged"]
+        if swap:
+            stats["generation"] = finish_swap(engine, table, target, lambda conn: record(conn, rows))
+        elapsed = time.perf_counter() - t0
+        rate = rows / elapsed if elapsed > 0 else float("inf")
+        if args.mode == "upsert":
+            print(f"[OK] Upserted into {table}: inserted={stats['inserted']:,} updated={stats['updated']:,} "
+                  f"unchanged={stats['unchanged']:,} rejected(null key)={stats['rejected']:,}")
+        else:
+            print(f"[OK] Loaded {rows:,} rows into {table}")
+        print(f"[INFO] mode={args.mode} method=copy workers={args.workers} total={elapsed:.2f}s "
+              f"({rate:,.0f} rows/s) generation={stats['generation']}")
+        report_rejected(rejected)
+        finish_metrics(stats, rows, nbytes, rejected, stats["generation"])
+        return
 
-    engine = build_engine()
-    # Append into existing table
-    df.to_sql(
-        table,
-        engine,
-        if_exists="append",
-        index=False,
-        method="multi",
-        chunksize=args.chunksize,
-    )
+    stream = args.stream or (os.getenv("CSV_STREAM", "").lower() in ("1", "true", "yes"))
+    if stream:
+        frames = stream_frames(csv_path, types, encoding=args.encoding, sep=args.sep,
+                               chunksize=args.chunksize, rejected=rejected)
+    else:
+        df = read_frame(csv_path, encoding=args.encoding, sep=args.sep)
+        with METRICS.phase("coerce"):
+            frames = [coerce_frame(df, types, rejected)]
+        del df
 
-    print(f"[OK] Loaded {len(df):,} rows into {table}")
+    t0 = time.perf_counter()
+    with METRICS.phase("write"), engine.begin() as conn:
+        if write_mode == "upsert":
+            if args.method != "copy":
+                print("[INFO] upsert stages rows with COPY; --method ignored")
+            stats = upsert_frames(frames, table, conn, args.chunksize, key)
+            rows = stats["staged"]
+            changed = stats["inserted"] + stats["updated"]
+        else:
+            # Append into existing table
+            rows = changed = WRITERS[args.method](frames, target, conn, args.chunksize)
+        generation = None if swap else record(conn, changed)
+    if swap:
+        generation = finish_swap(engine, table, target, lambda conn: record(conn, rows))
+    elapsed = time.perf_counter() - t0
+
+    rate = rows / elapsed if elapsed > 0 else float("inf")
+    if args.mode == "upsert":
+        print(f"[OK] Upserted into {table}: inserted={stats['inserted']:,} updated={stats['updated']:,} "
+              f"unchanged={stats['unchanged']:,} rejected(null key)={stats['rejected']:,}")
+    else:
+        print(f"[OK] Loaded {rows:,} rows into {table}")
+    print(f"[INFO] mode={args.mode} method={args.method} stream={stream} write={elapsed:.2f}s "
+          f"({rate:,.0f} rows/s) generation={generation}")
+    if not stream:
+        print(f"[INFO] peak_rss={peak_rss_kb() / 1024:,.1f}MiB")
+    report_rejected(rejected)
+    finish_metrics(stats if args.mode == "upsert" else {}, rows, nbytes, rejected, generation)
+
+
+def finish_metrics(stats: Dict, rows: int, nbytes: int, rejected: Dict[str, int], generation) -> None:
+    print(f"[INFO] phases {METRICS.summary()}")
+    METRICS.finish(
+        rows=rows, nbytes=nbytes, rejected=rejected, generation=generation, skipped=0,
+        rejected_rows=stats.get("rejected"), inserted_rows=stats.get("inserted"),
+        updated_rows=stats.get("updated"), unchanged_rows=stats.get("unchanged"),
+    )
+    METRICS.export()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Bookkeeping table for ETL runs (one row per target table).
+- source_sha256 / source_bytes : checksum of the last successfully loaded CSV
+- rows_loaded                  : rows written (or upserted) by that run
+- generation                   : +1 on every successful load (dataset version)
+- loaded_at                    : commit time of that run
+- rollups_at                   : last standalone rollup refresh (csv_to_pg.rollups);
+                                 with generation, the version API caches are keyed on
+
+Written in the same transaction as the data, so the state never runs ahead
+of what readers can see.
+"""
+
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+STATE_TABLE = "etl_load_state"
+
+
+def file_sha256(path: Path, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(bufsize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def ensure_state_table(conn: Connection) -> None:
+    conn.execute(text(f'''
+        CREATE TABLE IF NOT EXISTS "{STATE_TABLE}" (
+          table_name    TEXT PRIMARY KEY,
+          source_sha256 TEXT,
+          source_bytes  BIGINT,
+          rows_loaded   BIGINT,
+          generation    BIGINT NOT NULL DEFAULT 0,
+          loaded_at     TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        ALTER TABLE "{STATE_TABLE}" ADD COLUMN IF NOT EXISTS rollups_at TIMESTAMPTZ;
+    '''))
+
+
+def last_checksum(conn: Connection, table: str) -> Optional[str]:
+    ensure_state_table(conn)
+    return conn.execute(
+        text(f'SELECT source_sha256 FROM "{STATE_TABLE}" WHERE table_name = :t'),
+        {"t": table},
+    ).scalar()
+
+
+def record_load(conn: Connection, table: str, sha256: str, nbytes: int, rows: int) -> int:
+    """Upsert the state row for `table` and return the new generation."""
+    ensure_state_table(conn)
+    return conn.execute(text(f'''
+        INSERT INTO "{STATE_TABLE}" AS s (table_name, source_sha256, source_bytes, rows_loaded, generation, loaded_at)
+        VALUES (:t, :sha, :nb, :rows, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+           SET source_sha256 = EXCLUDED.source_sha256,
+               source_bytes  = EXCLUDED.source_bytes,
+               rows_loaded   = EXCLUDED.rows_loaded,
+               generation    = s.generation + 1,
+               loaded_at     = EXCLUDED.loaded_at
+        RETURNING generation
+    '''), {"t": table, "sha": sha256, "nb": nbytes, "rows": rows}).scalar_one()
+
+
+def forget_checksum(conn: Connection, table: str) -> None:
+    """Clear the stored checksum (e.g. after DROP/CREATE) but keep the generation counter."""
+    ensure_state_table(conn)
+    conn.execute(
+        text(f'UPDATE "{STATE_TABLE}" SET source_sha256 = NULL WHERE table_name = :t'),
+        {"t": table},
+    )
+
+
+def bump_generation(conn: Connection, table: str) -> int:
+    """New dataset version without a known source (e.g. swap rollback): +1 and clear the checksum."""
+    ensure_state_table(conn)
+    return conn.execute(text(f'''
+        INSERT INTO "{STATE_TABLE}" AS s (table_name, generation, loaded_at)
+        VALUES (:t, 1, now())
+        ON CONFLICT (table_name) DO UPDATE
+           SET source_sha256 = NULL, generation = s.generation + 1, loaded_at = EXCLUDED.loaded_at
+        RETURNING generation
+    '''), {"t": table}).scalar_one()
+
+
+def touch_rollups(conn: Connection, table: str) -> None:
+    """Record a rollup refresh: append/upsert loads refresh rollups after the generation bump."""
+    ensure_state_table(conn)
+    conn.execute(text(f'''
+        INSERT INTO "{STATE_TABLE}" AS s (table_name, rollups_at) VALUES (:t, now())
+        ON CONFLICT (table_name) DO UPDATE SET rollups_at = EXCLUDED.rollups_at
+    '''), {"t": table})
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+ETL run instrumentation in the Prometheus text exposition format (no client library).
+- METRICS.phase("read" | "sanitize" | "coerce" | "write" | "index" | ...) times a
+  block (wall = perf_counter, CPU = process_time). Phases nest exclusively: time
+  spent in an inner phase is not counted again in the outer one, so e.g. the
+  streaming "write" phase excludes the read/coerce work it pulls per chunk.
+- METRICS.set(name, value, help, **labels) records a gauge (rows, rows/s,
+  bytes read, peak RSS, rejected values, generation, ...).
+- METRICS.export() writes everything, labelled with step and table:
+  - CSV_METRICS_DIR      : <dir>/csv_to_pg_<step>_<table>.prom, atomically renamed
+                           (node_exporter textfile collector, or any scraper/stand-in)
+  - CSV_METRICS_PUSH_URL : PUT <url>/metrics/job/csv_to_pg/step/<step>/table/<table>
+                           (Pushgateway API; one group per step so runs replace each other)
+  Both are optional; export failures only warn and never fail the load.
+"""
+
+import os
+import resource
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+JOB = "csv_to_pg"
+PREFIX = "etl_"
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if value == value else "NaN"
+
+
+def max_rss_bytes() -> int:
+    """Process-lifetime peak RSS (+ finished child processes, e.g. parallel workers)."""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux: KiB, macOS: bytes
+    scale = 1 if sys.platform == "darwin" else 1024
+    return max(own, kids) * scale
+
+
+class EtlMetrics:
+    def __init__(self) -> None:
+        self.step = ""
+        self.table = ""
+        self.phases: Dict[str, List[float]] = {}   # phase -> [wall, cpu]
+        self.gauges: Dict[str, Dict[LabelKey, float]] = {}
+        self.help: Dict[str, str] = {}
+        self._stack: List[List[float]] = []        # [wall, cpu] spent in child phases
+        self._started = time.time()
+
+    def begin(self, step: str, table: str) -> "EtlMetrics":
+        self.__init__()
+        self.step, self.table = step, table
+        return self
+
+    # ---------- phases ----------
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        w0, c0 = time.perf_counter(), time.process_time()
+        self._stack.append([0.0, 0.0])
+        try:
+            yield
+        finally:
+            child_w, child_c = self._stack.pop()
+            wall, cpu = time.perf_counter() - w0, time.process_time() - c0
+            self.add_phase(name, wall - child_w, cpu - child_c)
+            if self._stack:
+                self._stack[-1][0] += wall
+                self._stack[-1][1] += cpu
+
+    def timed(self, name: str, it: Iterator) -> Iterator:
+        """Wrap an iterator so the time spent producing each item counts as `name`."""
+        it = iter(it)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(it)
+                except StopIteration:
+                    return
+            yield item
+
+    def add_phase(self, name: str, wall: float, cpu: float) -> None:
+        acc = self.phases.setdefault(name, [0.0, 0.0])
+        acc[0] += wall
+        acc[1] += cpu
+
+    def merge_phases(self, phases: Dict[str, List[float]]) -> None:
+        """Add phase totals reported by another process (parallel workers)."""
+        for name, (wall, cpu) in phases.items():
+            self.add_phase(name, wall, cpu)
+
+    # ---------- gauges ----------
+    def set(self, name: str, value: float, help: str = "", **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self.gauges.setdefault(PREFIX + name, {})[key] = float(value)
+        if help:
+            self.help[PREFIX + name] = help
+
+    def finish(self, rows: Optional[int] = None, nbytes: Optional[int] = None,
+               rejected: Optional[Dict[str, int]] = None, **extra: Optional[float]) -> None:
+        """Common end-of-run gauges; `extra` becomes etl_<name> gauges (None = not emitted)."""
+        elapsed = time.time() - self._started
+        self.set("duration_seconds", elapsed, "Wall time of the whole step")
+        if rows is not None:
+            self.set("rows", rows, "Rows written (or sampled) by the step")
+            self.set("rows_per_second", rows / elapsed if elapsed > 0 else 0, "rows / duration_seconds")
+        if nbytes is not None:
+            self.set("bytes_read", nbytes, "Source bytes read")
+        self.set("peak_rss_bytes", max_rss_bytes(), "Peak resident set size (process or workers)")
+        for col, n in (rejected or {}).items():
+            self.set("rejected_values", n, "Values loaded as NULL because they did not fit the column type",
+                     column=col)
+        self.set("rejected_values_total", sum((rejected or {}).values()), "Sum of rejected_values")
+        for name, value in extra.items():
+            if value is not None:
+                self.set(name, value)
+        self.set("last_success_timestamp_seconds", time.time(), "Unix time the step finished")
+
+    # ---------- exposition ----------
+    def render(self) -> str:
+        base = (("step", self.step), ("table", self.table))
+        out: List[str] = []
+
+        def lbl(key: LabelKey) -> str:
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in base + key) + "}"
+
+        for metric, idx, help_text in (("phase_wall_seconds", 0, "Wall time per ETL phase (summed over workers)"),
+                                       ("phase_cpu_seconds", 1, "CPU time per ETL phase (summed over workers)")):
+            out += [f"# HELP {PREFIX}{metric} {help_text}", f"# TYPE {PREFIX}{metric} gauge"]
+            out += [f"{PREFIX}{metric}{lbl((('phase', p),))} {_fmt(v[idx])}" for p, v in sorted(self.phases.items())]
+        for metric, series in sorted(self.gauges.items()):
+            if metric in self.help:
+                out.append(f"# HELP {metric} {self.help[metric]}")
+            out.append(f"# TYPE {metric} gauge")
+            out += [f"{metric}{lbl(key)} {_fmt(v)}" for key, v in sorted(series.items())]
+        return "\n".join(out) + "\n"
+
+    def export(self) -> List[str]:
+        """Write/push per CSV_METRICS_DIR / CSV_METRICS_PUSH_URL; returns where it went."""
+        body = self.render()
+        done = []
+        target_dir = os.getenv("CSV_METRICS_DIR")
+        if target_dir:
+            path = Path(target_dir) / f"{JOB}_{self.step}_{self.table}.prom"
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".prom.tmp")
+                tmp.write_text(body, encoding="utf-8")
+                tmp.replace(path)   # collector가 반쯤 쓴 파일을 읽지 않도록
+                done.append(str(path))
+            except OSError as e:
+                print(f"[WARN] metrics file not written: {e}", file=sys.stderr)
+        push = os.getenv("CSV_METRICS_PUSH_URL")
+        if push:
+            url = f"{push.rstrip('/')}/metrics/job/{JOB}/step/{self.step}/table/{self.table}"
+            req = urllib.request.Request(url, data=body.encode("utf-8"), method="PUT",
+                                         headers={"Content-Type": "text/plain; version=0.0.4"})
+            try:
+                with urllib.request.urlopen(req, timeout=10):
+                    pass
+                done.append(url)
+            except OSError as e:
+                print(f"[WARN] metrics push to {url} failed: {e}", file=sys.stderr)
+        if done:
+            print(f"[INFO] metrics -> {', '.join(done)}")
+        return done
+
+    def summary(self) -> str:
+        return " ".join(f"{p}={w:.2f}s/cpu {c:.2f}s" for p, (w, c) in self.phases.items())
+
+
+METRICS = EtlMetrics()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel CSV loader used by load_csv_to_db --workers N (or CSV_WORKERS).
+- The data section (after the header line) is split into N byte ranges whose
+  boundaries are moved forward to the next newline, so every row belongs to
+  exactly one range. (⚠ quoted fields with embedded newlines are not supported)
+- Each range is parsed, coerced and COPY'd by a worker process over its own
+  engine/connection into a shared UNLOGGED staging table, in --chunksize chunks.
+- Only after every worker committed, one coordinator transaction moves the
+  staged rows into the target (plain INSERT ... SELECT or upsert merge) and
+  drops the staging table. A failed worker leaves the target untouched.
+"""
+
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .load_csv_to_db import (
+    HASH_COL,
+    build_engine,
+    coerce_frame,
+    ensure_upsert_target,
+    merge_staged,
+    sanitize_all,
+    with_row_hash,
+    write_copy,
+)
+from .metrics import METRICS
+
+
+# ---------- byte-range partitioning ----------
+def split_ranges(csv_path: Path, parts: int) -> List[Tuple[int, int]]:
+    """[(start, end), ...] byte offsets covering the data rows, cut at line starts."""
+    size = csv_path.stat().st_size
+    with csv_path.open("rb") as f:
+        f.readline()  # header
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, max(int(parts), 1)):
+            pos = data_start + (size - data_start) * i // parts
+            if pos <= bounds[-1]:
+                continue
+            f.seek(pos - 1)
+            f.readline()  # pos-1 부터 읽어야 pos가 줄 시작일 때 그 줄을 건너뛰지 않음
+            nxt = f.tell()
+            if bounds[-1] < nxt < size:
+                bounds.append(nxt)
+        bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class _ByteRange(io.RawIOBase):
+    """Read-only view of [start, end) of a file."""
+
+    def __init__(self, path: Path, start: int, end: int):
+        self._f = path.open("rb")
+        self._f.seek(start)
+        self._left = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._left <= 0:
+            return 0
+        n = self._f.readinto(memoryview(b)[: min(len(b), self._left)])
+        self._left -= n
+        return n
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+# ---------- worker side ----------
+_ENGINE: Optional[Engine] = None
+
+
+def _init_worker() -> None:
+    # 프로세스마다 자체 engine(커넥션 풀) 1개
+    global _ENGINE
+    _ENGINE = build_engine()
+
+
+def load_range(job: Dict) -> Dict:
+    """Parse + coerce + COPY one byte range into the staging table (runs in a worker process)."""
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    METRICS.begin("load", job["stage"])   # 워커별 phase 합계 -> coordinator에서 합산
+    with io.BufferedReader(_ByteRange(Path(job["csv"]), job["start"], job["end"])) as fh:
+        reader = pd.read_csv(fh, header=None, names=job["cols"], encoding=job["encoding"],
+                             sep=job["sep"], dtype=str, keep_default_na=False,
+                             chunksize=job["chunksize"])
+        rejected: Dict[str, int] = {}
+
+        def coerced(chunks):
+            for chunk in chunks:
+                with METRICS.phase("coerce"):
+                    chunk = coerce_frame(chunk, job["types"], rejected)
+                yield chunk
+
+        frames = coerced(METRICS.timed("read", reader))
+        if job["hash"]:
+            frames = with_row_hash(frames)
+        with METRICS.phase("write"), _ENGINE.begin() as conn:
+            rows = write_copy(frames, job["stage"], conn, job["chunksize"])
+    return {
+        "part": job["part"],
+        "pid": os.getpid(),
+        "bytes": job["end"] - job["start"],
+        "rows": rows,
+        "seconds": time.perf_counter() - t0,
+        "cpu_seconds": time.process_time() - c0,
+        "rejected": rejected,
+        "phases": METRICS.phases,
+    }
+
+
+# ---------- coordinator ----------
+def read_columns(csv_path: Path, encoding: str, sep: str) -> List[str]:
+    with csv_path.open("r", encoding=encoding, newline="") as f:
+        header = next(csv.reader(f, delimiter=sep), [])
+    if not header:
+        raise SystemExit("[ERROR] CSV header is empty")
+    return sanitize_all(header)
+
+
+def parallel_load(csv_path: Path, table: str, engine: Engine, types: Dict[str, str], *, workers: int,
+                  encoding: str = "utf-8", sep: str = ",", chunksize: int = 1000,
+                  mode: str = "append", key: Optional[List[str]] = None,
+                  rejected: Optional[Dict[str, int]] = None,
+                  on_commit: Optional[Callable[[Connection, int], int]] = None) -> Dict:
+    """
+    Load `csv_path` into `table` with `workers` processes, coercing with `types` (manifest).
+    Per-column rejected-value counts are summed into `rejected` when given.
+    `on_commit(conn, changed_rows)` runs inside the final transaction (e.g. record_load)
+    and its return value is reported as "generation".
+    """
+    cols = read_columns(csv_path, encoding, sep)
+    upsert = mode == "upsert"
+    stage_cols = cols + [HASH_COL] if upsert else cols
+    stage = f"_pstage_{table}"[:63]
+    col_list = ", ".join(f'"{c}"' for c in stage_cols)
+
+    with engine.begin() as conn:
+        if upsert:
+            missing = [k for k in key or [] if k not in cols]
+            if missing:
+                raise SystemExit(f"[ERROR] Upsert key column(s) not in CSV: {', '.join(missing)}")
+            ensure_upsert_target(conn, table, key)
+        conn.execute(text(f'DROP TABLE IF EXISTS "{stage}"'))
+        conn.execute(text(
+            f'CREATE UNLOGGED TABLE "{stage}" AS SELECT {col_list} FROM "{table}" WITH NO DATA'
+        ))
+
+    ranges = split_ranges(csv_path, workers)
+    jobs = [
+        {"part": i, "csv": str(csv_path), "start": a, "end": b, "cols": cols,
+         "types": types, "encoding": encoding, "sep": sep, "chunksize": max(int(chunksize), 1),
+         "stage": stage, "hash": upsert}
+        for i, (a, b) in enumerate(ranges)
+    ]
+    try:
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as ex:
+            parts = list(ex.map(load_range, jobs))
+        staged_at = time.perf_counter()
+        for r in parts:
+            rate = r["rows"] / r["seconds"] if r["seconds"] > 0 else float("inf")
+            print(f"[PART] #{r['part']} pid={r['pid']} bytes={r['bytes']:,} rows={r['rows']:,} "
+                  f"wall={r['seconds']:.2f}s cpu={r['cpu_seconds']:.2f}s ({rate:,.0f} rows/s)")
+
+        staged = sum(r["rows"] for r in parts)
+        for r in parts:
+            METRICS.merge_phases(r["phases"])
+        if rejected is not None:
+            for r in parts:
+                for c, n in r["rejected"].items():
+                    rejected[c] = rejected.get(c, 0) + n
+        with METRICS.phase("merge"), engine.begin() as conn:
+            if upsert:
+                stats = merge_staged(conn, table, stage, stage_cols, key)
+                changed = stats["inserted"] + stats["updated"]
+            else:
+                conn.execute(text(f'INSERT INTO "{table}" ({col_list}) SELECT {col_list} FROM "{stage}"'))
+                stats = {}
+                changed = staged
+            generation = on_commit(conn, changed) if on_commit else None
+            conn.execute(text(f'DROP TABLE "{stage}"'))
+        done = time.perf_counter()
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{stage}"'))
+
+    print(f"[INFO] workers={workers} partitions={len(parts)} stage={staged_at - t0:.2f}s "
+          f"merge={done - staged_at:.2f}s")
+    return {"staged": staged, "changed": changed, "generation": generation, "parts": parts, **stats}
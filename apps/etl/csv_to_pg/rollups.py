@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-aggregated rollups (materialized views) refreshed after each load.
+- {table}_rollup_stats : 1 row  - rows, min_year, max_year, countries
+- {table}_dim_country  : name, iso_code, first_year, last_year, rows
+- {table}_dim_year     : year, countries, rows
+- {table}_rank_year    : year, name, iso_code, co2_mt, rank (per-year emitter rank)
+- {table}_world_year   : year, countries, sum of co2_mt / total_ghg_100y / population / gdp
+                         over rows with an iso_code (= real countries, no regional aggregates)
+Each view has a unique index, so later runs use REFRESH ... CONCURRENTLY and
+readers (frontend / backend) never block on the refresh.
+
+Usage: python -m csv_to_pg.rollups [--table data] [--rebuild]
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from .build_indexes import INT_TYPES, table_types
+from .load_csv_to_db import build_engine
+from .load_state import touch_rollups
+
+WORLD_METRICS = ["co2_mt", "total_ghg_100y", "population", "gdp"]
+
+
+def rollup_names(table: str) -> Dict[str, str]:
+    return {kind: f"{table}_{kind}"[:63] for kind in ("rollup_stats", "dim_country", "dim_year", "rank_year", "world_year")}
+
+
+def rollup_specs(table: str, types: Dict[str, str]) -> List[Tuple[str, str, List[str]]]:
+    """[(view name, SELECT ..., unique index columns)] for the columns `table` actually has."""
+    names = rollup_names(table)
+    year = "year" if types.get("year") in INT_TYPES else "(year::int)"
+    valid = "year IS NOT NULL" if types.get("year") in INT_TYPES else "year ~ '^\\d{4}$'"
+    has_iso = "iso_code" in types
+    specs = [
+        (names["rollup_stats"], f'''
+            SELECT 1 AS id, COUNT(*) AS rows, MIN({year}) AS min_year, MAX({year}) AS max_year,
+                   COUNT(DISTINCT name) AS countries
+            FROM "{table}" WHERE {valid}
+        ''', ["id"]),
+        (names["dim_country"], f'''
+            SELECT name, {"MAX(iso_code)" if has_iso else "NULL::text"} AS iso_code,
+                   MIN({year}) AS first_year, MAX({year}) AS last_year, COUNT(*) AS rows
+            FROM "{table}" WHERE name IS NOT NULL AND {valid}
+            GROUP BY name
+        ''', ["name"]),
+        (names["dim_year"], f'''
+            SELECT {year} AS year, COUNT(DISTINCT name) AS countries, COUNT(*) AS rows
+            FROM "{table}" WHERE {valid}
+            GROUP BY 1
+        ''', ["year"]),
+    ]
+    if "co2_mt" in types:
+        specs.append((names["rank_year"], f'''
+            SELECT year, name, iso_code, co2_mt,
+                   rank() OVER (PARTITION BY year ORDER BY co2_mt DESC NULLS LAST) AS rank
+            FROM (
+                -- append 모드 테이블의 중복 (name, year) 제거
+                SELECT DISTINCT ON (name, {year}) {year} AS year, name,
+                       {"iso_code" if has_iso else "NULL::text AS iso_code"}, co2_mt
+                FROM "{table}" WHERE name IS NOT NULL AND {valid}
+                ORDER BY name, {year}
+            ) d
+        ''', ["year", "name"]))
+    metrics = [m for m in WORLD_METRICS if m in types]
+    if metrics:
+        sums = ", ".join(f'SUM("{m}") AS "{m}"' for m in metrics)
+        only_countries = "AND iso_code IS NOT NULL" if has_iso else ""
+        specs.append((names["world_year"], f'''
+            SELECT {year} AS year, COUNT(DISTINCT name) AS countries, {sums}
+            FROM "{table}" WHERE {valid} {only_countries}
+            GROUP BY 1
+        ''', ["year"]))
+    return specs
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:n) IS NOT NULL"), {"n": f'"{name}"'}).scalar()
+
+
+def create_rollup(conn: Connection, view: str, select: str, keys: List[str]) -> None:
+    key_list = ", ".join(f'"{k}"' for k in keys)
+    conn.execute(text(f'CREATE MATERIALIZED VIEW "{view}" AS {select}'))
+    conn.execute(text(f'CREATE UNIQUE INDEX "{view[:60]}_uq" ON "{view}" ({key_list})'))
+
+
+def refresh_rollups(engine: Engine, table: str, rebuild: bool = False) -> Dict[str, float]:
+    """Create missing rollups, REFRESH CONCURRENTLY existing ones; returns seconds per view."""
+    timings: Dict[str, float] = {}
+    with engine.begin() as conn:
+        types = table_types(conn, table)
+        if not types:
+            raise SystemExit(f"[ERROR] Table not found: {table}")
+        specs = rollup_specs(table, types)
+        if rebuild:
+            for name, _, _ in specs:
+                conn.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{name}"'))
+    for name, select, keys in specs:
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            if _exists(conn, name):
+                conn.execute(text(f'REFRESH MATERIALIZED VIEW CONCURRENTLY "{name}"'))
+            else:
+                create_rollup(conn, name, select, keys)
+        timings[name] = time.perf_counter() - t0
+        print(f"[OK] {name} ({timings[name]:.2f}s)")
+    return timings
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Create/refresh rollup materialized views for the emissions table.")
+    ap.add_argument("--table", default=os.getenv("CSV_TABLE") or "data", help="Source table (or set CSV_TABLE)")
+    ap.add_argument("--rebuild", action="store_true", help="Drop and recreate the views (after a definition change)")
+    args = ap.parse_args()
+
+    engine = build_engine()
+    timings = refresh_rollups(engine, args.table, rebuild=args.rebuild)
+    with engine.begin() as conn:
+        touch_rollups(conn, args.table)   # API 캐시 무효화 (dataset version)
+    print(f"[OK] Refreshed {len(timings)} rollups for {args.table} in {sum(timings.values()):.2f}s")
+
+
+if __name__ == "__main__":
+    main()
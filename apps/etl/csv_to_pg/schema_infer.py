@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Sample-based column type inference + schema manifest.
+- Reads the first --sample-rows data rows as strings (same trim / thousands
+  separator cleanup as the loader) and picks the narrowest correct type:
+  - all empty                          -> TEXT
+  - integers (|max| * 10 fits)         -> SMALLINT / INTEGER / BIGINT  (e.g. year -> SMALLINT)
+  - decimals, <= 15 significant digits -> DOUBLE PRECISION
+  - decimals with more digits          -> NUMERIC (exact)
+  - anything else                      -> TEXT
+  A type wins when >= min_ratio of the non-empty values parse; the rest are
+  loaded as NULL and counted as rejected.
+- The result is written to a JSON manifest that create_table_from_csv (DDL)
+  and load_csv_to_db (coercion) both read, so the two stay in sync.
+
+Manifest:
+  {"version": 1, "table": "data", "source": "Data_fixed.csv", "sample_rows": N,
+   "columns": [{"name": "year", "source": "Year", "type": "SMALLINT",
+                "non_empty": 123, "invalid": 1}, ...]}
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .metrics import METRICS
+
+MANIFEST_VERSION = 1
+
+INT_RE = r"[+-]?\d+"
+FLOAT_RE = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+INT_TYPES = ("SMALLINT", "INTEGER", "BIGINT")
+INT_LIMITS = {"SMALLINT": 2 ** 15 - 1, "INTEGER": 2 ** 31 - 1, "BIGINT": 2 ** 63 - 1}
+INT_HEADROOM = 10      # 샘플 최대값의 10배까지 담을 수 있는 타입 선택
+FLOAT_DIGITS = 15      # float8로 손실 없이 왕복 가능한 유효숫자
+
+
+def clean_values(s: pd.Series) -> pd.Series:
+    """strip + drop thousands separators; empty -> NA (the loader's numeric cleanup)."""
+    s = s.astype(str).str.strip().str.replace(",", "", regex=False)
+    return s.mask(s == "")
+
+
+def infer_column(raw: pd.Series, min_ratio: float = 0.98) -> Dict:
+    s = clean_values(raw).dropna()
+    n = len(s)
+    if n == 0:
+        return {"type": "TEXT", "non_empty": 0, "invalid": 0}
+
+    is_int = s.str.fullmatch(INT_RE)
+    if is_int.sum() >= min_ratio * n:
+        ints = pd.to_numeric(s[is_int], errors="coerce")
+        peak = int(ints.abs().max()) * INT_HEADROOM
+        for t in INT_TYPES:
+            if peak <= INT_LIMITS[t]:
+                return {"type": t, "non_empty": n, "invalid": int(n - is_int.sum())}
+        return {"type": "NUMERIC", "non_empty": n, "invalid": int(n - is_int.sum())}
+
+    is_num = s.str.fullmatch(FLOAT_RE)
+    if is_num.sum() >= min_ratio * n:
+        mant = s[is_num].str.replace(r"[eE].*$", "", regex=True).str.replace(r"[+\-.]", "", regex=True)
+        digits = mant.str.lstrip("0").str.len().max()
+        t = "DOUBLE PRECISION" if digits <= FLOAT_DIGITS else "NUMERIC"
+        return {"type": t, "non_empty": n, "invalid": int(n - is_num.sum())}
+
+    return {"type": "TEXT", "non_empty": n, "invalid": 0}
+
+
+def infer_schema(csv_path: Path, sanitize, encoding: str = "utf-8", sep: str = ",",
+                 sample_rows: int = 100_000, min_ratio: float = 0.98,
+                 overrides: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Build a manifest dict for `csv_path`.
+    `sanitize(list_of_raw_names) -> list_of_sql_names` keeps naming identical to the DDL.
+    """
+    with METRICS.phase("read"):
+        df = pd.read_csv(csv_path, encoding=encoding, sep=sep, dtype=str,
+                         keep_default_na=False, nrows=sample_rows or None)
+    raw_cols = list(df.columns)
+    with METRICS.phase("sanitize"):
+        names = sanitize(raw_cols)
+    overrides = overrides or {}
+    columns = []
+    with METRICS.phase("infer"):
+        for raw, name in zip(raw_cols, names):
+            info = infer_column(df[raw], min_ratio=min_ratio)
+            if name in overrides:
+                info["type"] = overrides[name].upper()
+                info["override"] = True
+            columns.append({"name": name, "source": raw, **info})
+    return {
+        "version": MANIFEST_VERSION,
+        "source": csv_path.name,
+        "sample_rows": len(df),
+        "min_ratio": min_ratio,
+        "columns": columns,
+    }
+
+
+def parse_overrides(spec: str) -> Dict[str, str]:
+    """'year=INTEGER, gdp=NUMERIC' -> {'year': 'INTEGER', 'gdp': 'NUMERIC'}"""
+    out: Dict[str, str] = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            out[k.strip().lower()] = v.strip().upper()
+    return out
+
+
+def default_manifest_path(table: str) -> Path:
+    # CSV PVC는 ReadOnlyMany라 CSV 옆에 못 씀 -> 같은 Pod 안의 임시 디렉터리
+    return Path(os.getenv("CSV_SCHEMA_MANIFEST") or Path(tempfile.gettempdir()) / f"{table}.schema.json")
+
+
+def write_manifest(manifest: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+def read_manifest(path: Path) -> Optional[Dict]:
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise RuntimeError(f"Unsupported schema manifest version in {path}: {manifest.get('version')}")
+    return manifest
+
+
+def column_types(manifest: Dict) -> Dict[str, str]:
+    return {c["name"]: c["type"] for c in manifest["columns"]}
+
+
+def type_columns(types: Dict[str, str]) -> Dict[str, List[str]]:
+    """Group column names by loader coercion: text / int / float / numeric."""
+    groups: Dict[str, List[str]] = {"text": [], "int": [], "float": [], "numeric": []}
+    for name, t in types.items():
+        if t in INT_TYPES:
+            groups["int"].append(name)
+        elif t == "DOUBLE PRECISION" or t == "REAL":
+            groups["float"].append(name)
+        elif t == "NUMERIC":
+            groups["numeric"].append(name)
+        else:
+            groups["text"].append(name)
+    return groups
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Zero-downtime full reload (load_csv_to_db --mode swap, or CSV_LOAD_MODE=swap).
+- The CSV is written into an UNLOGGED staging table "{table}__next" that has no
+  indexes (DDL from the schema manifest, so type changes need no DROP).
+- Indexes (build_indexes spec), ANALYZE and rollups are built on the staging
+  table, then it is switched to LOGGED (crash-safe) - all while readers keep
+  querying the live table.
+- One short transaction (with lock_timeout + retries) renames
+    live "{table}"   -> "{table}__old"  (kept for the rollback window)
+    "{table}__next"  -> live "{table}"
+  together with their indexes, id sequence and rollup views, and records the
+  load in etl_load_state. Readers see either the old or the new data, never a
+  missing or half-filled table.
+- Only one previous table is kept: the next swap replaces it. `--prune` drops
+  it once it is older than --keep-hours (CSV_SWAP_KEEP_HOURS, default 24;
+  0 = drop right after the swap), `--rollback` swaps it back in.
+
+Usage: python -m csv_to_pg.swap_load [--table data] (--rollback | --prune) [--keep-hours 24]
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .build_indexes import build_indexes
+from .load_csv_to_db import build_engine
+from .load_state import bump_generation
+from .metrics import METRICS
+from .rollups import refresh_rollups, rollup_names
+
+LOCK_TIMEOUT_MS = 5000
+SWAP_RETRIES = 5
+RETIRED_TAG = "retired_at="
+
+
+def stage_name(table: str) -> str:
+    return f"{table}__next"[:63]
+
+
+def old_name(table: str) -> str:
+    return f"{table}__old"[:63]
+
+
+def _exists(conn: Connection, name: str) -> bool:
+    return conn.execute(text("SELECT to_regclass(:n) IS NOT NULL"), {"n": f'"{name}"'}).scalar()
+
+
+# ---------- staging ----------
+def prepare_stage(engine: Engine, table: str, types: Dict[str, str], add_id: bool = True) -> str:
+    """(Re)create the empty UNLOGGED staging table and return its name."""
+    stage = stage_name(table)
+    parts = ["id BIGSERIAL"] if add_id else []   # PRIMARY KEY는 적재 후 build_indexes 단계에서
+    parts += [f'"{c}" {t}' for c, t in types.items()]
+    with engine.begin() as conn:
+        # 이전 실행이 남긴 staging 테이블 (+ 그 위의 rollup view)
+        conn.execute(text(f'DROP TABLE IF EXISTS "{stage}" CASCADE'))
+        conn.execute(text(f'CREATE UNLOGGED TABLE "{stage}" ({", ".join(parts)})'))
+    print(f"[INFO] Staging table: {stage} (UNLOGGED, no indexes)")
+    return stage
+
+
+def finalize_stage(engine: Engine, stage: str, spec: List[Dict]) -> Dict[str, float]:
+    """Primary key + spec indexes, ANALYZE, rollups, SET LOGGED on the staging table."""
+    timings: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    with METRICS.phase("index"), engine.begin() as conn:
+        if "id" in conn.execute(text(
+            "SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(:t) AND attnum > 0"
+        ), {"t": f'"{stage}"'}).scalars().all():
+            conn.execute(text(f'ALTER TABLE "{stage}" ADD CONSTRAINT "{stage[:58]}_pkey" PRIMARY KEY (id)'))
+        build_indexes(conn, stage, spec)
+    with METRICS.phase("analyze"), engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f'ANALYZE "{stage}"'))
+    timings["indexes"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with METRICS.phase("rollups"):
+        refresh_rollups(engine, stage)
+    timings["rollups"] = time.perf_counter() - t0
+
+    # UNLOGGED 그대로 교체하면 crash 시 live 테이블이 비워짐 -> 교체 전에 WAL로 한 번 기록
+    t0 = time.perf_counter()
+    with METRICS.phase("set_logged"), engine.begin() as conn:
+        conn.execute(text(f'ALTER TABLE "{stage}" SET LOGGED'))
+    timings["set_logged"] = time.perf_counter() - t0
+    return timings
+
+
+# ---------- rename ----------
+def rename_family(conn: Connection, src: str, dst: str) -> None:
+    """Rename table `src` to `dst` with its "{src}_*" indexes, owned sequences and rollup views."""
+    relations = [src] + [v for v in rollup_names(src).values() if _exists(conn, v)]
+    renames = []
+    for rel in relations:
+        renames += [("INDEX", name) for name in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :t"
+        ), {"t": rel}).scalars()]
+    renames += [("SEQUENCE", name) for name in conn.execute(text('''
+        SELECT c.relname FROM pg_depend d JOIN pg_class c ON c.oid = d.objid
+        WHERE c.relkind = 'S' AND d.refobjid = to_regclass(:t) AND d.deptype IN ('a', 'i')
+    '''), {"t": f'"{src}"'}).scalars()]
+    renames += [("MATERIALIZED VIEW", v) for v in relations[1:]]
+
+    for kind, name in renames:
+        if name.startswith(f"{src}_"):
+            conn.execute(text(f'ALTER {kind} "{name}" RENAME TO "{(dst + name[len(src):])[:63]}"'))
+    conn.execute(text(f'ALTER TABLE "{src}" RENAME TO "{dst}"'))
+
+
+def _swap_once(conn: Connection, table: str, stage: str) -> None:
+    old = old_name(table)
+    conn.execute(text(f"SET LOCAL lock_timeout = {int(LOCK_TIMEOUT_MS)}"))
+    conn.execute(text(f'DROP TABLE IF EXISTS "{old}" CASCADE'))
+    if _exists(conn, table):
+        rename_family(conn, table, old)
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        conn.execute(text(f"COMMENT ON TABLE \"{old}\" IS '{RETIRED_TAG}{stamp}'"))
+    rename_family(conn, stage, table)
+
+
+def swap_in(engine: Engine, table: str, stage: str,
+            on_commit: Optional[Callable[[Connection], int]] = None) -> Optional[int]:
+    """
+    Atomically replace `table` with `stage`. Retries when the live table's lock
+    cannot be taken within LOCK_TIMEOUT_MS (a long reader), instead of queueing
+    every other reader behind the ALTER. Returns on_commit()'s value (generation).
+    """
+    for attempt in range(1, SWAP_RETRIES + 1):
+        t0 = time.perf_counter()
+        try:
+            with engine.begin() as conn:
+                _swap_once(conn, table, stage)
+                result = on_commit(conn) if on_commit else None
+        except OperationalError as e:
+            if "lock timeout" not in str(e) or attempt == SWAP_RETRIES:
+                raise
+            print(f"[WARN] swap attempt {attempt}/{SWAP_RETRIES}: lock timeout, retrying")
+            time.sleep(attempt)
+            continue
+        print(f"[OK] Swapped {stage} -> {table} in {(time.perf_counter() - t0) * 1000:.0f}ms "
+              f"(previous kept as {old_name(table)})")
+        return result
+
+
+# ---------- rollback window ----------
+def retired_at(conn: Connection, table: str) -> Optional[datetime]:
+    note = conn.execute(text("SELECT obj_description(to_regclass(:t), 'pg_class')"),
+                        {"t": f'"{old_name(table)}"'}).scalar()
+    if not note or not note.startswith(RETIRED_TAG):
+        return None
+    return datetime.fromisoformat(note[len(RETIRED_TAG):])
+
+
+def prune_old(engine: Engine, table: str, keep_hours: float) -> bool:
+    """Drop "{table}__old" once it is older than keep_hours. Returns True if dropped."""
+    old = old_name(table)
+    with engine.begin() as conn:
+        if not _exists(conn, old):
+            return False
+        since = retired_at(conn, table)
+        if since and datetime.now(timezone.utc) - since < timedelta(hours=keep_hours):
+            print(f"[INFO] Keeping {old} (retired {since.isoformat()}, window {keep_hours:g}h)")
+            return False
+        conn.execute(text(f'DROP TABLE "{old}" CASCADE'))
+    print(f"[OK] Dropped {old}")
+    return True
+
+
+def rollback(engine: Engine, table: str) -> int:
+    """Swap "{table}__old" back in (the current table becomes the new __old). Returns the generation."""
+    old, tmp = old_name(table), stage_name(table)
+    with engine.begin() as conn:
+        if not _exists(conn, old):
+            raise SystemExit(f"[ERROR] No previous table {old} to roll back to")
+        conn.execute(text(f"SET LOCAL lock_timeout = {int(LOCK_TIMEOUT_MS)}"))
+        conn.execute(text(f'DROP TABLE IF EXISTS "{tmp}" CASCADE'))
+        rename_family(conn, table, tmp)
+        rename_family(conn, old, table)
+        rename_family(conn, tmp, old)
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        conn.execute(text(f"COMMENT ON TABLE \"{old}\" IS '{RETIRED_TAG}{stamp}'"))
+        conn.execute(text(f'COMMENT ON TABLE "{table}" IS NULL'))
+        # 데이터가 바뀌었으므로 캐시 무효화(generation+1), checksum은 모름 -> 다음 적재는 skip 안 함
+        return bump_generation(conn, table)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Roll back or prune the table kept by a swap load.")
+    ap.add_argument("--table", default=os.getenv("CSV_TABLE") or "data", help="Live table (or set CSV_TABLE)")
+    ap.add_argument("--keep-hours", type=float, default=float(os.getenv("CSV_SWAP_KEEP_HOURS", "24")),
+                    help="Rollback window for the previous table (or set CSV_SWAP_KEEP_HOURS)")
+    action = ap.add_mutually_exclusive_group(required=True)
+    action.add_argument("--rollback", action="store_true", help="Swap the previous table back in")
+    action.add_argument("--prune", action="store_true", help="Drop the previous table if past the window")
+    args = ap.parse_args()
+
+    engine = build_engine()
+    if args.rollback:
+        generation = rollback(engine, args.table)
+        print(f"[OK] Rolled back {args.table} to the previous load (generation={generation})")
+    else:
+        prune_old(engine, args.table, args.keep_hours)
+
+
+if __name__ == "__main__":
+    main()
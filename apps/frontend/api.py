@@ -0,0 +1,44 @@
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+import pandas as pd
+import pyarrow as pa
+
+from utils.config import API_BASE_URL, API_POOL_SIZE, API_TIMEOUT_SECONDS
+
+try:
+    import zstandard  # noqa: F401  httpx가 zstd 응답을 풀려면 필요
+    ACCEPT_ENCODING = "zstd, gzip"
+except ImportError:
+    ACCEPT_ENCODING = "gzip"
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+
+@lru_cache(maxsize=1)
+def get_client() -> httpx.Client:
+    # 프로세스에 하나 - 세션(스레드)들이 keep-alive 커넥션 풀을 공유
+    limits = httpx.Limits(max_connections=API_POOL_SIZE, max_keepalive_connections=API_POOL_SIZE)
+    return httpx.Client(base_url=API_BASE_URL, limits=limits, timeout=API_TIMEOUT_SECONDS,
+                        headers={"Accept-Encoding": ACCEPT_ENCODING})
+
+
+def get_json(path: str, params: Optional[dict] = None):
+    resp = get_client().get(path, params=params)
+    resp.raise_for_status()
+    return resp.json()
+
+
+def read_arrow(params: dict) -> pd.DataFrame:
+    """/timeseries/export as an Arrow IPC stream (zstd record batches) -> DataFrame."""
+    resp = get_client().get("/timeseries/export", params={**params, "format": "arrow"},
+                            headers={"Accept": ARROW_STREAM})
+    resp.raise_for_status()
+    with pa.ipc.open_stream(resp.content) as reader:
+        return reader.read_all().to_pandas()
+
+
+def dataset_version() -> str:
+    """The backend's dataset version (etl_load_state), so the frontend cache invalidates with it."""
+    return get_json("/cache/version")["dataset_version"]
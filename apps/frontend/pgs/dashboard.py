@@ -1,83 +1,78 @@
-import re
-import pandas as pd
 import streamlit as st
-from sqlalchemy import text
-from db import get_engine
-from utils.config import TABLE, DB_HOST, DB_PORT, DB_NAME
+from utils.config import TABLE, DB_HOST, DB_PORT, DB_NAME, DATA_SOURCE, API_BASE_URL
+from utils.downsample import METHODS, downsample
+from utils.frame import load_frame, overview, select, top_emitters, world
+from utils.query_cache import get_query_cache
+
+def _debug_panel():
+    cache = get_query_cache()
+    with st.sidebar.expander("Cache debug"):
+        stats = cache.stats()
+        st.write({k: stats[k] for k in ("hit_ratio", "hits", "misses", "entries", "evictions", "invalidations")})
+        st.caption(f"{stats['bytes'] / 1024 ** 2:.1f} / {stats['max_bytes'] / 1024 ** 2:.0f} MB, "
+                   f"dataset version {stats['dataset_version']}")
+        st.dataframe(cache.timing_table(), use_container_width=True, hide_index=True)
+        if st.button("Clear cache"):
+            cache.clear()
 
 def render():
     st.title("🌍 Carbon Dashboard")
 
-    # 기본 통계
-    with get_engine().connect() as conn:
-        q_stats = text(f'''
-            SELECT COUNT(*) AS rows,
-                   MIN(year) AS min_year,
-                   MAX(year) AS max_year,
-                   COUNT(DISTINCT name) AS countries
-            FROM "{TABLE}";
-        ''')
-        stats = pd.read_sql(q_stats, conn)
+    # 전체 국가-연도 프레임을 한 번만 조회 (세션 공유 캐시) -> 이후 필터/집계는 메모리에서
+    df = load_frame()
 
     st.sidebar.header("Filters")
-    with get_engine().connect() as conn:
-        countries = pd.read_sql(
-            text(f'SELECT DISTINCT name FROM "{TABLE}" WHERE name IS NOT NULL ORDER BY name'),
-            conn
-        )["name"].tolist()
-        years_txt = pd.read_sql(
-            text(f'SELECT DISTINCT year FROM "{TABLE}" WHERE year IS NOT NULL'),
-            conn
-        )["year"].tolist()
-
-    year_numbers = sorted({int(y) for y in years_txt if re.fullmatch(r"\d{4}", str(y))})
+    countries = [str(c) for c in df["name"].cat.categories]
+    year_numbers = sorted(df["year"].unique().tolist())
     iso = st.sidebar.selectbox("Country (Name)", ["(All)"] + countries, index=0)
     year_from, year_to = (min(year_numbers), max(year_numbers)) if year_numbers else (None, None)
     yr = st.sidebar.slider("Year (numeric only)", min_value=year_from or 1900, max_value=year_to or 2100,
                         value=(year_from or 1900, year_to or 2100))
 
+    agg = "Sum"
+    if iso == "(All)":
+        agg = st.sidebar.radio("(All) aggregation", ["Sum", "Mean", "Per country"], horizontal=True)
+        top_n = st.sidebar.slider("Countries shown (Per country)", 1, 50, 10) if agg == "Per country" else None
+    points = st.sidebar.slider("Chart points per series", 20, 1000, 300, step=10)
+    method = st.sidebar.selectbox("Downsampling", METHODS, index=0)
+
     st.subheader("Overview")
-    st.write(stats)
+    st.write(overview(df))
 
-    # 시계열
-    filters, params = [], {}
+    # 시계열: (All)이면 국가 합계/평균(World) 또는 상위 배출국별, 아니면 선택한 국가
+    by = None
     if iso != "(All)":
-        filters.append('name = :nm')
-        params["nm"] = iso
-    filters.append("year ~ '^\\d{4}$'")
-    filters.append("year::int BETWEEN :y1 AND :y2")
-    params["y1"], params["y2"] = yr
-
-    where = "WHERE " + " AND ".join(filters)
-    sql_ts = text(f'''
-        SELECT name, year::int AS year, co2_mt, total_ghg_100y, population, gdp
-        FROM "{TABLE}"
-        {where}
-        ORDER BY year
-    ''')
-
-    with get_engine().connect() as conn:
-        ts = pd.read_sql(sql_ts, conn, params=params)
+        ts = select(df, iso, yr)
+        scope = iso
+    elif agg == "Per country":
+        selected = select(df, None, yr)
+        leaders = top_emitters(df, int(selected["year"].max()), top_n)["name"] if not selected.empty else []
+        ts = selected[selected["name"].isin(leaders).to_numpy()]
+        scope, by = f"top {top_n} emitters", "name"
+    else:
+        ts = world(select(df, None, yr), how=agg.lower())
+        scope = f"World ({agg.lower()} of countries)"
 
+    # 차트에는 시리즈당 최대 points개만 전송, 표는 전체 해상도
     col1, col2 = st.columns(2)
-    with col1:
-        st.subheader("CO₂ (Mt) over time")
-        st.line_chart(ts.set_index("year")["co2_mt"])
-    with col2:
-        st.subheader("Total GHG (100y) over time")
-        st.line_chart(ts.set_index("year")["total_ghg_100y"])
+    for col, metric, label in ((col1, "co2_mt", "CO₂ (Mt)"), (col2, "total_ghg_100y", "Total GHG (100y)")):
+        with col:
+            st.subheader(f"{label} over time - {scope}")
+            chart = downsample(ts, "year", metric, points, method, by=by)
+            if by:
+                st.line_chart(chart.astype({by: str}), x="year", y=metric, color=by)
+            else:
+                st.line_chart(chart.set_index("year")[metric])
+    with st.expander(f"Data (full resolution, {len(ts):,} rows)"):
+        st.dataframe(ts, use_container_width=True, hide_index=True)
 
     st.subheader("Top emitters (latest year)")
     if not ts.empty:
-        latest_year = ts["year"].max()
-        with get_engine().connect() as conn:
-            top = pd.read_sql(text(f'''
-                SELECT name, year::int AS year, co2_mt
-                FROM "{TABLE}"
-                WHERE year ~ '^\\d{{4}}$' AND year::int = :ly
-                ORDER BY co2_mt DESC NULLS LAST
-                LIMIT 20
-            '''), conn, params={"ly": int(latest_year)})
-        st.dataframe(top, use_container_width=True)
+        latest_year = int(ts["year"].max())
+        st.dataframe(top_emitters(df, latest_year, 20), use_container_width=True)
 
-    st.caption(f"DB: {DB_HOST}:{DB_PORT}/{DB_NAME}, table: {TABLE}")
+    if DATA_SOURCE == "api":
+        st.caption(f"API: {API_BASE_URL}, table: {TABLE}")
+    else:
+        st.caption(f"DB: {DB_HOST}:{DB_PORT}/{DB_NAME}, table: {TABLE}")
+    _debug_panel()
@@ -1,9 +1,7 @@
-import pandas as pd
 import streamlit as st
 import altair as alt
-from sqlalchemy import text
-from db import get_engine
-from utils.config import TABLE
+from utils.downsample import METHODS, downsample
+from utils.frame import load_frame, load_long
 
 CATEGORY_COLUMNS = {
     "인구·경제": ["population", "gdp", "energy_per_gdp_kwh", "co2_per_gdp_kg"],
@@ -13,45 +11,57 @@ CATEGORY_COLUMNS = {
     "토지·흡수원": ["land_use_change_co2_mt", "cumulative_luc_co2_mt"],
     "효율/국민 체감 지표": ["co2_per_capita_t", "co2_per_unit_energy_kw_kwh"]
 }
+ALL_COLUMNS = [c for cols in CATEGORY_COLUMNS.values() for c in cols]
+DEFAULT_COUNTRY = "South Korea"
+
+def category_chart(long, cols, title):
+    # 카테고리 하나 = 차트 하나: 데이터는 한 번만 포함되고 지표별 facet, 국가별 색
+    return (
+        alt.Chart(long)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X("year:O", title="연도"),
+            y=alt.Y("value:Q", title=None),
+            color=alt.Color("name:N", title="국가"),
+            tooltip=["name", "year", "metric", "value"]
+        )
+        .properties(width=280, height=220)
+        .facet(facet=alt.Facet("metric:N", title=title, sort=cols), columns=2)
+        .resolve_scale(y="independent")
+    )
 
 def render():
     st.title("탄소중립 데이터와 정책 연계")
 
     st.sidebar.header("정책 데이터 필터")
     cat_selected = st.sidebar.selectbox("카테고리 선택", list(CATEGORY_COLUMNS.keys()))
+    countries = [str(c) for c in load_frame()["name"].cat.categories]
+    names = st.sidebar.multiselect("국가 선택", countries,
+                                   default=[DEFAULT_COUNTRY] if DEFAULT_COUNTRY in countries else countries[:1])
+    if not names:
+        st.info("국가를 하나 이상 선택하세요.")
+        return
+
+    points = st.sidebar.slider("차트 시리즈당 최대 점 수", 20, 1000, 300, step=10)
+    method = st.sidebar.selectbox("다운샘플링", METHODS, index=0)
 
     cols = CATEGORY_COLUMNS[cat_selected]
 
-    # DB에서 대한민국 데이터 전체 가져오기
-    sql = text(f'''
-        SELECT year::int AS year, {",".join(cols)}
-        FROM "{TABLE}"
-        WHERE name = 'South Korea' AND year ~ '^\\d{{4}}$'
-        ORDER BY year
-    ''')
-    with get_engine().connect() as conn:
-        df = pd.read_sql(sql, conn)
-
-    st.subheader(f"🇰🇷 대한민국 - {cat_selected}")
+    # 선택 국가의 전체 카테고리 지표를 한 번에 조회 (long form, 캐시) -> 카테고리 변경은 메모리에서
+    long = load_long(names, ALL_COLUMNS)
+    view = long[long["metric"].isin(cols).to_numpy()].astype({"name": str, "metric": str})
+
+    st.subheader(f"{', '.join(names)} - {cat_selected}")
     st.write("전체 연도 데이터")
-    st.dataframe(df, use_container_width=True)
+    table = view.pivot_table(index=["name", "year"], columns="metric", values="value", aggfunc="first")
+    st.dataframe(table.reindex(columns=[c for c in cols if c in table.columns]).reset_index(),
+                 use_container_width=True)
 
     # 시각화
     st.markdown("### 시각화")
-    for c in cols:
-        if c in df.columns:
-            chart = (
-                alt.Chart(df)
-                .mark_line(point=True)
-                .encode(
-                    x=alt.X("year:O", title="연도"),
-                    y=alt.Y(f"{c}:Q", title=c),
-                    tooltip=["year", c]
-                )
-                .properties(
-                    title=f"{c} 추세 (대한민국)",
-                    width=600,
-                    height=300
-                )
-            )
-            st.altair_chart(chart, use_container_width=True)
+    if view.empty:
+        st.info("선택한 국가에 이 카테고리 데이터가 없습니다.")
+        return
+    # 차트는 (국가, 지표) 시리즈마다 최대 points개, 위 표는 전체 해상도
+    chart = downsample(view, "year", "value", points, method, by=["name", "metric"])
+    st.altair_chart(category_chart(chart, cols, cat_selected), use_container_width=False)
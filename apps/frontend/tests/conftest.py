@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# streamlit run app.py 와 같이 apps/frontend 를 import 루트로
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.downsample import downsample, lttb, minmax
+
+
+@pytest.fixture
+def series():
+    x = np.arange(10_000)
+    y = np.sin(x / 300.0)
+    y[4321] = 50.0    # spike
+    y[7654] = -50.0   # dip
+    return x, y
+
+
+def test_lttb_point_count_and_ends(series):
+    x, y = series
+    idx = lttb(x, y, 200)
+    assert len(idx) == 200
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert (np.diff(idx) > 0).all()
+
+
+def test_lttb_keeps_spikes(series):
+    x, y = series
+    idx = lttb(x, y, 200)
+    assert 4321 in idx and 7654 in idx
+
+
+def test_minmax_point_count_ends_and_spikes(series):
+    _, y = series
+    idx = minmax(y, 200)
+    assert len(idx) <= 200
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert 4321 in idx and 7654 in idx
+    assert (np.diff(idx) > 0).all()
+
+
+def test_short_series_unchanged():
+    x, y = np.arange(50), np.random.default_rng(0).random(50)
+    assert (lttb(x, y, 200) == np.arange(50)).all()
+    assert (minmax(y, 200) == np.arange(50)).all()
+
+
+def test_downsample_per_series_drops_nan():
+    x = np.arange(1_000)
+    df = pd.DataFrame({"name": np.repeat(["a", "b"], len(x)), "year": np.tile(x, 2),
+                       "v": np.tile(np.cos(x / 50.0), 2)})
+    df.loc[0, "v"] = np.nan
+    for method in ("lttb", "minmax"):
+        out = downsample(df, "year", "v", 100, method, by="name")
+        sizes = out.groupby("name").size()
+        assert (sizes <= 100).all()
+        assert out["v"].notna().all()
+        for name, rows in out.groupby("name"):
+            years = df[(df["name"] == name) & df["v"].notna()]["year"]
+            assert rows["year"].iloc[0] == years.min() and rows["year"].iloc[-1] == years.max()
+    with pytest.raises(ValueError, match="Unknown downsampling method"):
+        downsample(df, "year", "v", 100, "nope")
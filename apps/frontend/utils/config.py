@@ -7,8 +7,19 @@ except Exception:
     pass
 
 DB_HOST = os.getenv("DB_HOST")
-DB_PORT = int(os.getenv("DB_PORT"))
+DB_PORT = int(os.getenv("DB_PORT", "5432"))
 DB_NAME = os.getenv("DB_NAME")
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
 TABLE = os.getenv("CSV_TABLE")
+
+# 데이터 조회 경로: db = Postgres 직접, api = FastAPI 백엔드 (커넥션은 백엔드 풀이 담당)
+DATA_SOURCE = os.getenv("DATA_SOURCE", "db").lower()
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+API_TIMEOUT_SECONDS = float(os.getenv("API_TIMEOUT_SECONDS", "30"))
+
+# 대시보드 쿼리 캐시 (세션 공유, dataset version이 바뀌면 비워짐)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+QUERY_CACHE_MAX_MB = int(os.getenv("QUERY_CACHE_MAX_MB", "256"))
+QUERY_CACHE_VERSION_TTL_SECONDS = float(os.getenv("QUERY_CACHE_VERSION_TTL_SECONDS", "5"))
@@ -0,0 +1,70 @@
+"""
+Chart-side point reduction. Tables keep the full-resolution frames; only what
+goes to st.line_chart / Altair is thinned to at most `points` per series.
+- lttb   : Largest-Triangle-Three-Buckets - keeps the points that shape the line.
+- minmax : first/last plus the min and max of each bucket - keeps spikes exactly.
+"""
+
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+METHODS = ["lttb", "minmax"]
+
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of the `points` samples LTTB keeps (x ascending, no NaN)."""
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x, y = x.astype(np.float64), y.astype(np.float64)
+    # 첫/끝 점은 고정, 나머지를 points-2 개 구간으로
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    out = np.empty(points, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()   # 다음 구간의 평균점
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def minmax(y: np.ndarray, points: int) -> np.ndarray:
+    """Indices of first, last and each bucket's min/max (about `points` in total, no NaN)."""
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+    buckets = (np.arange(n) * ((points - 2) // 2) // n)
+    s = pd.Series(y)
+    keep = np.concatenate([[0, n - 1], s.groupby(buckets).idxmin().to_numpy(), s.groupby(buckets).idxmax().to_numpy()])
+    return np.unique(keep)
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, points: int, method: str = "lttb",
+               by: Optional[Union[str, List[str]]] = None) -> pd.DataFrame:
+    """Rows of `df` kept for plotting `y` against `x`, at most about `points` per `by` series (NaN y dropped)."""
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method} (choose from {', '.join(METHODS)})")
+    by = [by] if isinstance(by, str) else list(by or [])
+    data = df[df[y].notna().to_numpy()].sort_values(by + [x], kind="stable")
+    if by:
+        # 정렬 후 같은 시리즈는 연속 -> 경계에서 자름
+        codes = data.groupby(by, sort=False, observed=True).ngroup().to_numpy()
+        groups = np.split(np.arange(len(data)), np.flatnonzero(np.diff(codes)) + 1)
+    else:
+        groups = [np.arange(len(data))]
+    xs, ys = data[x].to_numpy(), data[y].to_numpy()
+    keep = []
+    for rows in groups:
+        if len(rows) <= points:
+            keep.append(rows)
+        elif method == "lttb":
+            keep.append(rows[lttb(xs[rows], ys[rows], points)])
+        else:
+            keep.append(rows[minmax(ys[rows], points)])
+    return data.iloc[np.concatenate(keep)] if keep else data
@@ -0,0 +1,110 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from db import get_engine
+from utils.config import TABLE, DATA_SOURCE
+from utils.query_cache import get_query_cache
+
+# 대시보드가 쓰는 지표 (float64: gdp ~1e13 도 반올림 없이 - 표는 원본 해상도)
+METRICS = ["co2_mt", "total_ghg_100y", "population", "gdp"]
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """name/iso_code -> category, year -> int16 (non-numeric years dropped), metrics -> float64; sorted by (name, year)."""
+    year = pd.to_numeric(df["year"], errors="coerce")
+    keep = year.notna() & (year % 1 == 0)
+    out = pd.DataFrame({
+        "name": df["name"][keep].astype("category"),
+        "iso_code": df["iso_code"][keep].astype("category"),
+        "year": year[keep].astype(np.int16),
+    })
+    for m in METRICS:
+        out[m] = pd.to_numeric(df[m][keep], errors="coerce").astype(np.float64)
+    return out.sort_values(["name", "year"], kind="stable").reset_index(drop=True)
+
+
+def load_frame() -> pd.DataFrame:
+    """
+    Every row with a name and year plus the dashboard metrics - one query (or one
+    Arrow export, same rows), cached per dataset version.
+    """
+    def load() -> pd.DataFrame:
+        if DATA_SOURCE == "api":
+            from api import read_arrow
+            return compact(read_arrow({"metric": METRICS}))
+        # API export(emissions._filters)와 같은 행: 이름/연도 없는 행 제외
+        with get_engine().connect() as conn:
+            df = pd.read_sql(text(f'''
+                SELECT name, iso_code, year, {", ".join(METRICS)}
+                FROM "{TABLE}"
+                WHERE name IS NOT NULL AND year IS NOT NULL
+            '''), conn)
+        return compact(df)
+    return get_query_cache().get_or_load("frame", (DATA_SOURCE, TABLE), load)
+
+
+def overview(df: pd.DataFrame) -> pd.DataFrame:
+    """Same figures as the {table}_rollup_stats view."""
+    return pd.DataFrame([{
+        "rows": len(df),
+        "min_year": int(df["year"].min()) if len(df) else None,
+        "max_year": int(df["year"].max()) if len(df) else None,
+        "countries": df["name"].nunique(),
+    }])
+
+
+def select(df: pd.DataFrame, name: Optional[str], years: Tuple[int, int]) -> pd.DataFrame:
+    """Rows of one country (None = all) within the year range."""
+    mask = (df["year"].to_numpy() >= years[0]) & (df["year"].to_numpy() <= years[1])
+    if name is not None:
+        mask &= (df["name"] == name).to_numpy()
+    return df[mask]
+
+
+def world(df: pd.DataFrame, how: str = "sum") -> pd.DataFrame:
+    """
+    Per-year sum (like the {table}_world_year view) or mean over real countries
+    (iso_code set); NULLs are skipped.
+    """
+    grouped = df[df["iso_code"].notna().to_numpy()].groupby("year")[METRICS]
+    out = grouped.sum(min_count=1) if how == "sum" else grouped.mean()
+    return out.reset_index()
+
+
+def top_emitters(df: pd.DataFrame, year: int, n: int = 20) -> pd.DataFrame:
+    """Largest co2_mt in `year` (ties by name; duplicate (name, year) rows counted once), like {table}_rank_year."""
+    rows = df[((df["year"] == year) & df["name"].notna()).to_numpy()].drop_duplicates(["name", "year"])
+    rows = rows.sort_values(["co2_mt", "name"], ascending=[False, True], na_position="last", kind="stable")
+    rows = rows.head(n)[["name", "year", "co2_mt"]].reset_index(drop=True)
+    rows["name"] = rows["name"].astype(str)
+    return rows
+
+
+def load_long(names: List[str], metrics: List[str]) -> pd.DataFrame:
+    """
+    (name, year, metric, value) rows for `names` x `metrics`, NULLs dropped - one query
+    for all metrics, cached per dataset version, so switching the metric subset is free.
+    """
+    def load() -> pd.DataFrame:
+        if DATA_SOURCE == "api":
+            from api import read_arrow
+            wide = read_arrow({"country": names, "metric": metrics})
+        else:
+            with get_engine().connect() as conn:
+                wide = pd.read_sql(text(f'''
+                    SELECT name, year, {", ".join(metrics)}
+                    FROM "{TABLE}"
+                    WHERE name = ANY(:names) AND year IS NOT NULL
+                    ORDER BY name, year
+                '''), conn, params={"names": list(names)})
+        # compact()와 같은 기준: 숫자가 아닌 연도(TEXT 컬럼)는 버림
+        year = pd.to_numeric(wide["year"], errors="coerce")
+        wide = wide[(year.notna() & (year % 1 == 0)).to_numpy()].assign(year=year)
+        long = wide.melt(id_vars=["name", "year"], value_vars=metrics, var_name="metric").dropna(subset=["value"])
+        return long.astype({"name": "category", "metric": "category", "year": np.int16, "value": np.float64}) \
+            .reset_index(drop=True)
+    key = (DATA_SOURCE, TABLE, tuple(sorted(names)), tuple(metrics))
+    return get_query_cache().get_or_load("long", key, load)
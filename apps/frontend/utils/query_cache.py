@@ -0,0 +1,174 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from db import get_engine
+from utils.config import (TABLE, DATA_SOURCE, QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_MAX_MB,
+                          QUERY_CACHE_VERSION_TTL_SECONDS)
+
+# ETL(csv_to_pg.load_state)가 적재/rollup refresh마다 갱신하는 테이블
+STATE_TABLE = "etl_load_state"
+
+
+def dataset_version(conn) -> str:
+    """'<generation>.<rollups refresh>' from etl_load_state (same value the backend cache uses)."""
+    if not conn.execute(text("SELECT to_regclass(:t) IS NOT NULL"), {"t": STATE_TABLE}).scalar():
+        return "0"
+    # to_jsonb: rollups_at 컬럼이 없는 (이전 ETL) 테이블에서도 동작
+    state = conn.execute(text(f'SELECT to_jsonb(s) FROM "{STATE_TABLE}" s WHERE table_name = :t'),
+                         {"t": TABLE}).scalar()
+    if not state:
+        return "0"
+    return f"{state.get('generation') or 0}.{state.get('rollups_at') or ''}"
+
+
+def db_dataset_version() -> str:
+    with get_engine().connect() as conn:
+        return dataset_version(conn)
+
+
+class QueryCache:
+    """
+    DataFrames of dashboard queries, shared by every Streamlit session of the process.
+    - LRU over at most `max_entries` frames / `max_bytes` (DataFrame memory_usage).
+    - Entries belong to a dataset version (`version_loader`: from Postgres, or
+      from the backend in API mode), polled at most every `version_ttl`
+      seconds; a new ETL load or rollup refresh empties the cache.
+    - Concurrent misses for one key (several sessions rerunning at once) run the
+      query once; the others wait for its result.
+    - Per query name: hits, misses and load times for the debug panel.
+    Returned frames are shared - callers must not modify them in place.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 256 * 1024 ** 2, version_ttl: float = 5,
+                 version_loader: Callable[[], str] = db_dataset_version) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version_ttl = version_ttl
+        self._load_version = version_loader
+        self._entries: "OrderedDict[Tuple, Tuple[str, pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self._version: Optional[str] = None
+        self._version_checked = 0.0
+        self.counters = dict(hits=0, misses=0, evictions=0, invalidations=0)
+        self.timings: Dict[str, dict] = {}
+
+    # ---------- dataset version ----------
+    def version(self) -> str:
+        with self._lock:
+            if self._version is not None and time.monotonic() - self._version_checked < self.version_ttl:
+                return self._version
+        current = self._load_version()
+        with self._lock:
+            if self._version is not None and current != self._version:
+                self._clear()
+                self.counters["invalidations"] += 1
+            self._version, self._version_checked = current, time.monotonic()
+            return current
+
+    # ---------- LRU ----------
+    def _put(self, key: Tuple, version: str, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[2]
+        self._entries[key] = (version, df, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._bytes -= self._entries.pop(next(iter(self._entries)))[2]
+            self.counters["evictions"] += 1
+
+    def _clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    # ---------- lookup ----------
+    def _record(self, name: str, hit: bool, seconds: float) -> None:
+        t = self.timings.setdefault(name, dict(hits=0, misses=0, load_ms_total=0.0, load_ms_last=None))
+        if hit:
+            t["hits"] += 1
+            self.counters["hits"] += 1
+        else:
+            t["misses"] += 1
+            t["load_ms_total"] += seconds * 1000
+            t["load_ms_last"] = round(seconds * 1000, 1)
+            self.counters["misses"] += 1
+
+    def _lookup(self, key: Tuple, version: str) -> Optional[pd.DataFrame]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def get_or_load(self, name: str, params: Tuple, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Cached frame for (name, params); `loader()` runs only on a miss."""
+        if self.max_entries <= 0:
+            return loader()
+        version = self.version()
+        key = (name, params)
+        with self._lock:
+            df = self._lookup(key, version)
+            if df is not None:
+                self._record(name, True, 0.0)
+                return df
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:   # 같은 키는 한 세션만 조회, 나머지는 결과를 기다림
+            with self._lock:
+                df = self._lookup(key, version)
+                if df is not None:
+                    self._record(name, True, 0.0)
+                    return df
+            t0 = time.perf_counter()
+            df = loader()
+            with self._lock:
+                self._record(name, False, time.perf_counter() - t0)
+                if version == self._version:   # 조회 중에 버전이 바뀌었으면 저장하지 않음
+                    self._put(key, version, df)
+                self._key_locks.pop(key, None)
+        return df
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {**self.counters, "entries": len(self._entries), "bytes": self._bytes,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes,
+                    "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+                    "dataset_version": self._version}
+
+    def timing_table(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [{"query": name, "hits": t["hits"], "misses": t["misses"],
+                     "hit_ratio": round(t["hits"] / (t["hits"] + t["misses"]), 3),
+                     "load_ms_avg": round(t["load_ms_total"] / t["misses"], 1) if t["misses"] else None,
+                     "load_ms_last": t["load_ms_last"]}
+                    for name, t in sorted(self.timings.items())]
+        return pd.DataFrame(rows, columns=["query", "hits", "misses", "hit_ratio", "load_ms_avg", "load_ms_last"])
+
+
+@lru_cache(maxsize=1)
+def get_query_cache() -> QueryCache:
+    # 프로세스에 하나 - Streamlit 세션(스레드)들이 공유
+    if DATA_SOURCE == "api":
+        from api import dataset_version as api_dataset_version   # httpx/pyarrow는 api 모드에서만 필요
+        loader = api_dataset_version
+    else:
+        loader = db_dataset_version
+    return QueryCache(
+        max_entries=QUERY_CACHE_MAX_ENTRIES,
+        max_bytes=QUERY_CACHE_MAX_MB * 1024 ** 2,
+        version_ttl=QUERY_CACHE_VERSION_TTL_SECONDS,
+        version_loader=loader,
+    )